@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+HTTP / JSON API for Flight Management System
+
+Read-only API over the service layer for gate displays and ops tools,
+run next to (not instead of) the CLI. Every worker thread has its own
+read-only pooled connection.
+
+Endpoints (GET):
+    /flights                        search - destination, origin, status, airline,
+                                    pilot, start_date, end_date, limit, after_departure, after_id
+    /flights/<flight_number>        one flight
+    /pilots/<pilot_id>/schedule     a pilot's active assignments
+    /destinations                   every destination by name
+    /reports/flights-per-destination
+    /reports/flights-per-pilot
+    /reports/status-summary
+    /reports/busiest-routes         limit, start_date, end_date, airline
+
+Responses carry an ETag and Last-Modified built from the Data_version
+counters of the tables they read, so If-None-Match / If-Modified-Since
+get a 304 without running the query. Large bodies are gzipped when the
+client accepts it.
+
+Usage:
+    python api_server.py [--db PATH] [--host 127.0.0.1] [--port 8080] [--workers 8]
+"""
+
+import argparse
+import gzip
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import schema
+from database import DatabaseManager
+from destination_service import DestinationService
+from flight_query import FlightQuery
+from flight_service import FlightService
+from pilot_service import PilotService
+from report_service import ReportService
+
+
+# bodies smaller than this aren't worth gzipping
+GZIP_MIN_BYTES = 1400
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SCHEDULE_FIELDS = ['flight_number', 'airline', 'origin', 'destination', 'departure_time',
+                   'arrival_time', 'status', 'role', 'assignment_status']
+DESTINATION_FIELDS = ['destination_id', 'destination_name', 'country', 'airport_code', 'timezone']
+
+
+class ApiError(Exception):
+    """
+    request that can't be answered - carries the HTTP status to send
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class FlightApi:
+    """
+    the API itself, without the HTTP plumbing
+
+    each route is (pattern, tables it reads, handler). get() runs a
+    request inside one read transaction: the data versions of the route's
+    tables are read first, then the handler - so the ETag always matches
+    the snapshot the body came from
+    """
+
+    def __init__(self, db_manager):
+        """
+        setup API
+
+        Args:
+            db_manager: DatabaseManager to read through (read_only=True)
+        """
+        self.db_manager = db_manager
+        self.flight_service = FlightService(db_manager)
+        self.pilot_service = PilotService(db_manager)
+        self.destination_service = DestinationService(db_manager)
+        self.report_service = ReportService(db_manager)
+
+        self.routes = [
+            (r'/flights', ['Flights', 'Flight_assignments', 'Pilots', 'Airlines', 'Destinations'],
+             self._find_flights),
+            (r'/flights/(?P<flight_number>[^/]+)', ['Flights'], self._get_flight),
+            (r'/pilots/(?P<pilot_id>\d+)/schedule', ['Flight_assignments', 'Flights', 'Airlines', 'Destinations'],
+             self._pilot_schedule),
+            (r'/destinations', ['Destinations'], self._destinations),
+            (r'/reports/flights-per-destination', ['Flights', 'Destinations'], self._flights_per_destination),
+            (r'/reports/flights-per-pilot', ['Flight_assignments', 'Pilots'], self._flights_per_pilot),
+            (r'/reports/status-summary', ['Flights'], self._status_summary),
+            (r'/reports/busiest-routes', ['Flights', 'Destinations'], self._busiest_routes),
+        ]
+        self.routes = [(re.compile(pattern + '$'), tables, handler) for pattern, tables, handler in self.routes]
+
+    def get(self, path, params, if_none_match=None, if_modified_since=None):
+        """
+        answers one GET
+
+        Args:
+            path: URL path
+            params: {name: value} query parameters
+            if_none_match / if_modified_since: the request's conditional headers
+
+        Returns:
+            (status, payload or None for 304, etag, last_modified unix time)
+        """
+        for pattern, tables, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+
+        conn = self.db_manager.get_connection()[0]
+        conn.execute("BEGIN")
+        try:
+            versions = schema.data_versions(conn.cursor())
+            etag = 'W/"' + '-'.join(str(versions[table][0]) for table in tables) + '"'
+            last_modified = max(versions[table][1] for table in tables)
+
+            if _not_modified(etag, last_modified, if_none_match, if_modified_since):
+                return HTTPStatus.NOT_MODIFIED, None, etag, last_modified
+
+            # another process writes the data - drop reference tables it changed
+            self.db_manager.reference_cache.refresh({table: version for table, (version, _) in versions.items()})
+            return HTTPStatus.OK, handler(params, **match.groupdict()), etag, last_modified
+        finally:
+            conn.rollback()
+
+    def _find_flights(self, params):
+        filters = {}
+        for name in ('destination', 'origin', 'airline', 'pilot'):
+            if name in params:
+                filters[name] = _int_param(params, name)
+        for name in ('status', 'start_date', 'end_date'):
+            if name in params:
+                filters[name] = params[name]
+
+        limit = _limit_param(params, DEFAULT_PAGE_SIZE)
+        after = None
+        if 'after_departure' in params or 'after_id' in params:
+            after = (params.get('after_departure', ''), _int_param(params, 'after_id', 0))
+
+        try:
+            query = FlightQuery(**filters)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        flights = query.run(self.flight_service.cur, self.db_manager.reference_cache, after, limit,
+                            self.db_manager.result_cache)
+
+        next_page = None
+        if len(flights) == limit:
+            next_page = {'after_departure': flights[-1].departure_time, 'after_id': flights[-1].flight_id}
+        return {'flights': [flight._asdict() for flight in flights], 'next': next_page}
+
+    def _get_flight(self, params, flight_number):
+        flight = self.flight_service.get_flight(flight_number)
+        if flight is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Flight {flight_number} not found")
+        return flight.as_dict()
+
+    def _pilot_schedule(self, params, pilot_id):
+        schedule = self.pilot_service.get_pilot_schedule(int(pilot_id))
+        return [dict(zip(SCHEDULE_FIELDS, row)) for row in schedule]
+
+    def _destinations(self, params):
+        return [dict(zip(DESTINATION_FIELDS, row)) for row in self.destination_service.get_destinations_by_name()]
+
+    def _flights_per_destination(self, params):
+        return [{'destination': name, 'flights': count}
+                for name, count in self.report_service.get_flights_per_destination()]
+
+    def _flights_per_pilot(self, params):
+        return [{'pilot': name, 'flights': count}
+                for name, count in self.report_service.get_flights_per_pilot()]
+
+    def _status_summary(self, params):
+        return [{'status': status, 'flights': count}
+                for status, count in self.report_service.get_flight_status_summary()]
+
+    def _busiest_routes(self, params):
+        airline = _int_param(params, 'airline') if 'airline' in params else None
+        try:
+            routes = self.report_service.get_busiest_routes(_limit_param(params, 10),
+                                                            params.get('start_date'), params.get('end_date'),
+                                                            airline)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        return [{'origin_id': origin_id, 'destination_id': destination_id, 'route': route, 'flights': count}
+                for origin_id, destination_id, route, count in routes]
+
+
+def _int_param(params, name, default=None):
+    """integer query parameter, 400 if it isn't one"""
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number")
+
+
+def _limit_param(params, default):
+    """limit query parameter, 400 unless it's 1..MAX_PAGE_SIZE"""
+    limit = _int_param(params, 'limit', default)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """
+    whether the client's copy is current. If-None-Match wins over
+    If-Modified-Since when both are sent
+    """
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or etag[2:] in tags
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    turns HTTP GETs into FlightApi.get calls and the results into JSON
+    """
+
+    server_version = 'FlightManagementAPI/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            status, payload, etag, last_modified = self.server.api.get(
+                url.path.rstrip('/') or '/', params,
+                self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'))
+        except ApiError as e:
+            self._send(e.status, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+            return
+
+        headers = {'ETag': etag, 'Last-Modified': formatdate(last_modified, usegmt=True),
+                   'Cache-Control': 'no-cache'}
+        self._send(status, payload, headers)
+
+    def _send(self, status, payload, headers=None):
+        """writes the response, gzipped if it's big and the client takes gzip"""
+        body = b''
+        if payload is not None:
+            body = json.dumps(payload, default=str).encode('utf-8')
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Vary', 'Accept-Encoding')
+            if len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ApiServer(HTTPServer):
+    """
+    HTTP server with a fixed pool of worker threads
+
+    unlike ThreadingHTTPServer (a new thread per request) the workers
+    live as long as the server, so each keeps one read-only connection
+    checked out of the pool for its whole life
+    """
+
+    def __init__(self, server_address, api, workers=8, quiet=False):
+        """
+        setup server
+
+        Args:
+            server_address: (host, port)
+            api: FlightApi to answer with
+            workers: requests handled at once
+            quiet: don't log every request to stderr
+        """
+        super().__init__(server_address, ApiRequestHandler)
+        self.api = api
+        self.quiet = quiet
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='api-worker')
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def main():
+    """
+    main function with command line interface
+
+    serves the given database (FlightManagement.db by default) until
+    Ctrl-C. the database must already exist and be migrated - start the
+    CLI against it once first
+    """
+    parser = argparse.ArgumentParser(
+        description='Flight Management HTTP API')
+    parser.add_argument('--db', default='FlightManagement.db', help='Database file to serve')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=8, help='Worker threads / read connections')
+    parser.add_argument('--quiet', action='store_true', help="Don't log requests")
+
+    args = parser.parse_args()
+
+    try:
+        db_manager = DatabaseManager(args.db, read_only=True, pool_size=args.workers + 1)
+    except schema.SchemaError as e:
+        print(f"Error opening database: {e}")
+        return
+
+    server = ApiServer((args.host, args.port), FlightApi(db_manager), args.workers, args.quiet)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
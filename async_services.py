@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flight_query import FlightQuery
+
+
+class _Call:
+    """
+    one facade call - which connection it's running on, so a timeout or
+    cancel can interrupt it
+    """
+
+    __slots__ = ('lock', 'conn', 'cancelled')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conn = None
+        self.cancelled = False
+
+    def interrupt(self):
+        """stop the call: skip it if it hasn't started, interrupt its query if it has"""
+        with self.lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+    def drop_if_queued(self):
+        """skip the call if it hasn't started, leave it alone if it has"""
+        with self.lock:
+            if self.conn is None:
+                self.cancelled = True
+
+
+class AsyncServices:
+    """
+    asyncio facade over the read side of the services
+
+    each call runs the normal (blocking) service method on a worker
+    thread, so the event loop never waits on sqlite. workers borrow a
+    pooled connection per call and set it to query_only while they have
+    it - the facade only reads. max_workers caps how many queries run at
+    once, more calls than that just queue, so hundreds of concurrent
+    lookups are fine.
+
+    every call takes a timeout (seconds, default_timeout if not given).
+    when it runs out, or the awaiting task is cancelled, a call that
+    hasn't started is dropped and a running one gets conn.interrupt() -
+    sqlite stops the statement at its next step and the worker moves on.
+    the awaiting task gets asyncio.TimeoutError / CancelledError
+
+        async with AsyncServices(db_manager, flight_service, pilot_service, report_service) as services:
+            flights, routes = await asyncio.gather(
+                services.find_flights(FlightQuery(status='Delayed'), timeout=2),
+                services.get_busiest_routes(10, timeout=5))
+    """
+
+    def __init__(self, db_manager, flight_service, pilot_service, report_service,
+                 max_workers=None, default_timeout=None):
+        """
+        setup facade
+
+        Args:
+            db_manager: DatabaseManager the services use
+            flight_service / pilot_service / report_service: the services
+            max_workers: queries run at once. defaults to the pool size
+                minus the connection the main thread keeps
+            default_timeout: seconds a call may take when it doesn't pass
+                its own timeout, None for no limit
+        """
+        self.db_manager = db_manager
+        self.flight_service = flight_service
+        self.pilot_service = pilot_service
+        self.report_service = report_service
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers or max(1, db_manager.pool_size - 1)
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='async-services')
+        self._calls = set()
+        self.stats = {'calls': 0, 'timeouts': 0, 'cancelled': 0, 'errors': 0}
+
+    async def call(self, function, *args, timeout=None, **kwargs):
+        """
+        runs any blocking service function on the worker pool
+
+        Args:
+            function: callable using the services / db_manager
+            args / kwargs: passed to it
+            timeout: seconds before giving up, default_timeout if None
+
+        Returns:
+            whatever function returns
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        call = _Call()
+        loop = asyncio.get_event_loop()
+        future = loop.run_in_executor(self._executor, self._run, call,
+                                      functools.partial(function, *args, **kwargs))
+        self.stats['calls'] += 1
+        self._calls.add(call)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            call.interrupt()
+            raise
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            call.interrupt()
+            raise
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            self._calls.discard(call)
+
+    def _run(self, call, function):
+        """
+        worker side of a call: borrow a connection, run, give it back
+        """
+        with call.lock:
+            if call.cancelled:
+                raise asyncio.CancelledError()
+            conn = self.db_manager.get_connection()[0]
+            call.conn = conn
+        try:
+            conn.execute("PRAGMA query_only = ON")
+            return function()
+        finally:
+            # after this the connection may be running someone else's query
+            with call.lock:
+                call.conn = None
+            try:
+                conn.execute("PRAGMA query_only = OFF")
+            finally:
+                self.db_manager.release_connection()
+
+    async def find_flights(self, query, limit=None, timeout=None):
+        """FlightService.find_flights for a FlightQuery, optionally only the first `limit`"""
+        return await self.call(self.flight_service.find_flights, query, limit, timeout=timeout)
+
+    async def find_flights_by(self, timeout=None, limit=None, **filters):
+        """find_flights with FlightQuery keyword filters, e.g. status='Delayed'"""
+        return await self.find_flights(FlightQuery(**filters), limit, timeout)
+
+    async def get_flight(self, flight_number, timeout=None):
+        """FlightService.get_flight"""
+        return await self.call(self.flight_service.get_flight, flight_number, timeout=timeout)
+
+    async def get_pilot_schedule(self, pilot_id, timeout=None):
+        """PilotService.get_pilot_schedule"""
+        return await self.call(self.pilot_service.get_pilot_schedule, pilot_id, timeout=timeout)
+
+    async def get_flights_per_destination(self, timeout=None):
+        """ReportService.get_flights_per_destination"""
+        return await self.call(self.report_service.get_flights_per_destination, timeout=timeout)
+
+    async def get_flights_per_pilot(self, timeout=None):
+        """ReportService.get_flights_per_pilot"""
+        return await self.call(self.report_service.get_flights_per_pilot, timeout=timeout)
+
+    async def get_flight_status_summary(self, timeout=None):
+        """ReportService.get_flight_status_summary"""
+        return await self.call(self.report_service.get_flight_status_summary, timeout=timeout)
+
+    async def get_busiest_routes(self, limit=10, start_date=None, end_date=None, airline_id=None, timeout=None):
+        """ReportService.get_busiest_routes"""
+        return await self.call(self.report_service.get_busiest_routes, limit, start_date, end_date, airline_id,
+                               timeout=timeout)
+
+    async def traffic_matrix(self, direction='departures', group='airport', bucket='hour',
+                             start_date=None, end_date=None, timeout=None):
+        """TrafficAnalytics.traffic_matrix"""
+        return await self.call(self.db_manager.traffic_analytics.traffic_matrix,
+                               direction, group, bucket, start_date, end_date, timeout=timeout)
+
+    def close(self, wait=True):
+        """
+        stops the workers. queued calls that haven't started are dropped
+        """
+        for call in list(self._calls):
+            call.drop_if_queued()
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
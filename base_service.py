@@ -0,0 +1,27 @@
+class BaseService:
+    """
+    base class for the service classes
+
+    conn and cur are looked up from the database manager on every use, so
+    each thread calling into a service works on its own pooled connection
+    instead of everyone sharing the one grabbed at startup. a worker
+    thread should call db_manager.release_connection() when it's done -
+    if it exits without doing so the pool takes the connection back once
+    it runs short, but only then
+    """
+
+    def __init__(self, db_manager):
+        """
+        setup service with database manager
+        """
+        self.db_manager = db_manager
+
+    @property
+    def conn(self):
+        """connection for the calling thread"""
+        return self.db_manager.get_connection()[0]
+
+    @property
+    def cur(self):
+        """cursor for the calling thread"""
+        return self.db_manager.get_connection()[1]
@@ -0,0 +1,267 @@
+import json
+import time
+
+from flight_query import FlightQuery
+
+
+# operations committed together in one transaction
+DEFAULT_BATCH_SIZE = 500
+
+# find_flights keys -> FlightQuery keyword args
+FLIGHT_FILTERS = ('destination', 'origin', 'status', 'airline', 'pilot', 'start_date', 'end_date')
+
+
+class BatchRunner:
+    """
+    runs a stream of operations against the services without any prompts
+
+    each operation is one JSON object per line, e.g.
+
+        {"op": "add_flight", "flight_number": "BA117", "airline_id": 1, "origin_id": 1,
+         "destination_id": 2, "departure_time": "2025-03-01 08:00",
+         "arrival_time": "2025-03-01 16:00", "aircraft_type": "Boeing 777", "capacity": 300}
+        {"op": "update_flight", "flight_number": "BA117", "status": "Delayed"}
+        {"op": "assign_crew", "flight_id": 51, "pilot_id": 3, "role": "Captain"}
+        {"op": "report", "report": "busiest_routes", "limit": 5}
+        {"op": "find_flights", "status": "Delayed", "limit": 20}
+
+    writes are grouped batch_size at a time into one BEGIN IMMEDIATE
+    transaction, which is where the speed comes from - one commit (and
+    fsync) per group instead of per operation. every operation runs in
+    its own savepoint, so a bad one is rolled back on its own and the
+    rest of its group still commits.
+
+    one JSON result per operation is written to the output, in input
+    order: {"line": n, "op": ..., "ok": true, "result": ...} or
+    {"line": n, "op": ..., "ok": false, "error": ...}. results of a
+    group are only written once the group has committed
+    """
+
+    def __init__(self, db_manager, flight_service, pilot_service, report_service,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        """
+        setup runner
+
+        Args:
+            db_manager: DatabaseManager the services use
+            flight_service / pilot_service / report_service: the services
+            batch_size: write operations per transaction
+        """
+        self.db_manager = db_manager
+        self.flight_service = flight_service
+        self.pilot_service = pilot_service
+        self.report_service = report_service
+        self.batch_size = batch_size
+
+        # op name -> (handler, whether it writes)
+        self.operations = {
+            'add_flight': (self._add_flight, True),
+            'update_flight': (self._update_flight, True),
+            'assign_crew': (self._assign_crew, True),
+            'report': (self._report, False),
+            'find_flights': (self._find_flights, False),
+        }
+        self.reports = {
+            'flights_per_destination': self._flights_per_destination,
+            'flights_per_pilot': self._flights_per_pilot,
+            'flight_status_summary': self._flight_status_summary,
+            'busiest_routes': self._busiest_routes,
+            'peak_traffic': self._peak_traffic,
+            'crew_conflicts': self._crew_conflicts,
+        }
+
+    def run(self, lines, output):
+        """
+        runs every operation in lines
+
+        Args:
+            lines: iterable of JSON strings, blank lines and lines
+                starting with # are skipped
+            output: file the results are written to
+
+        Returns:
+            dict with operations / succeeded / failed / transactions
+            counts, elapsed seconds and ops_per_s
+        """
+        conn, cur = self.db_manager.get_connection()
+        stats = {'operations': 0, 'succeeded': 0, 'failed': 0, 'transactions': 0}
+        started = time.perf_counter()
+
+        group = []       # results waiting for the open transaction to commit
+        writes = 0
+
+        def fail_writes(reason):
+            for result in group:
+                if result.get('ok') and result['write']:
+                    result.update(ok=False, error=f"transaction not committed: {reason}")
+                    result.pop('result', None)
+
+        def finish_group():
+            nonlocal writes
+            if conn.in_transaction:
+                try:
+                    conn.commit()
+                    stats['transactions'] += 1
+                except Exception as e:
+                    self._rollback(conn)
+                    fail_writes(e)
+            for result in group:
+                del result['write']
+                stats['succeeded' if result['ok'] else 'failed'] += 1
+                output.write(json.dumps(result, default=str) + '\n')
+            group.clear()
+            writes = 0
+
+        try:
+            for line_number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                stats['operations'] += 1
+
+                result = {'line': line_number, 'op': None, 'write': False}
+                group.append(result)
+                try:
+                    operation = json.loads(line)
+                    if not isinstance(operation, dict):
+                        raise ValueError("operation must be a JSON object")
+                    result['op'] = operation.get('op')
+                    handler, writing = self.operations.get(result['op'], (None, False))
+                    if handler is None:
+                        raise ValueError(f"unknown op '{result['op']}'")
+                except ValueError as e:
+                    result.update(ok=False, error=str(e))
+                    continue
+
+                if writing:
+                    result['write'] = True
+                    if not conn.in_transaction:
+                        cur.execute("BEGIN IMMEDIATE")
+                    cur.execute("SAVEPOINT batch_op")
+                    try:
+                        value = handler(operation)
+                        cur.execute("RELEASE batch_op")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO batch_op")
+                        cur.execute("RELEASE batch_op")
+                        result.update(ok=False, error=_describe(e))
+                        continue
+                    finally:
+                        writes += 1
+                else:
+                    # reads see the writes of the open group too
+                    try:
+                        value = handler(operation)
+                    except Exception as e:
+                        result.update(ok=False, error=_describe(e))
+                        continue
+
+                result['ok'] = True
+                if value is not None:
+                    result['result'] = value
+                if writes >= self.batch_size:
+                    finish_group()
+        except BaseException as e:
+            self._rollback(conn)
+            fail_writes(_describe(e) or 'interrupted')
+            # the op that was running when this happened has no outcome yet
+            if group and 'ok' not in group[-1]:
+                group[-1].update(ok=False, error=f"interrupted: {_describe(e)}")
+            raise
+        finally:
+            if group or conn.in_transaction:
+                finish_group()
+            output.flush()
+
+        stats['elapsed'] = time.perf_counter() - started
+        stats['ops_per_s'] = stats['operations'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        return stats
+
+    def _rollback(self, conn):
+        """
+        rolls back the open group and drops the caches its writes touched
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        self.db_manager.crew_schedule.invalidate()
+        self.db_manager.traffic_analytics.invalidate()
+
+    def _add_flight(self, operation):
+        flight_id = self.flight_service.create_flight(
+            operation['flight_number'], operation['airline_id'], operation['origin_id'],
+            operation['destination_id'], operation['departure_time'], operation['arrival_time'],
+            operation.get('aircraft_type'), operation.get('capacity'), commit=False)
+        return {'flight_id': flight_id}
+
+    def _update_flight(self, operation):
+        self.flight_service.update_flight_details(
+            operation['flight_number'], operation.get('departure_time'), operation.get('arrival_time'),
+            operation.get('status'), commit=False)
+        return None
+
+    def _assign_crew(self, operation):
+        """
+        one assignment (flight_id, pilot_id, role) or a list of them in
+        "assignments". a rejected single assignment fails the op, a list
+        reports its rejections instead
+        """
+        if 'assignments' in operation:
+            assignments = operation['assignments']
+        else:
+            assignments = [(operation['flight_id'], operation['pilot_id'], operation.get('role', 'Captain'))]
+
+        inserted, rejections = self.pilot_service.bulk_assign(assignments, commit=False)
+        if 'assignments' not in operation and rejections:
+            raise ValueError(rejections[0][2])
+        return {'assigned': inserted,
+                'rejected': [{'index': index, 'reason': reason} for index, _, reason in rejections]}
+
+    def _report(self, operation):
+        report = self.reports.get(operation.get('report'))
+        if report is None:
+            raise ValueError(f"unknown report '{operation.get('report')}' "
+                             f"(choose from {', '.join(self.reports)})")
+        return report(operation)
+
+    def _flights_per_destination(self, operation):
+        return [{'destination': name, 'flights': count}
+                for name, count in self.report_service.get_flights_per_destination()]
+
+    def _flights_per_pilot(self, operation):
+        return [{'pilot': name, 'flights': count}
+                for name, count in self.report_service.get_flights_per_pilot()]
+
+    def _flight_status_summary(self, operation):
+        return [{'status': status, 'flights': count}
+                for status, count in self.report_service.get_flight_status_summary()]
+
+    def _busiest_routes(self, operation):
+        routes = self.report_service.get_busiest_routes(
+            operation.get('limit', 10), operation.get('start_date'), operation.get('end_date'),
+            operation.get('airline_id'))
+        return [{'origin_id': origin_id, 'destination_id': destination_id, 'route': route, 'flights': count}
+                for origin_id, destination_id, route, count in routes]
+
+    def _peak_traffic(self, operation):
+        analytics = self.db_manager.traffic_analytics
+        matrix = analytics.traffic_matrix(
+            operation.get('direction', 'departures'), operation.get('group', 'airport'),
+            operation.get('bucket', 'hour_of_day'), operation.get('start_date'), operation.get('end_date'))
+        return [{'id': row_id, 'peak': label, 'flights': count, 'total': total}
+                for row_id, label, count, total in analytics.peak_buckets(matrix)]
+
+    def _crew_conflicts(self, operation):
+        return [{'pilot_id': pilot_id, 'flight_id': first, 'overlaps_flight_id': second}
+                for pilot_id, first, second in self.db_manager.crew_schedule.find_all_conflicts()]
+
+    def _find_flights(self, operation):
+        query = FlightQuery(**{name: operation[name] for name in FLIGHT_FILTERS if name in operation})
+        flights = self.flight_service.find_flights(query, operation.get('limit'))
+        return [flight._asdict() for flight in flights]
+
+
+def _describe(error):
+    """error message for a result line"""
+    if isinstance(error, KeyError):
+        return f"missing field {error}"
+    return str(error) or type(error).__name__
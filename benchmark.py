@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Query Benchmarks for Flight Management System
+
+Builds throwaway databases filled with generated flights and times the
+queries the services run against them.
+
+Benchmarks:
+- services: every query behind the flight / pilot / destination views
+  and the reports, at one or more data scales. results go to JSON with
+  p50 / p95 / p99 latency and rows per second so runs from different
+  versions can be compared
+- date-range: DATE(departure_time) BETWEEN vs half-open range on the
+  raw departure_time column vs integer departure_epoch range
+
+Usage:
+    python benchmark.py services [--scales 1k,100k,10M] [--repeat R] [--output FILE] [--data-dir DIR]
+    python benchmark.py date-range [--flights N] [--days D] [--repeat R] [--db PATH]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import DatabaseManager
+from destination_service import DestinationService
+from flight_query import FlightQuery, date_range_bounds
+from flight_service import FlightService
+from pilot_service import PilotService
+from report_service import ReportService
+from seed_database import ScheduleGenerator, remove_database_files
+
+
+def parse_scale(text):
+    """
+    flight count from '1000', '100k' or '10M'
+    """
+    text = text.strip()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+def percentile(sorted_values, pct):
+    """
+    pct-th percentile of an already sorted list, linear interpolation
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def consume(rows, limit):
+    """
+    counts rows from a list or generator, stopping after limit
+    """
+    count = 0
+    for _ in rows:
+        count += 1
+        if count >= limit:
+            break
+    return count
+
+
+class ServiceBenchmark:
+    """
+    times every service query against a generated database
+
+    the database is made by the seed_database.py generator (pilots and
+    airports scaled with the flight count) and reused if it already has
+    the right number of flights. each query runs once to warm up, then
+    `repeat` times with parameters (destination, pilot, date window...)
+    drawn from a seeded random generator so every run is comparable.
+
+    flight listings stream through FlightService.iter_flights like the
+    CLI does; they stop after max_rows rows so the 10M scale finishes
+    """
+
+    def __init__(self, db_name, flights, seed=42, max_rows=100000):
+        """
+        setup benchmark
+        """
+        self.db_name = db_name
+        self.flights = flights
+        self.seed = seed
+        self.max_rows = max_rows
+        self.db_manager = None
+
+    def setup(self):
+        """
+        generates the database unless a matching one is already there
+        """
+        if os.path.exists(self.db_name):
+            conn = sqlite3.connect(self.db_name)
+            try:
+                existing = conn.execute("SELECT COUNT(*) FROM Flights").fetchone()[0]
+            except sqlite3.Error:
+                existing = None
+            conn.close()
+            if existing == self.flights:
+                print(f"Reusing {self.db_name} ({existing} flights)")
+                return
+            remove_database_files(self.db_name)
+
+        generator = ScheduleGenerator(
+            self.db_name, self.flights,
+            pilots=max(25, self.flights // 200),
+            airports=min(500, max(30, self.flights // 20000)),
+            days=365 if self.flights >= 10000 else 30,
+            seed=self.seed)
+        try:
+            generator.generate()
+        finally:
+            generator.close()
+
+    def cases(self):
+        """
+        (name, function(rng) -> rows) for every query being timed
+        """
+        flights = FlightService(self.db_manager)
+        pilots = PilotService(self.db_manager)
+        destinations = DestinationService(self.db_manager)
+        reports = ReportService(self.db_manager)
+
+        cache = self.db_manager.reference_cache
+        destination_ids = [row[0] for row in cache.list_destinations()]
+        pilot_ids = [row[0] for row in cache.list_pilots()]
+        statuses = ['Scheduled', 'Delayed', 'Cancelled', 'Completed', 'In-Flight']
+
+        conn, cur = self.db_manager.get_connection()
+        cur.execute("SELECT MIN(departure_time), MAX(departure_time) FROM Flights")
+        first, last = cur.fetchone()
+        first_day = datetime.strptime(first[:10], '%Y-%m-%d')
+        span_days = max(0, (datetime.strptime(last[:10], '%Y-%m-%d') - first_day).days - 6)
+
+        def week(rng):
+            start = first_day + timedelta(days=rng.randint(0, span_days))
+            return start.strftime('%Y-%m-%d'), (start + timedelta(days=6)).strftime('%Y-%m-%d')
+
+        def listing(query):
+            return consume(flights.iter_flights(query), self.max_rows)
+
+        return [
+            ('flights: all', lambda rng: listing(FlightQuery())),
+            ('flights: by destination', lambda rng: listing(FlightQuery(destination=rng.choice(destination_ids)))),
+            ('flights: by status', lambda rng: listing(FlightQuery(status=rng.choice(statuses)))),
+            ('flights: by date range', lambda rng: listing(FlightQuery().departing_between(*week(rng)))),
+            ('flights: by pilot', lambda rng: listing(FlightQuery(pilot=rng.choice(pilot_ids)))),
+            ('pilot schedule', lambda rng: len(pilots.get_pilot_schedule(rng.choice(pilot_ids)))),
+            ('all destinations', lambda rng: len(destinations.get_destinations_by_name())),
+            ('report: flights per destination', lambda rng: len(reports.get_flights_per_destination())),
+            ('report: flights per pilot', lambda rng: len(reports.get_flights_per_pilot())),
+            ('report: flight status summary', lambda rng: len(reports.get_flight_status_summary())),
+            ('report: busiest routes', lambda rng: len(reports.get_busiest_routes())),
+        ]
+
+    def run(self, repeat=20):
+        """
+        times each case
+
+        Returns:
+            list of result dicts (name, runs, rows, p50/p95/p99/mean ms, rows_per_s)
+        """
+        # result cache off - the same query repeated would only time the cache
+        self.db_manager = DatabaseManager(self.db_name, result_cache_size=0)
+        results = []
+        for name, case in self.cases():
+            rng = random.Random(self.seed)
+            case(rng)  # warm up caches and the statement registry
+
+            timings = []
+            total_rows = 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                total_rows += case(rng)
+                timings.append(time.perf_counter() - started)
+
+            timings.sort()
+            total_time = sum(timings)
+            results.append({
+                'name': name,
+                'runs': repeat,
+                'rows': total_rows // repeat,
+                'p50_ms': round(percentile(timings, 50) * 1000, 3),
+                'p95_ms': round(percentile(timings, 95) * 1000, 3),
+                'p99_ms': round(percentile(timings, 99) * 1000, 3),
+                'mean_ms': round(total_time / repeat * 1000, 3),
+                'rows_per_s': round(total_rows / total_time) if total_time else None,
+            })
+        return results
+
+    def close(self):
+        """
+        close benchmark database
+        """
+        if self.db_manager:
+            self.db_manager.close_connection()
+            self.db_manager = None
+
+
+def display_service_results(flights, results):
+    """
+    prints one scale's timing table
+    """
+    print(f"\n{flights} flights")
+    print(f"{'Query':<35} {'Rows':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'Rows/s':>12}")
+    print("-" * 90)
+    for result in results:
+        rows_per_s = result['rows_per_s'] if result['rows_per_s'] is not None else '-'
+        print(f"{result['name']:<35} {result['rows']:>8} {result['p50_ms']:>10.2f} "
+              f"{result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f} {rows_per_s:>12}")
+
+
+def code_version():
+    """
+    git commit of the working tree, or None outside a git checkout
+    """
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class DateRangeBenchmark:
+    """
+    compares the old and new date range filters
+
+    generates a large Flights table, then runs a one-day window query in
+    each form several times and reports the median time, rows matched
+    and query plan
+    """
+
+    def __init__(self, db_name, flights=2000000, days=365, seed=42):
+        """
+        setup benchmark
+        """
+        self.db_name = db_name
+        self.flights = flights
+        self.days = days
+        self.seed = seed
+        self.db_manager = None
+        self.base_time = datetime(2025, 1, 1)
+
+    def setup(self):
+        """
+        creates the schema and fills it with generated flights
+
+        inserts in chunks with executemany and supplies the epoch columns
+        directly so the epoch trigger is skipped
+        """
+        self.db_manager = DatabaseManager(self.db_name, profile='bulk-load')
+        conn, cur = self.db_manager.get_connection()
+
+        cur.execute("SELECT COUNT(*) FROM Flights")
+        if cur.fetchone()[0] >= self.flights:
+            print("Reusing existing benchmark data")
+            return
+
+        print(f"Generating {self.flights} flights over {self.days} days...")
+        rng = random.Random(self.seed)
+        statuses = ['Scheduled', 'Delayed', 'Completed', 'In-Flight', 'Cancelled']
+        started = time.perf_counter()
+        chunk = []
+
+        for i in range(self.flights):
+            departure = self.base_time + timedelta(
+                minutes=rng.randrange(self.days * 24 * 60))
+            arrival = departure + timedelta(minutes=rng.randint(45, 900))
+            origin_id = rng.randint(1, 30)
+            destination_id = rng.randint(1, 29)
+            if destination_id >= origin_id:
+                destination_id += 1
+            chunk.append((
+                f"BM{i:08d}", rng.randint(1, 10), origin_id, destination_id,
+                departure.strftime('%Y-%m-%d %H:%M:%S'),
+                arrival.strftime('%Y-%m-%d %H:%M:%S'),
+                int((departure - datetime(1970, 1, 1)).total_seconds()),
+                int((arrival - datetime(1970, 1, 1)).total_seconds()),
+                rng.choice(statuses), 'Airbus A320', 180))
+
+            if len(chunk) == 50000:
+                self._insert_flights(cur, chunk)
+                chunk = []
+
+        if chunk:
+            self._insert_flights(cur, chunk)
+
+        conn.commit()
+        cur.execute("ANALYZE")
+        print(f"Generated in {time.perf_counter() - started:.1f}s")
+
+    def _insert_flights(self, cur, rows):
+        """
+        inserts one chunk of generated flights
+        """
+        cur.executemany('''
+            INSERT INTO Flights (flight_number, airline_id, origin_id, destination_id,
+                                 departure_time, arrival_time, departure_epoch, arrival_epoch,
+                                 status, aircraft_type, capacity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def run(self, repeat=5):
+        """
+        times each form of the one-day window query
+
+        Returns:
+            list of (form, median ms, rows, plan) tuples
+        """
+        conn, cur = self.db_manager.get_connection()
+
+        # the epoch index is not part of the app's index set, only needed here
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS bench_flights_departure_epoch ON Flights (departure_epoch)")
+        conn.commit()
+
+        day = (self.base_time + timedelta(days=self.days // 2)).strftime('%Y-%m-%d')
+        range_start, range_end = date_range_bounds(day, day)
+        epoch_start = int((datetime.strptime(range_start, '%Y-%m-%d') - datetime(1970, 1, 1)).total_seconds())
+        epoch_end = int((datetime.strptime(range_end, '%Y-%m-%d') - datetime(1970, 1, 1)).total_seconds())
+
+        forms = [
+            ('DATE() BETWEEN',
+             "SELECT flight_id, departure_time FROM Flights WHERE DATE(departure_time) BETWEEN ? AND ? ORDER BY departure_time",
+             (day, day)),
+            ('half-open text range',
+             "SELECT flight_id, departure_time FROM Flights WHERE departure_time >= ? AND departure_time < ? ORDER BY departure_time",
+             (range_start, range_end)),
+            ('half-open epoch range',
+             "SELECT flight_id, departure_time FROM Flights WHERE departure_epoch >= ? AND departure_epoch < ? ORDER BY departure_epoch",
+             (epoch_start, epoch_end)),
+        ]
+
+        results = []
+        for name, sql, params in forms:
+            cur.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = '; '.join(row[3] for row in cur.fetchall())
+
+            timings = []
+            rows = 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                rows = len(cur.fetchall())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            results.append((name, statistics.median(timings), rows, plan))
+
+        return results
+
+    def display_results(self, results):
+        """
+        prints the timing table
+        """
+        print(f"\n{'Form':<25} {'Median ms':>10} {'Rows':>8}  {'Plan'}")
+        print("-" * 100)
+        for name, median_ms, rows, plan in results:
+            print(f"{name:<25} {median_ms:>10.2f} {rows:>8}  {plan}")
+
+        baseline = results[0][1]
+        for name, median_ms, _, _ in results[1:]:
+            if median_ms > 0:
+                print(f"{name}: {baseline / median_ms:.0f}x faster than DATE() BETWEEN")
+
+    def close(self):
+        """
+        close benchmark database
+        """
+        if self.db_manager:
+            self.db_manager.close_connection()
+
+
+def run_services(args):
+    """
+    services benchmark at every requested scale, written to args.output
+    """
+    data_dir = args.data_dir or tempfile.mkdtemp()
+    os.makedirs(data_dir, exist_ok=True)
+    report = {
+        'version': args.label or code_version(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'repeat': args.repeat,
+        'max_rows': args.max_rows,
+        'scales': [],
+    }
+
+    try:
+        for flights in (parse_scale(scale) for scale in args.scales.split(',')):
+            benchmark = ServiceBenchmark(
+                os.path.join(data_dir, f"benchmark_{flights}.db"), flights, args.seed, args.max_rows)
+            try:
+                benchmark.setup()
+                results = benchmark.run(args.repeat)
+            finally:
+                benchmark.close()
+
+            display_service_results(flights, results)
+            report['scales'].append({'flights': flights, 'results': results})
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+def run_date_range(args):
+    """
+    date range benchmark against one generated database. uses a temp
+    directory unless --db is given (handy for reusing data)
+    """
+    temp_dir = None if args.db else tempfile.mkdtemp()
+    db_name = args.db or os.path.join(temp_dir, 'benchmark.db')
+    benchmark = DateRangeBenchmark(db_name, args.flights, args.days)
+
+    try:
+        benchmark.setup()
+        benchmark.display_results(benchmark.run(args.repeat))
+    finally:
+        benchmark.close()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    """
+    main function with command line interface
+
+    one sub command per benchmark, see the module docstring
+    """
+    parser = argparse.ArgumentParser(
+        description='Flight Management Query Benchmarks')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    services = commands.add_parser('services', help='Time every service query at several data scales')
+    services.add_argument('--scales', default='1k,100k,10M',
+                          help='Comma separated flight counts, k / M suffixes allowed')
+    services.add_argument('--repeat', type=int, default=20,
+                          help='Timed runs per query')
+    services.add_argument('--max-rows', type=int, default=100000,
+                          help='Rows read from each flight listing')
+    services.add_argument('--seed', type=int, default=42,
+                          help='Seed for the generated data and query parameters')
+    services.add_argument('--output', default='benchmark_results.json',
+                          help='JSON file for the results')
+    services.add_argument('--label', help='Version label stored in the results (default: git commit)')
+    services.add_argument('--data-dir',
+                          help='Keep generated databases here and reuse them (default: temp dir, deleted)')
+    services.set_defaults(run=run_services)
+
+    date_range = commands.add_parser('date-range', help='Compare date range filter forms')
+    date_range.add_argument('--flights', type=int, default=2000000,
+                            help='Number of flights to generate')
+    date_range.add_argument('--days', type=int, default=365,
+                            help='Number of days the schedule spans')
+    date_range.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query form')
+    date_range.add_argument('--db', help='Database file to use (kept afterwards)')
+    date_range.set_defaults(run=run_date_range)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
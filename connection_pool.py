@@ -0,0 +1,256 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+# seconds between checks for connections left pinned to exited threads
+# while waiting for a free one
+DEAD_THREAD_CHECK_INTERVAL = 0.05
+
+
+class PoolTimeoutError(Exception):
+    """
+    raised when no connection becomes free within the checkout timeout
+    """
+
+
+class ConnectionPool:
+    """
+    pool of sqlite connections shared by the services
+
+    hands out connections either per call (connection() context manager)
+    or pinned to the calling thread (thread_connection()). a pinned
+    connection whose thread has exited without releasing it is taken back
+    the next time the pool runs short. connections are
+    opened lazily up to `size`, get the `pragmas` applied (e.g. WAL mode
+    so readers don't block the writer), and wait `busy_timeout` ms on a
+    locked database before failing.
+
+    note: every connection to ':memory:' is its own empty database, so the
+    pool only makes sense for file databases
+    """
+
+    def __init__(self, db_name, size=5, timeout=30.0, busy_timeout=5000, pragmas=None,
+                 cached_statements=128, factory=sqlite3.Connection, uri=False):
+        """
+        setup pool
+
+        Args:
+            db_name: sqlite database file
+            size: max number of open connections
+            timeout: seconds to wait for a free connection before giving up
+            busy_timeout: ms a connection waits on a locked database
+            pragmas: list of (name, value) pragmas run on every new
+                connection, in order
+            cached_statements: size of each connection's prepared
+                statement cache
+            factory: sqlite3.Connection (sub)class new connections are
+                made with, e.g. QueryStats.connection_factory()
+            uri: db_name is a file: URI (e.g. "file:app.db?mode=ro")
+        """
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.busy_timeout = busy_timeout
+        self.pragmas = list(pragmas or [])
+        self.cached_statements = cached_statements
+        self.factory = factory
+        self.uri = uri
+
+        self._idle = queue.LifoQueue()  # reuse the most recently used (warm) connection
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+        self._in_use = 0
+        self._pinned = {}  # thread -> connection pinned to it
+
+        self.stats = {
+            'created': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'connect_time': 0.0,
+            'timeouts': 0,
+            'reclaimed': 0,
+            'peak_in_use': 0,
+        }
+
+    def _create_connection(self):
+        """
+        opens a new connection with the pool settings applied
+        """
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout / 1000,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements,
+                               factory=self.factory, uri=self.uri)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        with self._lock:
+            self._all.append(conn)
+            self.stats['created'] += 1
+            self.stats['connect_time'] += time.perf_counter() - started
+        return conn
+
+    def acquire(self, timeout=None):
+        """
+        checks a connection out of the pool
+
+        blocks until one is free (or a new one can be opened).
+        raises PoolTimeoutError after `timeout` seconds
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False) and not self._wait_for_slot(started + timeout):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise PoolTimeoutError(
+                f"no free database connection after {timeout}s (pool size {self.size})")
+        # only the wait for a slot counts - opening a new connection below
+        # is connect_time, not contention
+        waited = time.perf_counter() - started
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._create_connection()
+            except Exception:
+                self._slots.release()
+                raise
+
+        with self._lock:
+            self.stats['checkouts'] += 1
+            self.stats['wait_time'] += waited
+            self._in_use += 1
+            self.stats['peak_in_use'] = max(self.stats['peak_in_use'], self._in_use)
+        return conn
+
+    def _wait_for_slot(self, deadline):
+        """
+        waits for a free slot until deadline, taking back connections
+        pinned to threads that have exited while it waits
+
+        Returns:
+            True once a slot is taken, False on timeout
+        """
+        with self._lock:
+            self.stats['waits'] += 1
+        while True:
+            self._reclaim_dead_threads()
+            remaining = deadline - time.perf_counter()
+            if self._slots.acquire(timeout=max(0.0, min(remaining, DEAD_THREAD_CHECK_INTERVAL))):
+                return True
+            if remaining <= DEAD_THREAD_CHECK_INTERVAL:
+                return False
+
+    def _reclaim_dead_threads(self):
+        """
+        releases connections still pinned to threads that are gone
+        """
+        with self._lock:
+            dead = [(thread, conn) for thread, conn in self._pinned.items() if not thread.is_alive()]
+            for thread, _ in dead:
+                del self._pinned[thread]
+            self.stats['reclaimed'] += len(dead)
+        for _, conn in dead:
+            self.release(conn)
+
+    def release(self, conn):
+        """
+        puts a connection back in the pool
+
+        anything left uncommitted is rolled back first so the next user
+        starts clean
+        """
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        borrow a connection for the length of a with block
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def thread_connection(self):
+        """
+        returns (conn, cur) pinned to the calling thread
+
+        first call from a thread checks a connection out and keeps it until
+        release_thread_connection() is called from that thread, or the
+        thread exits and the pool needs the connection for someone else
+        """
+        pinned = getattr(self._local, 'pinned', None)
+        if pinned is None:
+            conn = self.acquire()
+            pinned = (conn, conn.cursor())
+            self._local.pinned = pinned
+            with self._lock:
+                self._pinned[threading.current_thread()] = conn
+        return pinned
+
+    def release_thread_connection(self):
+        """
+        gives the calling thread's pinned connection back to the pool
+        """
+        pinned = getattr(self._local, 'pinned', None)
+        if pinned is not None:
+            self._local.pinned = None
+            with self._lock:
+                self._pinned.pop(threading.current_thread(), None)
+            self.release(pinned[0])
+
+    def get_stats(self):
+        """
+        checkout metrics for the pool
+
+        Returns:
+            dict with created/checkouts/waits/timeouts/reclaimed counts, total and
+            average wait time for a free slot, total and average time spent
+            opening connections, and current/peak connections in use
+        """
+        self._reclaim_dead_threads()
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_use'] = self._in_use
+            stats['size'] = self.size
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = (stats['wait_time'] / checkouts * 1000) if checkouts else 0.0
+        created = stats['created']
+        stats['avg_connect_ms'] = (stats['connect_time'] / created * 1000) if created else 0.0
+        return stats
+
+    def close_all(self):
+        """
+        closes every connection the pool has opened
+
+        the pool starts over empty afterwards, so it can still be used
+        """
+        with self._lock:
+            connections, self._all = self._all, []
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._local = threading.local()
+            self._pinned = {}
+            self._in_use = 0
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
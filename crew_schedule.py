@@ -0,0 +1,205 @@
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+
+# active assignments with their flight times, in the order the index and
+# the audit sweep want them. a cancelled flight keeps nobody busy
+ASSIGNMENT_INTERVALS_SQL = '''
+    SELECT fa.pilot_id, f.departure_epoch, f.arrival_epoch, f.flight_id
+    FROM Flight_assignments fa
+    JOIN Flights f ON fa.flight_id = f.flight_id
+    WHERE fa.status = 'Active' AND f.status != 'Cancelled'
+      AND f.departure_epoch IS NOT NULL AND f.arrival_epoch IS NOT NULL
+    ORDER BY fa.pilot_id, f.departure_epoch
+'''
+
+# tables the index is built from - a change to either, from any process,
+# means it has to be reloaded
+SCHEDULE_TABLES = ('Flights', 'Flight_assignments')
+
+
+class PilotIntervals:
+    """
+    one pilot's flights as intervals sorted by start time
+
+    max_ends[i] is the latest end among the first i+1 intervals, so
+    "does anything overlap [start, end)" is one bisect plus one compare,
+    even when the stored intervals overlap each other (legacy data).
+    max_ends never decreases, so a second bisect finds which one it is
+    """
+
+    def __init__(self):
+        """
+        empty interval list
+        """
+        self.starts = []
+        self.ends = []
+        self.flight_ids = []
+        self.max_ends = []
+
+    def add(self, start, end, flight_id):
+        """
+        inserts an interval keeping start order
+        """
+        pos = bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.ends.insert(pos, end)
+        self.flight_ids.insert(pos, flight_id)
+        self.max_ends.insert(pos, 0)
+
+        # fix up the running max from pos on - appends (the usual case,
+        # flights scheduled in time order) only touch the last slot
+        running = self.max_ends[pos - 1] if pos else end
+        for i in range(pos, len(self.starts)):
+            running = max(running, self.ends[i])
+            if i > pos and self.max_ends[i] == running:
+                break
+            self.max_ends[i] = running
+
+    def load_sorted(self, starts, ends, flight_ids):
+        """
+        replaces the contents with intervals already sorted by start.
+        much quicker than add() one by one when loading from the database
+        """
+        self.starts = starts
+        self.ends = ends
+        self.flight_ids = flight_ids
+        self.max_ends = list(accumulate(ends, max))
+
+    def find_overlap(self, start, end):
+        """
+        flight_id of a stored interval overlapping [start, end), or None
+        """
+        # only intervals starting before `end` can overlap
+        pos = bisect_left(self.starts, end)
+        if pos == 0 or self.max_ends[pos - 1] <= start:
+            return None
+
+        # there is an overlap - the first interval whose running max end
+        # passes start is one: its own end is what pushed the max past it
+        return self.flight_ids[bisect_right(self.max_ends, start, 0, pos)]
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class CrewSchedule:
+    """
+    in-memory index of every pilot's active flight times
+
+    used to stop a pilot being booked on two flights that overlap.
+    loaded lazily from Flight_assignments + Flights the first time it's
+    needed and kept up to date by add(). every use first compares the
+    Data_version of those tables with the ones it was loaded at, so
+    writes from another process or DatabaseManager make it reload -
+    inside a BEGIN IMMEDIATE that check sees everything committed.
+    invalidate() drops it straight away, e.g. after a rolled back batch
+    """
+
+    def __init__(self, db_manager):
+        """
+        setup schedule - nothing is loaded until first use
+        """
+        self.db_manager = db_manager
+        self._pilots = None
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def _index(self):
+        """
+        returns {pilot_id: PilotIntervals}, (re)loading it if it's missing
+        or the tables changed since it was loaded
+        """
+        conn, cur = self.db_manager.get_connection()
+        cur.execute(f"SELECT table_name, version FROM Data_version "
+                    f"WHERE table_name IN ({', '.join('?' * len(SCHEDULE_TABLES))})", SCHEDULE_TABLES)
+        versions = dict(cur.fetchall())
+
+        if self._pilots is None or versions != self._versions:
+            cur.execute(ASSIGNMENT_INTERVALS_SQL)
+
+            # rows come sorted by pilot then departure, so just collect
+            # each pilot's columns and build the running max once at the end
+            columns = {}
+            for pilot_id, start, end, flight_id in cur:
+                lists = columns.get(pilot_id)
+                if lists is None:
+                    lists = columns[pilot_id] = ([], [], [])
+                lists[0].append(start)
+                lists[1].append(end)
+                lists[2].append(flight_id)
+
+            pilots = {}
+            for pilot_id, (starts, ends, flight_ids) in columns.items():
+                intervals = pilots[pilot_id] = PilotIntervals()
+                intervals.load_sorted(starts, ends, flight_ids)
+            self._pilots = pilots
+            self._versions = versions
+        return self._pilots
+
+    def invalidate(self):
+        """
+        forget the index so it's rebuilt on next use
+        """
+        with self._lock:
+            self._pilots = None
+            self._versions = None
+
+    def get_flight_times(self, flight_id):
+        """
+        (departure_epoch, arrival_epoch) of a flight, None if not found
+        """
+        conn, cur = self.db_manager.get_connection()
+        cur.execute(
+            "SELECT departure_epoch, arrival_epoch FROM Flights WHERE flight_id = ?", (flight_id,))
+        return cur.fetchone()
+
+    def find_conflict(self, pilot_id, start, end):
+        """
+        flight_id the pilot is already on that overlaps [start, end), or None
+        """
+        with self._lock:
+            intervals = self._index().get(pilot_id)
+            return intervals.find_overlap(start, end) if intervals else None
+
+    def add(self, pilot_id, start, end, flight_id):
+        """
+        records a new assignment in the index
+        """
+        with self._lock:
+            pilots = self._index()
+            intervals = pilots.get(pilot_id)
+            if intervals is None:
+                intervals = pilots[pilot_id] = PilotIntervals()
+            intervals.add(start, end, flight_id)
+
+    def find_all_conflicts(self):
+        """
+        audit of every double booking in the database
+
+        one sweep over all active assignments ordered by pilot and
+        departure - each flight is compared with the latest-ending earlier
+        flight of the same pilot. streams the rows so memory stays small
+
+        Returns:
+            list of (pilot_id, earlier flight_id, overlapping flight_id)
+        """
+        conn, cur = self.db_manager.get_connection()
+        cur.execute(ASSIGNMENT_INTERVALS_SQL)
+
+        conflicts = []
+        current_pilot = None
+        latest_end = latest_flight = None
+        for pilot_id, start, end, flight_id in cur:
+            if pilot_id != current_pilot:
+                current_pilot = pilot_id
+                latest_end, latest_flight = end, flight_id
+                continue
+
+            if start < latest_end:
+                conflicts.append((pilot_id, latest_flight, flight_id))
+            if end > latest_end:
+                latest_end, latest_flight = end, flight_id
+
+        return conflicts
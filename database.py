@@ -1,5 +1,111 @@
+import os
 import sqlite3
+from urllib.parse import quote
+
+import schema
+from connection_pool import ConnectionPool
+from crew_schedule import CrewSchedule
+from flight_query import FILTER_SQL, FlightQuery
 from models import SampleData
+from query_stats import QueryStats
+from reference_cache import ReferenceCache
+from result_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, ResultCache
+from statements import STATEMENT_CACHE_SIZE
+from traffic_analytics import TrafficAnalytics
+
+
+# named pragma sets for DatabaseManager(profile=...). applied in this order
+# on every pooled connection - page_size has to come before journal_mode
+# since it only takes effect on a new (empty) database outside WAL mode.
+#   durable   - fsync on every commit, small cache. for when losing the
+#               last commit on power failure is not ok
+#   balanced  - default for interactive use. WAL + synchronous NORMAL only
+#               syncs at checkpoints, still safe against app crashes
+#   bulk-load - nightly loads / seeding. no syncing at all, big cache,
+#               temp b-trees in memory. rerun the load if the machine dies
+PERFORMANCE_PROFILES = {
+    'durable': [
+        ('page_size', 4096),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'FULL'),
+        ('cache_size', -8000),
+        ('mmap_size', 0),
+        ('temp_store', 'DEFAULT'),
+    ],
+    'balanced': [
+        ('page_size', 4096),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -64000),
+        ('mmap_size', 268435456),
+        ('temp_store', 'MEMORY'),
+    ],
+    'bulk-load': [
+        ('page_size', 8192),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'OFF'),
+        ('cache_size', -512000),
+        ('mmap_size', 1073741824),
+        ('temp_store', 'MEMORY'),
+    ],
+}
+
+# sqlite reports these pragmas as numbers
+PRAGMA_VALUE_NAMES = {
+    'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+    'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'},
+}
+
+# sample arguments for each FlightQuery filter. check_query_plans builds
+# its flight probes from FlightQuery itself, so it checks the SQL the
+# listings actually run - every FILTER_SQL entry needs one
+PLAN_CHECK_FILTERS = {
+    'destination': ('destination', (1,)),
+    'origin': ('origin', (1,)),
+    'status': ('status', ('Scheduled',)),
+    'airline': ('airline', (1,)),
+    'pilot': ('pilot', (1,)),
+    'window': ('departing_between', ('2025-01-01', '2025-01-07')),
+}
+
+# other statements for check_query_plans, with dummy parameters
+PLAN_CHECK_QUERIES = {
+    'active crew for flight': (
+        "SELECT fa.pilot_id, fa.role FROM Flight_assignments fa WHERE fa.flight_id = ? AND fa.status = 'Active'",
+        (1,)),
+    'active pilots': (
+        "SELECT pilot_id, first_name, last_name FROM Pilots WHERE status = 'Active'",
+        ()),
+}
+
+
+def plan_check_queries(page_size=500):
+    """
+    the default check_query_plans probes - one FlightQuery page per
+    filter, built with FlightQuery.build(), plus PLAN_CHECK_QUERIES
+
+    Returns:
+        dict of {query name: (sql, params)}
+    """
+    queries = {}
+    for name in FILTER_SQL:
+        method, args = PLAN_CHECK_FILTERS[name]
+        query = FlightQuery()
+        getattr(query, method)(*args)
+        queries[f"flights by {name}"] = query.build(limit=page_size)
+    queries.update(PLAN_CHECK_QUERIES)
+    return queries
+
+
+def _unbounded_scans(steps):
+    """
+    EXPLAIN QUERY PLAN steps that walk a whole table or index
+
+    a SEARCH step is bounded by its index constraint. a SCAN has none -
+    'SCAN f USING INDEX ...' only reads in index order, it still visits
+    every row (LIMIT can stop it early, but not if the filter is rare)
+    """
+    return [step for step in steps if step.startswith('SCAN') and step != 'SCAN CONSTANT ROW']
 
 
 class DatabaseManager:
@@ -10,137 +116,290 @@ class DatabaseManager:
     basically the main database interface
     """
 
-    def __init__(self, db_name="FlightManagement.db"):
+    def __init__(self, db_name="FlightManagement.db", profile='balanced', pool_size=5, busy_timeout=5000,
+                 populate=True, query_stats=False, slow_query_ms=None, slow_query_log='slow_queries.log',
+                 read_only=False, result_cache_size=DEFAULT_MAX_ENTRIES, result_cache_ttl=DEFAULT_TTL):
         """
         sets up database manager
 
-        creates connection and tables, adds sample data if empty
+        creates the connection pool and tables, adds sample data if empty
+
+        Args:
+            db_name: sqlite database file
+            profile: name of a PERFORMANCE_PROFILES entry
+            pool_size: max number of connections open at once
+            busy_timeout: ms to wait on a locked database
+            populate: add the sample data when the database is empty
+            query_stats: time every statement (see get_query_stats)
+            slow_query_ms: log statements taking at least this many ms,
+                with their query plan. turns on query_stats as well
+            slow_query_log: file the slow statements are appended to
+            read_only: open every connection read-only (mode=ro plus
+                query_only), e.g. for a reporting / API process next to
+                the main app. no migrations or sample data - the
+                database must already be up to date
+            result_cache_size: report / flight listing results memoized
+                until their tables change (see result_cache.py), 0 for off
+            result_cache_ttl: seconds a memoized result may be reused for
         """
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(
+                f"Unknown performance profile '{profile}' (choose from {', '.join(PERFORMANCE_PROFILES)})")
+
         self.db_name = db_name
+        self.profile = profile
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.populate = populate
+        self.read_only = read_only
+        self.query_stats = None
+        if query_stats or slow_query_ms is not None:
+            self.query_stats = QueryStats(slow_query_ms, slow_query_log)
+        self.pool = None
         self.conn = None
         self.cur = None
         self.connect()
-        self.create_tables()
+        if read_only:
+            self.check_schema()
+        else:
+            self.create_tables()
+
+        # airlines / destinations / pilots kept in memory for pick lists
+        # and id -> name lookups
+        self.reference_cache = ReferenceCache(self)
+        self.reference_cache.load()
+
+        # per pilot flight intervals for double booking checks, loaded on first use
+        self.crew_schedule = CrewSchedule(self)
+
+        # flight times / airports as arrays for the traffic reports, loaded on first use
+        self.traffic_analytics = TrafficAnalytics(self)
+
+        # report and flight listing results, reused while Data_version says nothing changed
+        self.result_cache = ResultCache(result_cache_size, result_cache_ttl, read_only,
+                                        self.reference_cache)
 
     def connect(self):
         """
         connect to sqlite database
 
-        creates connection and cursor for running queries
+        creates the connection pool and checks out the connection and
+        cursor this (main) thread uses for running queries
         """
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.cur = self.conn.cursor()
+            if self.pool is None:
+                self.pool = ConnectionPool(self._database_target(), size=self.pool_size,
+                                           busy_timeout=self.busy_timeout,
+                                           pragmas=self._pragmas(),
+                                           cached_statements=STATEMENT_CACHE_SIZE,
+                                           factory=self._connection_factory(),
+                                           uri=self.read_only)
+            self.conn, self.cur = self.pool.thread_connection()
             print("Database connected successfully")
+            self.report_settings()
         except Exception as e:
             print(f"Database connection error: {e}")
 
+    def _database_target(self):
+        """
+        what the pool connects to - the file, or a read-only URI for it
+        """
+        if not self.read_only:
+            return self.db_name
+        return f"file:{quote(os.path.abspath(self.db_name))}?mode=ro"
+
+    def _pragmas(self):
+        """
+        profile pragmas for the pool. read-only connections skip the ones
+        that would have to write (page_size, journal_mode) and add
+        query_only
+        """
+        pragmas = PERFORMANCE_PROFILES[self.profile]
+        if self.read_only:
+            pragmas = [(name, value) for name, value in pragmas if name not in ('page_size', 'journal_mode')]
+            pragmas.append(('query_only', 'ON'))
+        return pragmas
+
+    def _connection_factory(self):
+        """
+        connection class for the pool - an instrumented one when query
+        stats are on, plain sqlite3 otherwise
+        """
+        if self.query_stats is None:
+            return sqlite3.Connection
+        return self.query_stats.connection_factory()
+
     def get_connection(self):
         """
-        returns database connection
+        returns database connection and cursor for the calling thread
 
-        reconnects if needed. used by service classes
+        each thread gets its own pooled connection, so a long report in
+        one thread doesn't hold up others. reconnects if needed.
+        used by service classes
         """
-        if self.conn is None:
+        if self.pool is None:
             self.connect()
-        return self.conn, self.cur
+        return self.pool.thread_connection()
+
+    def release_connection(self):
+        """
+        hands the calling thread's connection back to the pool
+
+        worker threads should call this when they're done
+        """
+        if self.pool:
+            self.pool.release_thread_connection()
+
+    def get_settings(self):
+        """
+        reads back the effective values of the profile pragmas
+
+        sqlite can silently ignore a setting (e.g. page_size on an existing
+        database) so this asks the connection rather than the profile
+
+        Returns:
+            dict of {pragma name: effective value}
+        """
+        settings = {}
+        for name, _ in PERFORMANCE_PROFILES[self.profile]:
+            self.cur.execute(f"PRAGMA {name}")
+            value = self.cur.fetchone()[0]
+            settings[name] = PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+        return settings
+
+    def report_settings(self):
+        """
+        prints the profile in use and its effective pragma values
+        """
+        try:
+            settings = self.get_settings()
+            values = ', '.join(f"{name}={value}" for name, value in settings.items())
+            print(f"Performance profile: {self.profile} ({values})")
+        except Exception as e:
+            print(f"Error reading database settings: {e}")
+
+    def get_pool_stats(self):
+        """
+        returns checkout metrics from the connection pool
+        """
+        return self.pool.get_stats() if self.pool else {}
+
+    def get_query_stats(self):
+        """
+        returns per statement timings, slowest total first
+
+        empty when the manager was made without query_stats / slow_query_ms
+        """
+        return self.query_stats.get_stats() if self.query_stats else []
+
+    def report_query_stats(self, limit=10):
+        """
+        prints the statements that took the most time so far, and how
+        often the result cache saved running them
+        """
+        if self.query_stats is None:
+            print("Query stats are off (start with query_stats=True or slow_query_ms)")
+            return
+        self.query_stats.report(limit)
+
+        cache = self.result_cache.get_stats()
+        lookups = cache['hits'] + cache['misses']
+        if lookups:
+            print(f"Result cache: {cache['hits']}/{lookups} hits ({cache['hit_rate']:.0%}), "
+                  f"{cache['stale']} stale, {cache['expired']} expired, {cache['evictions']} evicted")
+
+    def check_schema(self):
+        """
+        makes sure a read-only database is fully migrated
+
+        read-only managers can't apply migrations, so an old or missing
+        database is an error rather than something to fix up
+        """
+        try:
+            version = schema.current_version(self.cur)
+        except (AttributeError, sqlite3.Error):
+            version = 0
+        if version < schema.LATEST_VERSION:
+            raise schema.SchemaError(
+                f"{self.db_name} is at schema version {version}, expected {schema.LATEST_VERSION} - "
+                f"open it read-write once (e.g. python main.py) to migrate it")
+
+    def get_data_versions(self):
+        """
+        change counter per table from Data_version
+
+        Returns:
+            dict of {table name: (version, modified_at unix time)}
+        """
+        return schema.data_versions(self.get_connection()[1])
 
     def create_tables(self):
         """
         creates all the tables for the system
 
-        makes 5 tables: airlines, destinations, pilots, flights, flight_assignments
-        with proper foreign keys and constraints. populates with sample data if empty.
+        brings the schema up to date by running any pending migrations
+        from schema.py (tables, epoch columns, report summaries, indexes).
+        populates with sample data if empty.
         """
         try:
-            # airlines table
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Airlines (
-                    airline_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    airline_name TEXT NOT NULL UNIQUE,
-                    airline_code TEXT NOT NULL UNIQUE,
-                    country TEXT NOT NULL,
-                    headquarters TEXT,
-                    fleet_size INTEGER DEFAULT 0,
-                    established_year INTEGER,
-                    created_date DATE DEFAULT CURRENT_DATE
-                )
-            ''')
-
-            # destinations table
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Destinations (
-                    destination_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    destination_name TEXT NOT NULL UNIQUE,
-                    country TEXT NOT NULL,
-                    airport_code TEXT NOT NULL UNIQUE,
-                    timezone TEXT NOT NULL,
-                    created_date DATE DEFAULT CURRENT_DATE
-                )
-            ''')
-
-            # pilots table
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Pilots (
-                    pilot_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    first_name TEXT NOT NULL,
-                    last_name TEXT NOT NULL,
-                    license_number TEXT NOT NULL UNIQUE,
-                    experience_years INTEGER NOT NULL,
-                    hire_date DATE NOT NULL,
-                    airline_id INTEGER,
-                    status TEXT DEFAULT 'Active' CHECK(status IN ('Active', 'Inactive', 'On Leave')),
-                    FOREIGN KEY (airline_id) REFERENCES Airlines (airline_id)
-                )
-            ''')
-
-            # flights table
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Flights (
-                    flight_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    flight_number TEXT NOT NULL UNIQUE,
-                    airline_id INTEGER NOT NULL,
-                    origin_id INTEGER NOT NULL,
-                    destination_id INTEGER NOT NULL,
-                    departure_time DATETIME NOT NULL,
-                    arrival_time DATETIME NOT NULL,
-                    status TEXT DEFAULT 'Scheduled' CHECK(status IN ('Scheduled', 'Delayed', 'Cancelled', 'Completed', 'In-Flight')),
-                    aircraft_type TEXT NOT NULL,
-                    capacity INTEGER NOT NULL,
-                    created_date DATE DEFAULT CURRENT_DATE,
-                    FOREIGN KEY (airline_id) REFERENCES Airlines (airline_id),
-                    FOREIGN KEY (origin_id) REFERENCES Destinations (destination_id),
-                    FOREIGN KEY (destination_id) REFERENCES Destinations (destination_id)
-                )
-            ''')
-
-            # flight assignments table
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Flight_assignments (
-                    assignment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    flight_id INTEGER NOT NULL,
-                    pilot_id INTEGER NOT NULL,
-                    assignment_date DATE DEFAULT CURRENT_DATE,
-                    role TEXT DEFAULT 'Captain' CHECK(role IN ('Captain', 'First Officer', 'Relief Pilot')),
-                    status TEXT DEFAULT 'Active' CHECK(status IN ('Active', 'Cancelled', 'Completed')),
-                    notes TEXT,
-                    FOREIGN KEY (flight_id) REFERENCES Flights (flight_id),
-                    FOREIGN KEY (pilot_id) REFERENCES Pilots (pilot_id),
-                    UNIQUE(flight_id, pilot_id, role)
-                )
-            ''')
-
-            self.conn.commit()
-            print("All 5 tables created successfully")
+            for version, description in schema.migrate(self.conn):
+                print(f"Applied schema migration {version}: {description}")
 
             # populate with sample data if empty
             self.cur.execute("SELECT COUNT(*) FROM Airlines")
-            if self.cur.fetchone()[0] == 0:
+            if self.populate and self.cur.fetchone()[0] == 0:
                 self.populate_sample_data()
 
         except Exception as e:
             print(f"Error creating tables: {e}")
 
+    def rebuild_report_aggregates(self):
+        """
+        recomputes every report summary table from scratch
+
+        for recovery if the summaries ever drift (e.g. after editing the
+        database with the triggers dropped). runs in one transaction
+        """
+        try:
+            for statement in schema.REPORT_AGGREGATE_REBUILD:
+                self.cur.execute(statement)
+            self.conn.commit()
+            print("Report aggregates rebuilt")
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error rebuilding report aggregates: {e}")
+
+    def check_query_plans(self, queries=None):
+        """
+        reports which query plans still walk a whole table or index
+
+        runs EXPLAIN QUERY PLAN for every statement from
+        plan_check_queries() (or the dict passed in) and prints the SCAN
+        steps - with or without an index, nothing bounds them.
+
+        Returns:
+            dict of {query name: [scan steps]} for the queries that scan
+        """
+        queries = plan_check_queries() if queries is None else queries
+        scans = {}
+        try:
+            for name, (sql, params) in queries.items():
+                self.cur.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                table_scans = _unbounded_scans([row[3] for row in self.cur.fetchall()])
+                if table_scans:
+                    scans[name] = table_scans
+
+            print(f"\n{'Query':<35} {'Plan':<50}")
+            print("-" * 85)
+            for name in queries:
+                plan = '; '.join(scans[name]) if name in scans else 'uses indexes'
+                print(f"{name:<35} {plan:<50}")
+
+        except Exception as e:
+            print(f"Error checking query plans: {e}")
+
+        return scans
+
     def populate_sample_data(self):
         """
         fills tables with sample data for testing
@@ -198,6 +457,9 @@ class DatabaseManager:
 
         should be called when shutting down
         """
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            self.pool.close_all()
+            self.pool = None
+            self.conn = None
+            self.cur = None
             print("Database connection closed")
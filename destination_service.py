@@ -1,4 +1,8 @@
-class DestinationService:
+from base_service import BaseService
+from search_service import SearchService
+
+
+class DestinationService(BaseService):
     """
     handles destination stuff - basically manages airports and destinations
 
@@ -18,8 +22,8 @@ class DestinationService:
         Args:
             db_manager: Database manager for doing database operations
         """
-        self.db_manager = db_manager
-        self.conn, self.cur = db_manager.get_connection()
+        super().__init__(db_manager)
+        self.search = SearchService(db_manager)
 
     def manage_destinations(self):
         """
@@ -59,9 +63,7 @@ class DestinationService:
 
         """
         try:
-            self.cur.execute(
-                "SELECT * FROM Destinations ORDER BY destination_name")
-            destinations = self.cur.fetchall()
+            destinations = self.get_destinations_by_name()
 
             print(
                 f"\n{'ID':<5} {'Name':<25} {'Country':<20} {'Code':<8} {'Timezone':<10}")
@@ -73,6 +75,17 @@ class DestinationService:
         except Exception as e:
             print(f"Error viewing destinations: {e}")
 
+    def get_destinations_by_name(self):
+        """
+        every destination record, sorted alphabetically by name
+
+        Returns:
+            list of full Destinations rows
+        """
+        self.cur.execute(
+            "SELECT * FROM Destinations ORDER BY destination_name")
+        return self.cur.fetchall()
+
     def add_destination(self):
         """
         Add new destination to system
@@ -98,6 +111,7 @@ class DestinationService:
                 VALUES (?, ?, ?, ?)
             ''', (name, country, code, timezone))
             self.conn.commit()
+            self.db_manager.reference_cache.invalidate('destinations')
             print("Destination added successfully!")
 
         except Exception as e:
@@ -107,8 +121,8 @@ class DestinationService:
         """
         Update existing destination info
 
-        lets user change destination details. They pick the destination by ID
-        then choose what field to update.
+        lets user change destination details. They search for the destination
+        (or give its ID) then choose what field to update.
 
         Can update:
             - name
@@ -117,14 +131,9 @@ class DestinationService:
             - timezone
         """
         try:
-            self.cur.execute(
-                "SELECT destination_id, destination_name FROM Destinations")
-            destinations = self.cur.fetchall()
-            print("\nDestinations:")
-            for dest in destinations:
-                print(f"{dest[0]}. {dest[1]}")
-
-            dest_id = int(input("Enter destination ID to update: "))
+            dest_id = self.search.pick_destination("destination to update")
+            if dest_id is None:
+                return
             field = input(
                 "Enter field to update (name/country/code/timezone): ").lower()
             new_value = input("Enter new value: ")
@@ -147,6 +156,7 @@ class DestinationService:
                     (new_value, dest_id))
 
             self.conn.commit()
+            self.db_manager.reference_cache.invalidate('destinations')
             print("Destination updated successfully!")
 
         except Exception as e:
@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+
+from models import FlightRecord
+from statements import registry
+
+
+def date_range_bounds(start_date, end_date):
+    """
+    turns an inclusive YYYY-MM-DD date range into half-open bounds
+
+    departure_time >= start AND departure_time < day after end matches the
+    same rows as DATE(departure_time) BETWEEN start AND end, but compares
+    the raw column so the departure_time index can be used
+    """
+    start = datetime.strptime(start_date.strip(), '%Y-%m-%d')
+    end = datetime.strptime(end_date.strip(), '%Y-%m-%d') + timedelta(days=1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+# WHERE fragment for each filter. always added in this order so the same
+# set of filters gives the same SQL text (and hits sqlite's statement cache)
+FILTER_SQL = {
+    'destination': "f.destination_id = ?",
+    'origin': "f.origin_id = ?",
+    'status': "f.status = ?",
+    'airline': "f.airline_id = ?",
+    # driven from the pilot's assignments (idx_assignments_pilot_status_flight)
+    # - a correlated EXISTS would walk every flight and probe each one
+    'pilot': ("f.flight_id IN (SELECT pf.flight_id FROM Flight_assignments pf "
+              "WHERE pf.pilot_id = ? AND pf.status = 'Active')"),
+    'window': "f.departure_time >= ? AND f.departure_time < ?",
+}
+
+# crew comes from a correlated subquery instead of JOIN + GROUP BY so the
+# listing can walk the departure_time index in order without grouping.
+# airline / airport / pilot names aren't joined in - the ids get resolved
+# through the ReferenceCache when the rows are turned into FlightRecords
+FLIGHT_LISTING_SQL = '''
+    SELECT f.flight_id, f.flight_number, f.airline_id, f.origin_id, f.destination_id,
+           (SELECT GROUP_CONCAT(fa.pilot_id || ':' || fa.role)
+            FROM Flight_assignments fa
+            WHERE fa.flight_id = f.flight_id AND fa.status = 'Active') as crew,
+           f.departure_time, f.arrival_time, f.status
+    FROM Flights f
+'''
+
+# tables a listing's FlightRecords depend on - the rows plus the names
+# resolved for the airline, airports and crew
+FLIGHT_LISTING_TABLES = ('Flights', 'Flight_assignments', 'Airlines', 'Destinations', 'Pilots')
+
+
+def make_flight_record(row, names):
+    """
+    turns a FLIGHT_LISTING_SQL row into a FlightRecord
+
+    Args:
+        row: tuple from the listing query
+        names: ReferenceCache used to resolve ids to names
+    """
+    crew = row[5]
+    if crew:
+        members = (member.split(':', 1) for member in crew.split(','))
+        crew = ','.join(f"{names.pilot_name(int(pilot_id)) or 'Unknown'} ({role})" for pilot_id, role in members)
+
+    return FlightRecord(
+        row[0], row[1],
+        names.airline_name(row[2]) or 'Unknown',
+        names.destination_name(row[3]) or 'Unknown',
+        names.destination_name(row[4]) or 'Unknown',
+        crew, row[6], row[7], row[8])
+
+
+class FlightQuery:
+    """
+    composable flight search
+
+    collects filters and builds one parameterized SELECT from them.
+    filters can be passed as keyword args or chained:
+
+        FlightQuery(status='Delayed').destination(3).departing_between('2025-01-01', '2025-01-07')
+
+    all filters are ANDed together
+    """
+
+    def __init__(self, destination=None, origin=None, status=None, airline=None, pilot=None,
+                 start_date=None, end_date=None):
+        """
+        create query, optionally with some filters already set
+        """
+        self.filters = {}
+        if destination is not None:
+            self.destination(destination)
+        if origin is not None:
+            self.origin(origin)
+        if status is not None:
+            self.status(status)
+        if airline is not None:
+            self.airline(airline)
+        if pilot is not None:
+            self.pilot(pilot)
+        if start_date is not None or end_date is not None:
+            self.departing_between(start_date or end_date, end_date or start_date)
+
+    def destination(self, destination_id):
+        """only flights arriving at this destination id"""
+        self.filters['destination'] = (destination_id,)
+        return self
+
+    def origin(self, origin_id):
+        """only flights leaving from this destination id"""
+        self.filters['origin'] = (origin_id,)
+        return self
+
+    def status(self, status):
+        """only flights with this status"""
+        self.filters['status'] = (status,)
+        return self
+
+    def airline(self, airline_id):
+        """only flights run by this airline id"""
+        self.filters['airline'] = (airline_id,)
+        return self
+
+    def pilot(self, pilot_id):
+        """only flights this pilot has an active assignment on"""
+        self.filters['pilot'] = (pilot_id,)
+        return self
+
+    def departing_between(self, start_date, end_date):
+        """only flights departing from start_date to end_date inclusive (YYYY-MM-DD)"""
+        self.filters['window'] = date_range_bounds(start_date, end_date)
+        return self
+
+    def build(self, after=None, limit=None):
+        """
+        builds the SQL statement for the current filters
+
+        Args:
+            after: optional (departure_time, flight_id) keyset - only rows
+                sorting after this one are returned
+            limit: optional max number of rows
+
+        Returns:
+            (sql, params) tuple
+        """
+        names = tuple(name for name in FILTER_SQL if name in self.filters)
+        params = []
+        for name in names:
+            params.extend(self.filters[name])
+        if after is not None:
+            params.extend(after)
+        if limit is not None:
+            params.append(limit)
+
+        shape = ('flights', names, after is not None, limit is not None)
+        sql = registry.get(shape, lambda: self._compile(*shape[1:]))
+        return sql, tuple(params)
+
+    @staticmethod
+    def _compile(names, keyset, limited):
+        """
+        builds the SQL text for one query shape - only called by the
+        statement registry when it hasn't seen the shape before
+        """
+        conditions = [FILTER_SQL[name] for name in names]
+        if keyset:
+            # row value comparison matches the ORDER BY, so sqlite seeks
+            # straight to the keyset position in the departure_time index
+            conditions.append("(f.departure_time, f.flight_id) > (?, ?)")
+
+        sql = FLIGHT_LISTING_SQL
+        if conditions:
+            sql += "    WHERE " + " AND ".join(conditions) + "\n"
+        sql += "    ORDER BY f.departure_time, f.flight_id\n"
+        if limited:
+            sql += "    LIMIT ?\n"
+        return sql
+
+    def run(self, cur, names, after=None, limit=None, cache=None):
+        """
+        runs the query on the given cursor
+
+        Args:
+            cur: cursor to run on
+            names: ReferenceCache for resolving ids to names
+            after / limit: see build()
+            cache: optional ResultCache to reuse the rows from while
+                FLIGHT_LISTING_TABLES haven't changed
+
+        Returns:
+            list of FlightRecord
+        """
+        sql, params = self.build(after, limit)
+
+        def fetch():
+            cur.execute(sql, params)
+            return [make_flight_record(row, names) for row in cur.fetchall()]
+
+        if cache is None:
+            return fetch()
+        return cache.get(cur, ('flights', sql, params), FLIGHT_LISTING_TABLES, fetch)
+
+    def iter_pages(self, cur, names, page_size=500, cache=None):
+        """
+        runs the query one page at a time using keyset pagination
+
+        each page starts after the (departure_time, flight_id) of the last
+        row of the previous page, so every page is an index seek plus
+        page_size rows - no OFFSET rescanning and only one page in memory
+
+        Yields:
+            lists of up to page_size FlightRecord (cached per page when
+            a ResultCache is given)
+        """
+        after = None
+        while True:
+            page = self.run(cur, names, after, page_size, cache)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = (page[-1].departure_time, page[-1].flight_id)
@@ -1,4 +1,16 @@
-class FlightService:
+from base_service import BaseService
+from flight_query import FlightQuery
+from models import Flight, FlightTable, row_factory
+from search_service import SearchService
+
+
+# rows fetched per page when streaming flight listings
+FLIGHT_PAGE_SIZE = 500
+
+FLIGHT_ROWS = row_factory(Flight)
+
+
+class FlightService(BaseService):
     """
     handles flight operations
 
@@ -10,8 +22,8 @@ class FlightService:
         """
         setup flight service
         """
-        self.db_manager = db_manager
-        self.conn, self.cur = db_manager.get_connection()
+        super().__init__(db_manager)
+        self.search = SearchService(db_manager)
 
     def add_flight(self):
         """
@@ -25,25 +37,19 @@ class FlightService:
             flight_number = input("Enter flight number: ").upper()
 
             # show airlines
-            self.cur.execute(
-                "SELECT airline_id, airline_name, airline_code FROM Airlines")
-            airlines = self.cur.fetchall()
+            airlines = self.db_manager.reference_cache.list_airlines()
             print("\nAvailable Airlines:")
             for airline in airlines:
                 print(f"{airline[0]}. {airline[1]} ({airline[2]})")
 
             airline_id = int(input("\nEnter airline ID: "))
 
-            # show destinations
-            self.cur.execute(
-                "SELECT destination_id, destination_name, airport_code FROM Destinations")
-            destinations = self.cur.fetchall()
-            print("\nAvailable Destinations:")
-            for dest in destinations:
-                print(f"{dest[0]}. {dest[1]} ({dest[2]})")
-
-            origin_id = int(input("\nEnter origin destination ID: "))
-            destination_id = int(input("Enter destination ID: "))
+            origin_id = self.search.pick_destination("origin")
+            if origin_id is None:
+                return
+            destination_id = self.search.pick_destination("destination")
+            if destination_id is None:
+                return
 
             if origin_id == destination_id:
                 print("Origin and destination cannot be the same!")
@@ -54,23 +60,111 @@ class FlightService:
             aircraft_type = input("Enter aircraft type: ")
             capacity = int(input("Enter capacity: "))
 
-            self.cur.execute('''
-                INSERT INTO Flights (flight_number, airline_id, origin_id, destination_id, departure_time, arrival_time, aircraft_type, capacity)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (flight_number, airline_id, origin_id, destination_id, departure_time, arrival_time, aircraft_type, capacity))
-
-            self.conn.commit()
+            self.create_flight(flight_number, airline_id, origin_id, destination_id,
+                               departure_time, arrival_time, aircraft_type, capacity)
             print("Flight added successfully!")
 
         except Exception as e:
             print(f"Error adding flight: {e}")
 
+    def create_flight(self, flight_number, airline_id, origin_id, destination_id,
+                      departure_time, arrival_time, aircraft_type, capacity, commit=True):
+        """
+        inserts a flight without prompting
+
+        non-interactive version of add_flight for batch jobs.
+        errors are raised rather than printed
+
+        Args:
+            flight_number .. capacity: the Flights columns
+            commit: commit straight away. pass False when the caller
+                groups several changes into its own transaction
+
+        Returns:
+            flight_id of the new flight
+        """
+        if origin_id == destination_id:
+            raise ValueError("Origin and destination cannot be the same!")
+
+        cur = self.cur
+        cur.execute('''
+            INSERT INTO Flights (flight_number, airline_id, origin_id, destination_id, departure_time, arrival_time, aircraft_type, capacity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (flight_number.upper(), airline_id, origin_id, destination_id, departure_time, arrival_time,
+              aircraft_type, capacity))
+        flight_id = cur.lastrowid
+
+        if commit:
+            self.conn.commit()
+        self.db_manager.traffic_analytics.invalidate()
+        return flight_id
+
+    def get_flight(self, flight_number):
+        """
+        one flight by number
+
+        Returns:
+            Flight, or None if there's no such flight
+        """
+        cur = self.conn.cursor()
+        cur.row_factory = FLIGHT_ROWS
+        cur.execute("SELECT * FROM Flights WHERE flight_number = ?", (flight_number.upper(),))
+        return cur.fetchone()
+
+    def load_flight_table(self, where='', params=()):
+        """
+        reads many flights into a compact column store for analysis
+
+        Args:
+            where: optional SQL after FROM Flights, e.g. "WHERE airline_id = ?"
+            params: parameters for where
+
+        Returns:
+            FlightTable
+        """
+        return FlightTable.load(self.conn.cursor(), where, params)
+
+    def find_flights(self, query, limit=None):
+        """
+        runs a FlightQuery and returns the matching flights
+
+        non-interactive, so batch jobs can call it directly.
+        errors are raised rather than printed
+
+        Args:
+            query: FlightQuery with the filters to apply
+            limit: optional max number of flights, earliest first
+
+        Returns:
+            list of FlightRecord ordered by departure time. repeats
+            come from the result cache until the flights change
+        """
+        return query.run(self.cur, self.db_manager.reference_cache, limit=limit,
+                         cache=self.db_manager.result_cache)
+
+    def iter_flights(self, query, page_size=FLIGHT_PAGE_SIZE):
+        """
+        streams the flights matching a FlightQuery
+
+        fetches page_size rows at a time with keyset pagination on
+        (departure_time, flight_id), so memory stays flat however big
+        the Flights table gets
+
+        Yields:
+            FlightRecord ordered by departure time. pages come from the
+            result cache until the flights change
+        """
+        for page in query.iter_pages(self.cur, self.db_manager.reference_cache, page_size,
+                                     self.db_manager.result_cache):
+            yield from page
+
     def view_flights_by_criteria(self):
         """
         view flights with different filters
 
         multiple options for filtering - all flights, by destination,
-        status, date range or pilot. uses JOINs to show proper info
+        status, date range or pilot. builds a FlightQuery from the
+        choice and shows the results
         """
         try:
             print("\n=== View Flights ===")
@@ -81,113 +175,38 @@ class FlightService:
             print("5. By pilot")
 
             choice = int(input("Choose filter option: "))
+            query = FlightQuery()
 
-            if choice == 1:
-                query = '''
-                    SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                           GROUP_CONCAT(p.first_name || ' ' || p.last_name || ' (' || fa.role || ')') as crew,
-                           f.departure_time, f.arrival_time, f.status
-                    FROM Flights f
-                    JOIN Airlines a ON f.airline_id = a.airline_id
-                    JOIN Destinations o ON f.origin_id = o.destination_id
-                    JOIN Destinations d ON f.destination_id = d.destination_id
-                    LEFT JOIN Flight_assignments fa ON f.flight_id = fa.flight_id AND fa.status = 'Active'
-                    LEFT JOIN Pilots p ON fa.pilot_id = p.pilot_id
-                    GROUP BY f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time, f.arrival_time, f.status
-                    ORDER BY f.departure_time
-                '''
-                self.cur.execute(query)
-
-            elif choice == 2:
-                self.cur.execute(
-                    "SELECT destination_id, destination_name FROM Destinations")
-                destinations = self.cur.fetchall()
+            if choice == 2:
+                destinations = self.db_manager.reference_cache.list_destinations()
                 print("\nDestinations:")
                 for dest in destinations:
                     print(f"{dest[0]}. {dest[1]}")
 
-                dest_id = int(input("Enter destination ID: "))
-                query = '''
-                    SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                           GROUP_CONCAT(p.first_name || ' ' || p.last_name || ' (' || fa.role || ')') as crew,
-                           f.departure_time, f.arrival_time, f.status
-                    FROM Flights f
-                    JOIN Airlines a ON f.airline_id = a.airline_id
-                    JOIN Destinations o ON f.origin_id = o.destination_id
-                    JOIN Destinations d ON f.destination_id = d.destination_id
-                    LEFT JOIN Flight_assignments fa ON f.flight_id = fa.flight_id AND fa.status = 'Active'
-                    LEFT JOIN Pilots p ON fa.pilot_id = p.pilot_id
-                    WHERE f.destination_id = ?
-                    GROUP BY f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time, f.arrival_time, f.status
-                    ORDER BY f.departure_time
-                '''
-                self.cur.execute(query, (dest_id,))
+                query.destination(int(input("Enter destination ID: ")))
 
             elif choice == 3:
-                status = input(
-                    "Enter status (Scheduled/Delayed/Cancelled/Completed/In-Flight): ")
-                query = '''
-                    SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                           GROUP_CONCAT(p.first_name || ' ' || p.last_name || ' (' || fa.role || ')') as crew,
-                           f.departure_time, f.arrival_time, f.status
-                    FROM Flights f
-                    JOIN Airlines a ON f.airline_id = a.airline_id
-                    JOIN Destinations o ON f.origin_id = o.destination_id
-                    JOIN Destinations d ON f.destination_id = d.destination_id
-                    LEFT JOIN Flight_assignments fa ON f.flight_id = fa.flight_id AND fa.status = 'Active'
-                    LEFT JOIN Pilots p ON fa.pilot_id = p.pilot_id
-                    WHERE f.status = ?
-                    GROUP BY f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time, f.arrival_time, f.status
-                    ORDER BY f.departure_time
-                '''
-                self.cur.execute(query, (status,))
+                query.status(input(
+                    "Enter status (Scheduled/Delayed/Cancelled/Completed/In-Flight): "))
 
             elif choice == 4:
                 start_date = input("Enter start date (YYYY-MM-DD): ")
                 end_date = input("Enter end date (YYYY-MM-DD): ")
-                query = '''
-                    SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                           GROUP_CONCAT(p.first_name || ' ' || p.last_name || ' (' || fa.role || ')') as crew,
-                           f.departure_time, f.arrival_time, f.status
-                    FROM Flights f
-                    JOIN Airlines a ON f.airline_id = a.airline_id
-                    JOIN Destinations o ON f.origin_id = o.destination_id
-                    JOIN Destinations d ON f.destination_id = d.destination_id
-                    LEFT JOIN Flight_assignments fa ON f.flight_id = fa.flight_id AND fa.status = 'Active'
-                    LEFT JOIN Pilots p ON fa.pilot_id = p.pilot_id
-                    WHERE DATE(f.departure_time) BETWEEN ? AND ?
-                    GROUP BY f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time, f.arrival_time, f.status
-                    ORDER BY f.departure_time
-                '''
-                self.cur.execute(query, (start_date, end_date))
+                query.departing_between(start_date, end_date)
 
             elif choice == 5:
-                self.cur.execute(
-                    "SELECT pilot_id, first_name, last_name FROM Pilots")
-                pilots = self.cur.fetchall()
+                pilots = self.db_manager.reference_cache.list_pilots()
                 print("\nPilots:")
                 for pilot in pilots:
                     print(f"{pilot[0]}. {pilot[1]} {pilot[2]}")
 
-                pilot_id = int(input("Enter pilot ID: "))
-                query = '''
-                    SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                           GROUP_CONCAT(p.first_name || ' ' || p.last_name || ' (' || fa.role || ')') as crew,
-                           f.departure_time, f.arrival_time, f.status
-                    FROM Flights f
-                    JOIN Airlines a ON f.airline_id = a.airline_id
-                    JOIN Destinations o ON f.origin_id = o.destination_id
-                    JOIN Destinations d ON f.destination_id = d.destination_id
-                    LEFT JOIN Flight_assignments fa ON f.flight_id = fa.flight_id AND fa.status = 'Active'
-                    LEFT JOIN Pilots p ON fa.pilot_id = p.pilot_id
-                    WHERE fa.pilot_id = ?
-                    GROUP BY f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time, f.arrival_time, f.status
-                    ORDER BY f.departure_time
-                '''
-                self.cur.execute(query, (pilot_id,))
-
-            results = self.cur.fetchall()
-            self._display_flight_results(results)
+                query.pilot(int(input("Enter pilot ID: ")))
+
+            elif choice != 1:
+                print("Invalid filter option!")
+                return
+
+            self._display_flight_results(self.iter_flights(query))
 
         except Exception as e:
             print(f"Error viewing flights: {e}")
@@ -204,11 +223,7 @@ class FlightService:
             flight_number = input("Enter flight number to update: ").upper()
 
             # check flight exists
-            self.cur.execute(
-                "SELECT * FROM Flights WHERE flight_number = ?", (flight_number,))
-            flight = self.cur.fetchone()
-
-            if not flight:
+            if self.get_flight(flight_number) is None:
                 print("Flight not found!")
                 return
 
@@ -220,38 +235,73 @@ class FlightService:
             choice = int(input("Choose option: "))
 
             if choice == 1:
-                new_time = input(
-                    "Enter new departure time (YYYY-MM-DD HH:MM): ")
-                self.cur.execute(
-                    "UPDATE Flights SET departure_time = ? WHERE flight_number = ?", (new_time, flight_number))
+                self.update_flight_details(flight_number, departure_time=input(
+                    "Enter new departure time (YYYY-MM-DD HH:MM): "))
             elif choice == 2:
-                new_time = input("Enter new arrival time (YYYY-MM-DD HH:MM): ")
-                self.cur.execute(
-                    "UPDATE Flights SET arrival_time = ? WHERE flight_number = ?", (new_time, flight_number))
+                self.update_flight_details(flight_number, arrival_time=input(
+                    "Enter new arrival time (YYYY-MM-DD HH:MM): "))
             elif choice == 3:
-                new_status = input(
-                    "Enter new status (Scheduled/Delayed/Cancelled/Completed/In-Flight): ")
-                self.cur.execute(
-                    "UPDATE Flights SET status = ? WHERE flight_number = ?", (new_status, flight_number))
-
-            self.conn.commit()
+                self.update_flight_details(flight_number, status=input(
+                    "Enter new status (Scheduled/Delayed/Cancelled/Completed/In-Flight): "))
+            else:
+                print("Invalid option!")
+                return
             print("Flight updated successfully!")
 
         except Exception as e:
             print(f"Error updating flight: {e}")
 
+    def update_flight_details(self, flight_number, departure_time=None, arrival_time=None, status=None,
+                              commit=True):
+        """
+        changes a flight's times and/or status without prompting
+
+        non-interactive version of update_flight for batch jobs.
+        only the fields passed are changed. errors are raised rather
+        than printed
+
+        Args:
+            flight_number: flight to update
+            departure_time / arrival_time: new 'YYYY-MM-DD HH:MM' times
+            status: new status
+            commit: commit straight away. pass False when the caller
+                groups several changes into its own transaction
+        """
+        changes = {'departure_time': departure_time, 'arrival_time': arrival_time, 'status': status}
+        changes = {column: value for column, value in changes.items() if value is not None}
+        if not changes:
+            raise ValueError("Nothing to update")
+
+        cur = self.cur
+        assignments = ', '.join(f"{column} = ?" for column in changes)
+        cur.execute(f"UPDATE Flights SET {assignments} WHERE flight_number = ?",
+                    (*changes.values(), flight_number.upper()))
+        if cur.rowcount == 0:
+            raise ValueError(f"Flight {flight_number} not found")
+
+        if commit:
+            self.conn.commit()
+        if departure_time is not None or arrival_time is not None:
+            # crew intervals and traffic buckets use the old times
+            self.db_manager.crew_schedule.invalidate()
+            self.db_manager.traffic_analytics.invalidate()
+
     def _display_flight_results(self, results):
         """
         shows flight results in table format
 
-        displays flight info in columns. handles empty results
+        displays flight info in columns. results can be a list or a
+        generator - rows are printed as they arrive. handles empty results
         """
-        if results:
-            print(f"\n{'Flight':<10} {'Airline':<15} {'Origin':<15} {'Destination':<15} {'Crew':<30} {'Departure':<20} {'Arrival':<20} {'Status':<12}")
-            print("-" * 140)
-            for row in results:
-                crew = row[4] if row[4] else "No crew assigned"
-                print(
-                    f"{row[0]:<10} {row[1]:<15} {row[2]:<15} {row[3]:<15} {crew:<30} {row[5]:<20} {row[6]:<20} {row[7]:<12}")
-        else:
+        shown = 0
+        for flight in results:
+            if shown == 0:
+                print(f"\n{'Flight':<10} {'Airline':<15} {'Origin':<15} {'Destination':<15} {'Crew':<30} {'Departure':<20} {'Arrival':<20} {'Status':<12}")
+                print("-" * 140)
+            crew = flight.crew if flight.crew else "No crew assigned"
+            print(
+                f"{flight.flight_number:<10} {flight.airline:<15} {flight.origin:<15} {flight.destination:<15} {crew:<30} {flight.departure_time:<20} {flight.arrival_time:<20} {flight.status:<12}")
+            shown += 1
+
+        if shown == 0:
             print("No flights found matching the criteria.")
@@ -15,6 +15,11 @@ Author: Student
 Version: 2.0
 """
 
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+from batch_runner import DEFAULT_BATCH_SIZE, BatchRunner
 from database import DatabaseManager
 from flight_service import FlightService
 from pilot_service import PilotService
@@ -28,12 +33,36 @@ def main():
     main function - starts the flight management system
 
     sets up all the components and starts the UI.
-    handles errors during startup
+    handles errors during startup. --query-stats / --slow-query-ms time
+    every statement and print the slowest ones on exit.
+    `main.py run FILE` runs a JSON lines file of operations instead of
+    the menus (see run_batch)
     """
+    parser = argparse.ArgumentParser(description='Flight Management System')
+    parser.add_argument('--db', default='FlightManagement.db', help='Database file to use')
+    parser.add_argument('--query-stats', action='store_true',
+                        help='Time every statement and print a summary on exit')
+    parser.add_argument('--slow-query-ms', type=float,
+                        help='Log statements taking at least this many ms (with their query plan)')
+    parser.add_argument('--slow-query-log', default='slow_queries.log',
+                        help='File slow statements are appended to')
+
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run', help='Run operations from a JSON lines file without the menus')
+    run_parser.add_argument('file', help="JSON lines file of operations ('-' for stdin)")
+    run_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Write operations committed per transaction')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        sys.exit(run_batch(args))
+
     try:
         # setup database
         print("Initialising Flight Management System...")
-        db_manager = DatabaseManager()
+        db_manager = DatabaseManager(args.db, query_stats=args.query_stats,
+                                     slow_query_ms=args.slow_query_ms,
+                                     slow_query_log=args.slow_query_log)
 
         # setup services
         flight_service = FlightService(db_manager)
@@ -56,10 +85,56 @@ def main():
     finally:
         # cleanup
         try:
+            if db_manager.query_stats is not None:
+                db_manager.report_query_stats()
             db_manager.close_connection()
         except:
             pass
 
 
+def run_batch(args):
+    """
+    headless mode - runs the operations in args.file through BatchRunner
+
+    results go to stdout as one JSON object per line. everything the
+    services print goes to stderr instead so stdout stays machine
+    readable, the summary too
+
+    Returns:
+        exit code: 0 if every operation succeeded, 1 if any failed,
+        2 if the run couldn't start
+    """
+    results = sys.stdout
+    with redirect_stdout(sys.stderr):
+        db_manager = None
+        try:
+            db_manager = DatabaseManager(args.db, query_stats=args.query_stats,
+                                         slow_query_ms=args.slow_query_ms,
+                                         slow_query_log=args.slow_query_log)
+            runner = BatchRunner(db_manager, FlightService(db_manager), PilotService(db_manager),
+                                 ReportService(db_manager), args.batch_size)
+
+            if args.file == '-':
+                stats = runner.run(sys.stdin, results)
+            else:
+                with open(args.file) as lines:
+                    stats = runner.run(lines, results)
+
+            print(f"Ran {stats['operations']} operations ({stats['succeeded']} ok, {stats['failed']} failed) "
+                  f"in {stats['transactions']} transactions, {stats['elapsed']:.2f}s "
+                  f"({stats['ops_per_s']:.0f} ops/s)")
+            if db_manager.query_stats is not None:
+                db_manager.report_query_stats()
+            return 1 if stats['failed'] else 0
+
+        except Exception as e:
+            print(f"Fatal error: {e}")
+            return 2
+
+        finally:
+            if db_manager is not None:
+                db_manager.close_connection()
+
+
 if __name__ == "__main__":
     main()
@@ -1,7 +1,20 @@
+from array import array
+from collections import namedtuple
 from datetime import datetime, timedelta
 import random
 
 
+EPOCH = datetime(1970, 1, 1)
+
+# capacity for each aircraft type
+AIRCRAFT_CAPACITY = {
+    'Boeing 737-800': 189, 'Boeing 737 MAX 8': 210, 'Airbus A320': 180,
+    'Airbus A321': 220, 'Boeing 777-300ER': 396, 'Boeing 787-9': 290,
+    'Airbus A350-900': 325, 'Airbus A380': 525, 'Boeing 747-8F': 467,
+    'Embraer E190': 114
+}
+
+
 class SampleData:
     """
     Generates sample data for the flight management system
@@ -170,14 +183,6 @@ class SampleData:
             'Boeing 747-8F', 'Embraer E190'
         ]
 
-        # capacity for each aircraft type
-        aircraft_capacity = {
-            'Boeing 737-800': 189, 'Boeing 737 MAX 8': 210, 'Airbus A320': 180,
-            'Airbus A321': 220, 'Boeing 777-300ER': 396, 'Boeing 787-9': 290,
-            'Airbus A350-900': 325, 'Airbus A380': 525, 'Boeing 747-8F': 467,
-            'Embraer E190': 114
-        }
-
         statuses = ['Scheduled', 'Delayed',
                     'Completed', 'In-Flight', 'Cancelled']
         status_weights = [0.5, 0.2, 0.25, 0.03, 0.02]  # realistic distribution
@@ -216,7 +221,7 @@ class SampleData:
 
             # select aircraft
             aircraft = random.choice(aircraft_types)
-            capacity = aircraft_capacity[aircraft]
+            capacity = AIRCRAFT_CAPACITY[aircraft]
 
             # status based on timing
             if departure < base_time - timedelta(hours=2):
@@ -272,64 +277,244 @@ class SampleData:
         }
 
 
-class Flight:
+class Record:
     """
-    represents a flight
+    base for the model classes
 
-    basic flight entity with route info, timing, status etc
+    fields are __slots__, so an instance is a fixed size block of
+    pointers with no per-instance __dict__. subclasses list their
+    columns in __slots__ in table order, which is also the order of the
+    positional constructor arguments
     """
 
-    def __init__(self, flight_id=None, flight_number=None, origin_id=None,
-                 destination_id=None, pilot_id=None, departure_time=None,
-                 arrival_time=None, status='Scheduled', aircraft_type=None, capacity=None):
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
         """
-        create flight object
+        create record from values in __slots__ order and/or by name,
+        anything not given is None (or the subclass default)
         """
-        self.flight_id = flight_id
-        self.flight_number = flight_number
-        self.origin_id = origin_id
-        self.destination_id = destination_id
-        self.pilot_id = pilot_id
-        self.departure_time = departure_time
-        self.arrival_time = arrival_time
-        self.status = status
-        self.aircraft_type = aircraft_type
-        self.capacity = capacity
-
-
-class Pilot:
+        defaults = getattr(self, 'DEFAULTS', {})
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name in self.__slots__[len(args):]:
+            setattr(self, name, kwargs.pop(name, defaults.get(name)))
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} has no field {', '.join(kwargs)}")
+
+    def as_tuple(self):
+        """field values in __slots__ order"""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def as_dict(self):
+        """{field: value}, e.g. for JSON"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Flight(Record):
+    """
+    represents a flight
+
+    basic flight entity with route info, timing, status etc.
+    one field per Flights column. crew lives in Flight_assignments
+    """
+
+    __slots__ = ('flight_id', 'flight_number', 'airline_id', 'origin_id', 'destination_id',
+                 'departure_time', 'arrival_time', 'status', 'aircraft_type', 'capacity',
+                 'created_date', 'departure_epoch', 'arrival_epoch')
+    DEFAULTS = {'status': 'Scheduled'}
+
+
+class Pilot(Record):
     """
     pilot class
 
     stores pilot info like name, licence, experience etc
     """
 
-    def __init__(self, pilot_id=None, first_name=None, last_name=None,
-                 license_number=None, experience_years=None, hire_date=None, status='Active'):
-        """init pilot"""
-        self.pilot_id = pilot_id
-        self.first_name = first_name
-        self.last_name = last_name
-        self.license_number = license_number
-        self.experience_years = experience_years
-        self.hire_date = hire_date
-        self.status = status
+    __slots__ = ('pilot_id', 'first_name', 'last_name', 'license_number', 'experience_years',
+                 'hire_date', 'airline_id', 'status')
+    DEFAULTS = {'status': 'Active'}
 
 
-class Destination:
+class Destination(Record):
     """
     airport/destination class
 
     has airport info like name, country, IATA code etc
     """
 
-    def __init__(self, destination_id=None, destination_name=None, country=None,
-                 airport_code=None, timezone=None):
+    __slots__ = ('destination_id', 'destination_name', 'country', 'airport_code', 'timezone',
+                 'created_date')
+
+
+def row_factory(model):
+    """
+    sqlite3 row factory that builds `model` records straight from rows
+
+    columns are matched to fields by name, so any SELECT works - columns
+    the model doesn't have are skipped, fields the SELECT doesn't have
+    get their default. when the SELECT lists exactly the model's fields
+    in order (e.g. "SELECT *" on its table) rows go straight into the
+    constructor. set it on a cursor, not the shared connection:
+
+        cur = conn.cursor()
+        cur.row_factory = row_factory(Flight)
+        cur.execute("SELECT * FROM Flights WHERE flight_number = ?", ('BA117',))
+        flight = cur.fetchone()
+
+    Returns:
+        function(cursor, row) for Cursor.row_factory
+    """
+    fields = set(model.__slots__)
+    # (description, positions) of the statement seen last. swapped as one
+    # tuple, never edited in place, so a thread reading it while another
+    # pooled cursor replaces it still gets a matching pair
+    last = [(None, None)]
+
+    def build(cursor, row):
+        description = cursor.description
+        seen, positions = last[0]
+        if description is not seen:
+            names = tuple(column[0] for column in description)
+            positions = None if names == model.__slots__ else [
+                (name, i) for i, name in enumerate(names) if name in fields]
+            last[0] = (description, positions)
+        if positions is None:
+            return model(*row)
+        return model(**{name: row[i] for name, i in positions})
+
+    return build
+
+
+class FlightTable:
+    """
+    many flights held column by column (struct of arrays)
+
+    numeric columns are array('q') - 8 bytes a value instead of a python
+    int object each - times are kept as epoch seconds rather than
+    strings, and status / aircraft type are small integer codes into a
+    list of the distinct values. only flight_number stays a list of str.
+    a million flights take tens of MB this way instead of the ~1GB of a
+    list of row tuples.
+
+    len(), indexing and iteration give Flight records, built on demand.
+    column(name) gives a whole column for vectorised work - the arrays
+    support the buffer protocol, so numpy.frombuffer(table.column('capacity'),
+    dtype='int64') wraps one without copying. missing numbers are -1
+    """
+
+    INT_COLUMNS = ('flight_id', 'airline_id', 'origin_id', 'destination_id', 'capacity',
+                   'departure_epoch', 'arrival_epoch')
+    CODED_COLUMNS = ('status', 'aircraft_type')
+
+    SELECT_SQL = ('SELECT flight_id, airline_id, origin_id, destination_id, capacity, departure_epoch, '
+                  'arrival_epoch, status, aircraft_type, flight_number FROM Flights')
+
+    def __init__(self):
+        """
+        empty table
+        """
+        self.columns = {name: array('q') for name in self.INT_COLUMNS}
+        self.codes = {name: array('h') for name in self.CODED_COLUMNS}
+        self.values = {name: [] for name in self.CODED_COLUMNS}
+        self.flight_numbers = []
+        self._lookups = {name: {} for name in self.CODED_COLUMNS}
+
+    @classmethod
+    def load(cls, cur, where='', params=(), chunk_size=100000):
+        """
+        reads flights into a new table
+
+        rows are fetched chunk_size at a time and appended column by
+        column, so only one chunk of row tuples exists at once
+
+        Args:
+            cur: cursor to read with
+            where: optional SQL after the FROM, e.g. "WHERE status = ? ORDER BY flight_id"
+            params: parameters for where
+            chunk_size: rows per fetch
+
+        Returns:
+            FlightTable
+        """
+        table = cls()
+        cur.execute(f"{cls.SELECT_SQL} {where}", params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return table
+            table.extend(rows)
+
+    def extend(self, rows):
+        """
+        appends rows in SELECT_SQL column order
+        """
+        columns = list(zip(*rows))
+        for position, name in enumerate(self.INT_COLUMNS):
+            self.columns[name].extend(-1 if value is None else value for value in columns[position])
+        for position, name in enumerate(self.CODED_COLUMNS, len(self.INT_COLUMNS)):
+            self.codes[name].extend(self._code(name, value) for value in columns[position])
+        self.flight_numbers.extend(columns[-1])
+
+    def _code(self, name, value):
+        """integer code for a status / aircraft type, adding new values as seen"""
+        lookup = self._lookups[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.values[name])
+            self.values[name].append(value)
+        return code
+
+    def column(self, name):
         """
-        setup destination object
+        one whole column - an array for numbers and codes, the list for
+        flight_number
         """
-        self.destination_id = destination_id
-        self.destination_name = destination_name
-        self.country = country
-        self.airport_code = airport_code
-        self.timezone = timezone
+        if name == 'flight_number':
+            return self.flight_numbers
+        if name in self.codes:
+            return self.codes[name]
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.flight_numbers)
+
+    def __getitem__(self, index):
+        """Flight record for one row, times as 'YYYY-MM-DD HH:MM:SS'"""
+        values = {name: column[index] for name, column in self.columns.items()}
+        for name in ('departure_epoch', 'arrival_epoch', 'capacity'):
+            if values[name] == -1:
+                values[name] = None
+        for name, codes in self.codes.items():
+            values[name] = self.values[name][codes[index]]
+        departure, arrival = values['departure_epoch'], values['arrival_epoch']
+        return Flight(flight_number=self.flight_numbers[index],
+                      departure_time=_epoch_text(departure), arrival_time=_epoch_text(arrival),
+                      **values)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _epoch_text(epoch):
+    """'YYYY-MM-DD HH:MM:SS' for epoch seconds, None for None"""
+    if epoch is None:
+        return None
+    return (EPOCH + timedelta(seconds=epoch)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# one row of a flight listing, as returned by FlightQuery / FlightService.find_flights.
+# crew is "Name (Role), ..." or None when nobody is assigned
+FlightRecord = namedtuple('FlightRecord', [
+    'flight_id', 'flight_number', 'airline', 'origin', 'destination',
+    'crew', 'departure_time', 'arrival_time', 'status'
+])
@@ -1,4 +1,33 @@
-class PilotService:
+from base_service import BaseService
+from search_service import SearchService
+from statements import FLIGHT_JOINS, registry
+
+
+ROLES = ('Captain', 'First Officer', 'Relief Pilot')
+
+
+def _assignable_flights_sql():
+    """flight pick list for assigning crew"""
+    return '''
+        SELECT f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time
+        FROM Flights f''' + FLIGHT_JOINS + '''
+        ORDER BY f.departure_time
+    '''
+
+
+def _pilot_schedule_sql():
+    """one pilot's active assignments with route and times"""
+    return '''
+        SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
+               f.departure_time, f.arrival_time, f.status, fa.role, fa.status as assignment_status
+        FROM Flight_assignments fa
+        JOIN Flights f ON fa.flight_id = f.flight_id''' + FLIGHT_JOINS + '''
+        WHERE fa.pilot_id = ? AND fa.status = 'Active'
+        ORDER BY f.departure_time
+    '''
+
+
+class PilotService(BaseService):
     """
     handles pilot processing and data
 
@@ -10,8 +39,8 @@ class PilotService:
         """
         setup pilot service with database manager
         """
-        self.db_manager = db_manager
-        self.conn, self.cur = db_manager.get_connection()
+        super().__init__(db_manager)
+        self.search = SearchService(db_manager)
 
     def assign_pilot_to_flight(self):
         """
@@ -24,14 +53,7 @@ class PilotService:
             print("\n=== Assign Pilot to Flight ===")
 
             # show flights
-            self.cur.execute('''
-                SELECT f.flight_id, f.flight_number, a.airline_name, o.destination_name, d.destination_name, f.departure_time
-                FROM Flights f
-                JOIN Airlines a ON f.airline_id = a.airline_id
-                JOIN Destinations o ON f.origin_id = o.destination_id
-                JOIN Destinations d ON f.destination_id = d.destination_id
-                ORDER BY f.departure_time
-            ''')
+            self.cur.execute(registry.get('assignable_flights', _assignable_flights_sql))
             flights = self.cur.fetchall()
 
             print("\nAvailable Flights:")
@@ -42,9 +64,7 @@ class PilotService:
             flight_id = int(input("\nEnter flight ID: "))
 
             # show pilots
-            self.cur.execute(
-                "SELECT pilot_id, first_name, last_name, experience_years FROM Pilots WHERE status = 'Active'")
-            pilots = self.cur.fetchall()
+            pilots = self.db_manager.reference_cache.list_pilots(active_only=True)
             print("\nAvailable Pilots:")
             for pilot in pilots:
                 print(
@@ -62,27 +82,146 @@ class PilotService:
             roles = {1: 'Captain', 2: 'First Officer', 3: 'Relief Pilot'}
             role = roles.get(role_choice, 'Captain')
 
-            # check if pilot already assigned
-            self.cur.execute(
-                "SELECT COUNT(*) FROM Flight_assignments WHERE flight_id = ? AND pilot_id = ? AND role = ? AND status = 'Active'",
-                (flight_id, pilot_id, role))
+            inserted, rejections = self.bulk_assign([(flight_id, pilot_id, role)])
 
-            if self.cur.fetchone()[0] > 0:
-                print("This pilot is already assigned to this flight with this role!")
+            if rejections:
+                print(f"Pilot not assigned: {rejections[0][2]}")
                 return
 
-            # insert assignment
-            self.cur.execute('''
-                INSERT INTO Flight_assignments (flight_id, pilot_id, role, status)
-                VALUES (?, ?, ?, 'Active')
-            ''', (flight_id, pilot_id, role))
-
-            self.conn.commit()
             print(f"Pilot assigned successfully as {role}!")
 
         except Exception as e:
             print(f"Error assigning pilot: {e}")
 
+    def bulk_assign(self, assignments, commit=True):
+        """
+        assign many pilots to flights in one go
+
+        validates everything in set-based passes - one query each for the
+        flights, the pilots and the existing assignments involved - then
+        checks role, pilot status, duplicates and time overlaps in memory
+        and inserts the accepted rows with a single executemany. the whole
+        batch is one transaction: if the insert fails nothing is written.
+
+        Args:
+            assignments: iterable of (flight_id, pilot_id, role)
+            commit: run in (and commit) a transaction of its own. pass False
+                when the caller already holds a write transaction - then
+                nothing is committed or rolled back here
+
+        Returns:
+            (number inserted, list of (index, assignment, reason) for
+            every rejected row, in input order)
+        """
+        rows = []
+        rejections = []
+        for index, assignment in enumerate(assignments):
+            try:
+                flight_id, pilot_id, role = assignment
+                flight_id, pilot_id = int(flight_id), int(pilot_id)
+            except (ValueError, TypeError):
+                rejections.append((index, assignment, "expected (flight_id, pilot_id, role) with numeric ids"))
+                continue
+            if role not in ROLES:
+                rejections.append((index, assignment, f"unknown role '{role}'"))
+            else:
+                rows.append((index, assignment, flight_id, pilot_id, role))
+
+        if not rows:
+            return 0, rejections
+
+        conn, cur = self.db_manager.get_connection()
+        crew_schedule = self.db_manager.crew_schedule
+        accepted = []
+        schedule_changed = False
+
+        try:
+            # take the write lock up front so nothing changes between
+            # validating and inserting
+            if commit:
+                cur.execute("BEGIN IMMEDIATE")
+
+            self._fill_id_table(cur, 'bulk_flight_ids', {row[2] for row in rows})
+            self._fill_id_table(cur, 'bulk_pilot_ids', {row[3] for row in rows})
+
+            cur.execute('''
+                SELECT f.flight_id, f.departure_epoch, f.arrival_epoch, f.status
+                FROM bulk_flight_ids b JOIN Flights f ON f.flight_id = b.id
+            ''')
+            flights = {flight_id: (departure, arrival, status)
+                       for flight_id, departure, arrival, status in cur.fetchall()}
+
+            cur.execute('''
+                SELECT p.pilot_id, p.status
+                FROM bulk_pilot_ids b JOIN Pilots p ON p.pilot_id = b.id
+            ''')
+            pilot_status = dict(cur.fetchall())
+
+            # UNIQUE(flight_id, pilot_id, role) covers every status, not just Active
+            cur.execute('''
+                SELECT fa.flight_id, fa.pilot_id, fa.role
+                FROM bulk_flight_ids b JOIN Flight_assignments fa ON fa.flight_id = b.id
+            ''')
+            existing = set(cur.fetchall())
+
+            for index, assignment, flight_id, pilot_id, role in rows:
+                key = (flight_id, pilot_id, role)
+                reason = None
+                if flight_id not in flights:
+                    reason = "flight not found"
+                elif pilot_id not in pilot_status:
+                    reason = "pilot not found"
+                elif pilot_status[pilot_id] != 'Active':
+                    reason = f"pilot is {pilot_status[pilot_id]}"
+                elif key in existing:
+                    reason = "pilot is already assigned to this flight with this role"
+
+                # a cancelled flight can't clash with anything
+                departure, arrival, status = flights.get(flight_id, (None, None, None))
+                has_times = departure is not None and arrival is not None and status != 'Cancelled'
+                if reason is None and has_times:
+                    clash = crew_schedule.find_conflict(pilot_id, departure, arrival)
+                    if clash == flight_id:
+                        reason = "pilot is already assigned to this flight in another role"
+                    elif clash is not None:
+                        reason = f"pilot is already on overlapping flight {clash}"
+
+                if reason:
+                    rejections.append((index, assignment, reason))
+                    continue
+
+                # later rows in the same batch are checked against this one too
+                existing.add(key)
+                accepted.append(key)
+                if has_times:
+                    crew_schedule.add(pilot_id, departure, arrival, flight_id)
+                    schedule_changed = True
+
+            cur.executemany('''
+                INSERT INTO Flight_assignments (flight_id, pilot_id, role, status)
+                VALUES (?, ?, ?, 'Active')
+            ''', accepted)
+            if commit:
+                conn.commit()
+
+        except Exception:
+            if commit:
+                conn.rollback()
+            if schedule_changed:
+                crew_schedule.invalidate()
+            raise
+
+        rejections.sort(key=lambda rejection: rejection[0])
+        return len(accepted), rejections
+
+    def _fill_id_table(self, cur, table, ids):
+        """
+        loads a set of ids into a temp table for joining against
+        """
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY)")
+        cur.execute(f"DELETE FROM {table}")
+        cur.executemany(f"INSERT INTO {table} (id) VALUES (?)", ((row_id,) for row_id in ids))
+
     def view_pilot_schedule(self):
         """
         view schedule for a pilot
@@ -93,30 +232,12 @@ class PilotService:
         try:
             print("\n=== Pilot Schedule ===")
 
-            # show pilots
-            self.cur.execute(
-                "SELECT pilot_id, first_name, last_name FROM Pilots")
-            pilots = self.cur.fetchall()
-            print("\nPilots:")
-            for pilot in pilots:
-                print(f"{pilot[0]}. {pilot[1]} {pilot[2]}")
-
-            pilot_id = int(input("\nEnter pilot ID: "))
+            pilot_id = self.search.pick_pilot()
+            if pilot_id is None:
+                return
 
             # get pilot's flights
-            self.cur.execute('''
-                SELECT f.flight_number, a.airline_name, o.destination_name as origin, d.destination_name as destination,
-                       f.departure_time, f.arrival_time, f.status, fa.role, fa.status as assignment_status
-                FROM Flight_assignments fa
-                JOIN Flights f ON fa.flight_id = f.flight_id
-                JOIN Airlines a ON f.airline_id = a.airline_id
-                JOIN Destinations o ON f.origin_id = o.destination_id
-                JOIN Destinations d ON f.destination_id = d.destination_id
-                WHERE fa.pilot_id = ? AND fa.status = 'Active'
-                ORDER BY f.departure_time
-            ''', (pilot_id,))
-
-            flights = self.cur.fetchall()
+            flights = self.get_pilot_schedule(pilot_id)
 
             if flights:
                 print(
@@ -132,6 +253,17 @@ class PilotService:
         except Exception as e:
             print(f"Error viewing pilot schedule: {e}")
 
+    def get_pilot_schedule(self, pilot_id):
+        """
+        one pilot's active assignments, earliest departure first
+
+        Returns:
+            list of (flight_number, airline, origin, destination, departure,
+            arrival, flight status, role, assignment status)
+        """
+        self.cur.execute(registry.get('pilot_schedule', _pilot_schedule_sql), (pilot_id,))
+        return self.cur.fetchall()
+
     def get_all_pilots(self):
         """
         get list of all pilots
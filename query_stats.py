@@ -0,0 +1,311 @@
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+
+# upper edges (ms) of the latency histogram buckets, anything slower goes
+# in one last overflow bucket
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# statements that have a query plan worth logging
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class QueryStats:
+    """
+    per statement timing for every query run through the pool
+
+    collects call counts, rows returned (or changed, for writes), total and
+    max latency and a latency histogram for each distinct SQL text.
+    statements slower than slow_query_ms are appended to the slow query
+    log together with their parameters and EXPLAIN QUERY PLAN.
+
+    the timing happens in InstrumentedCursor - pass connection_factory()
+    to the pool so every connection hands those out
+    """
+
+    def __init__(self, slow_query_ms=None, slow_query_log=None):
+        """
+        setup stats
+
+        Args:
+            slow_query_ms: statements taking at least this long are logged,
+                None to not log anything
+            slow_query_log: file slow statements are appended to
+        """
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_log = slow_query_log
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._stats = {}
+        self.slow_queries = 0
+
+    def connection_factory(self):
+        """
+        sqlite3.Connection subclass, for sqlite3.connect(factory=...),
+        whose cursors report to this object
+        """
+        stats = self
+
+        class StatsConnection(InstrumentedConnection):
+            query_stats = stats
+
+        return StatsConnection
+
+    def _key(self, sql):
+        """sql with the whitespace collapsed, so reformatted copies group together"""
+        return ' '.join(sql.split())
+
+    def record(self, conn, sql, params, elapsed, rows):
+        """
+        adds one finished statement
+
+        Args:
+            conn: connection it ran on (used to explain slow statements)
+            sql: statement text
+            params: its parameters, None for executemany
+            elapsed: seconds spent in execute and fetching
+            rows: rows fetched, or rows changed for writes
+        """
+        key = self._key(sql)
+        elapsed_ms = elapsed * 1000
+        slot = bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)
+
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = {
+                    'calls': 0,
+                    'rows': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'histogram': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1),
+                }
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['histogram'][slot] += 1
+
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            self._log_slow(conn, key, params, elapsed_ms, rows)
+
+    def _log_slow(self, conn, key, params, elapsed_ms, rows):
+        """
+        appends a slow statement and its query plan to the log
+        """
+        with self._lock:
+            self.slow_queries += 1
+        if not self.slow_query_log:
+            return
+
+        plan = ['(not available)']
+        if params is not None and key.upper().startswith(EXPLAINABLE):
+            try:
+                # plain cursor so explaining isn't timed / logged itself
+                explain = sqlite3.Cursor(conn)
+                explain.execute(f"EXPLAIN QUERY PLAN {key}", params)
+                plan = [row[3] for row in explain.fetchall()]
+                explain.close()
+            except sqlite3.Error as e:
+                plan = [f"(could not explain: {e})"]
+
+        lines = [f"{datetime.now().isoformat(sep=' ', timespec='seconds')}  "
+                 f"{elapsed_ms:.1f} ms  rows={rows}",
+                 f"  sql: {key}"]
+        if params:
+            lines.append(f"  params: {params!r}")
+        lines.extend(f"  plan: {step}" for step in plan)
+
+        try:
+            with self._log_lock, open(self.slow_query_log, 'a') as log:
+                log.write('\n'.join(lines) + '\n\n')
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def get_stats(self):
+        """
+        timing summary per statement
+
+        p50 / p95 are estimated from the histogram - the upper edge of the
+        bucket the percentile falls in (max_ms for the overflow bucket)
+
+        Returns:
+            list of dicts (sql, calls, rows, total_ms, avg_ms, max_ms,
+            p50_ms, p95_ms, histogram), most total time first
+        """
+        with self._lock:
+            entries = [(key, dict(entry, histogram=list(entry['histogram'])))
+                       for key, entry in self._stats.items()]
+
+        results = []
+        for key, entry in entries:
+            calls = entry['calls']
+            entry['sql'] = key
+            entry['avg_ms'] = entry['total_ms'] / calls
+            entry['p50_ms'] = _histogram_percentile(entry['histogram'], calls, 0.50, entry['max_ms'])
+            entry['p95_ms'] = _histogram_percentile(entry['histogram'], calls, 0.95, entry['max_ms'])
+            results.append(entry)
+        results.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return results
+
+    def reset(self):
+        """
+        forgets everything recorded so far
+        """
+        with self._lock:
+            self._stats = {}
+            self.slow_queries = 0
+
+    def report(self, limit=10):
+        """
+        prints the statements that took the most total time
+        """
+        stats = self.get_stats()
+        if not stats:
+            print("No queries recorded")
+            return
+
+        print(f"\n{'Calls':>7} {'Rows':>9} {'Total ms':>10} {'Avg ms':>8} {'p95 ms':>8} {'Max ms':>8}  Statement")
+        print("-" * 100)
+        for entry in stats[:limit]:
+            sql = entry['sql'] if len(entry['sql']) <= 45 else entry['sql'][:42] + '...'
+            print(f"{entry['calls']:>7} {entry['rows']:>9} {entry['total_ms']:>10.1f} "
+                  f"{entry['avg_ms']:>8.2f} {entry['p95_ms']:>8.2f} {entry['max_ms']:>8.2f}  {sql}")
+        if self.slow_query_ms is not None:
+            print(f"\n{self.slow_queries} statements over {self.slow_query_ms} ms"
+                  + (f" (logged to {self.slow_query_log})" if self.slow_query_log else ""))
+
+
+def _histogram_percentile(histogram, calls, fraction, max_ms):
+    """upper edge of the bucket holding the given fraction of calls"""
+    wanted = fraction * calls
+    seen = 0
+    for slot, count in enumerate(histogram):
+        seen += count
+        if seen >= wanted and count:
+            return HISTOGRAM_BOUNDS_MS[slot] if slot < len(HISTOGRAM_BOUNDS_MS) else max_ms
+    return max_ms
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    cursor that times each statement from execute until its last row
+
+    sqlite does most of the work of a SELECT while rows are being stepped
+    through, so the time spent in fetchone / fetchmany / fetchall /
+    iteration is added to the statement too. a statement is recorded once
+    it's used up - all rows fetched, the cursor re-executed or closed.
+    writes (no result columns) are recorded straight after execute with
+    rowcount as their rows
+    """
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._pending = None
+
+    def _finish(self):
+        """records the statement in progress, if any"""
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, params, elapsed, rows = pending
+            self.connection.query_stats.record(self.connection, sql, params, elapsed, rows)
+
+    def _start(self, sql, params, elapsed):
+        """tracks a just executed statement"""
+        if self.description is None:
+            self._pending = [sql, params, elapsed, max(self.rowcount, 0)]
+            self._finish()
+        else:
+            self._pending = [sql, params, elapsed, 0]
+
+    def _fetched(self, elapsed, rows, done):
+        """adds fetch time and rows to the statement in progress"""
+        pending = self._pending
+        if pending is not None:
+            pending[2] += elapsed
+            pending[3] += rows
+            if done:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._start(sql, parameters, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._start(sql, None, time.perf_counter() - started)
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        return super().executescript(sql_script)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(time.perf_counter() - started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - started, 0, True)
+            raise
+        self._fetched(time.perf_counter() - started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # conn.execute(...) cursors are often dropped with a row or two unread
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    connection whose cursors are InstrumentedCursors
+
+    query_stats is filled in by QueryStats.connection_factory(). the
+    conn.execute shortcuts are routed through cursor() too, the C versions
+    would bypass it
+    """
+
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
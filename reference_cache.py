@@ -0,0 +1,187 @@
+import threading
+from array import array
+
+
+# columns cached per table. first column is the id
+REFERENCE_TABLES = {
+    'airlines': ('Airlines', ['airline_id', 'airline_name', 'airline_code']),
+    'destinations': ('Destinations', ['destination_id', 'destination_name', 'airport_code', 'country']),
+    'pilots': ('Pilots', ['pilot_id', 'first_name', 'last_name', 'experience_years', 'status']),
+}
+
+
+class ReferenceTable:
+    """
+    one cached reference table
+
+    ids is a compact array of the ids present, in id order. every other
+    column is a list indexed directly by id (None where there's no row),
+    so looking up a name is a single list index
+    """
+
+    def __init__(self, rows, column_names):
+        """
+        build table from (id, col, col, ...) rows
+        """
+        self.column_names = column_names[1:]
+        self.ids = array('l', sorted(row[0] for row in rows))
+        size = (self.ids[-1] + 1) if self.ids else 0
+        self.columns = {name: [None] * size for name in self.column_names}
+        for row in rows:
+            for name, value in zip(self.column_names, row[1:]):
+                self.columns[name][row[0]] = value
+        # ids looked up but not found since this table was loaded
+        self.missing = set()
+        # Data_version of the table when it was read, set by ReferenceCache.load
+        self.version = None
+
+    def get(self, row_id, column):
+        """
+        value of one column for an id, None if the id isn't cached
+        """
+        values = self.columns[column]
+        if row_id is None or not 0 <= row_id < len(values):
+            return None
+        return values[row_id]
+
+    def id_map(self, column):
+        """
+        {value: id} for one column, e.g. airport code -> destination_id
+        """
+        values = self.columns[column]
+        return {values[row_id]: row_id for row_id in self.ids}
+
+    def rows(self, *columns):
+        """
+        (id, col, ...) tuples for every cached row in id order
+        """
+        lists = [self.columns[name] for name in columns]
+        return [(row_id,) + tuple(values[row_id] for values in lists) for row_id in self.ids]
+
+
+class ReferenceCache:
+    """
+    in-memory cache of the Airlines, Destinations and Pilots tables
+
+    loaded once at startup and used for pick lists and for turning ids
+    into names without joining. write paths call invalidate() for the
+    table they changed and it gets reloaded on next use. an id that isn't
+    cached (e.g. added by another process) triggers one reload too - ids
+    still missing after it (dangling references) are remembered, so they
+    don't reload the table again until it's next loaded for another reason.
+    every table remembers the Data_version it was loaded at, and refresh()
+    drops the ones another process has changed since
+    """
+
+    def __init__(self, db_manager):
+        """
+        setup cache - nothing is loaded until load() or first use
+        """
+        self.db_manager = db_manager
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def load(self, name=None):
+        """
+        (re)loads one table, or all of them if name is None
+
+        Returns:
+            the ReferenceTable built for name (the last one built if None),
+            even if invalidate() has dropped it again since
+        """
+        names = [name] if name else list(REFERENCE_TABLES)
+        conn, cur = self.db_manager.get_connection()
+        for table_name in names:
+            table, columns = REFERENCE_TABLES[table_name]
+            # version first - a write landing before the SELECT only makes
+            # the next refresh() reload once more
+            cur.execute("SELECT version FROM Data_version WHERE table_name = ?", (table,))
+            version = cur.fetchone()
+            cur.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            loaded = ReferenceTable(cur.fetchall(), columns)
+            loaded.version = version[0] if version else None
+            with self._lock:
+                self._tables[table_name] = loaded
+                self.loads += 1
+        return loaded
+
+    def invalidate(self, name=None):
+        """
+        drops one cached table (or all) so the next use reloads it
+        """
+        with self._lock:
+            if name:
+                self._tables.pop(name, None)
+            else:
+                self._tables.clear()
+
+    def refresh(self, versions):
+        """
+        drops cached tables whose Data_version has moved on since they
+        were loaded, so the next use reloads them
+
+        Args:
+            versions: {table name: version}, e.g. as read from Data_version
+        """
+        with self._lock:
+            for name, (table, _) in REFERENCE_TABLES.items():
+                loaded = self._tables.get(name)
+                if loaded is not None and table in versions and loaded.version != versions[table]:
+                    del self._tables[name]
+
+    def table(self, name):
+        """
+        returns the cached ReferenceTable, loading it if needed
+        """
+        loaded = self._tables.get(name)
+        if loaded is None:
+            loaded = self.load(name)
+        return loaded
+
+    def _lookup(self, name, row_id, column):
+        """
+        single value lookup, reloading the table once on a miss. an id
+        still missing after the reload is noted on the table so it
+        doesn't trigger another one
+        """
+        loaded = self.table(name)
+        value = loaded.get(row_id, column)
+        if value is None and row_id is not None and row_id not in loaded.missing:
+            loaded = self.load(name)
+            value = loaded.get(row_id, column)
+            if value is None:
+                loaded.missing.add(row_id)
+        return value
+
+    def airline_name(self, airline_id):
+        """airline name for an id"""
+        return self._lookup('airlines', airline_id, 'airline_name')
+
+    def destination_name(self, destination_id):
+        """destination name for an id"""
+        return self._lookup('destinations', destination_id, 'destination_name')
+
+    def pilot_name(self, pilot_id):
+        """'First Last' for a pilot id, None if there's no such pilot"""
+        first_name = self._lookup('pilots', pilot_id, 'first_name')
+        if first_name is None:
+            return None
+        return f"{first_name} {self.table('pilots').get(pilot_id, 'last_name')}"
+
+    def list_airlines(self):
+        """(airline_id, airline_name, airline_code) for every airline"""
+        return self.table('airlines').rows('airline_name', 'airline_code')
+
+    def list_destinations(self):
+        """(destination_id, destination_name, airport_code) for every destination"""
+        return self.table('destinations').rows('destination_name', 'airport_code')
+
+    def list_pilots(self, active_only=False):
+        """
+        (pilot_id, first_name, last_name, experience_years) for every pilot,
+        or only the Active ones
+        """
+        pilots = self.table('pilots')
+        rows = pilots.rows('first_name', 'last_name', 'experience_years', 'status')
+        return [row[:4] for row in rows if not active_only or row[4] == 'Active']
@@ -1,17 +1,41 @@
-class ReportService:
+import heapq
+from operator import itemgetter
+
+from base_service import BaseService
+from flight_query import FILTER_SQL, FlightQuery
+from statements import registry
+
+
+def _route_counts_sql(names):
+    """
+    flight count per (origin_id, destination_id) for the given
+    FlightQuery filter names
+    """
+    conditions = " AND ".join(FILTER_SQL[name] for name in names)
+    return f'''
+        SELECT f.origin_id, f.destination_id, COUNT(*)
+        FROM Flights f
+        WHERE {conditions}
+        GROUP BY f.origin_id, f.destination_id
+    '''
+
+
+class ReportService(BaseService):
     """
     generates reports and analytics
 
     does various reports like flight stats, pilot workloads,
-    destination traffic etc. basic business intelligence stuff
+    destination traffic etc. basic business intelligence stuff.
+    the counts come from the Report_* summary tables the database
+    triggers keep up to date, so reports don't scan Flights. results are
+    memoized in the result cache until a table they read changes
     """
 
     def __init__(self, db_manager):
         """
         setup report service
         """
-        self.db_manager = db_manager
-        self.conn, self.cur = db_manager.get_connection()
+        super().__init__(db_manager)
 
     def generate_reports(self):
         """
@@ -25,6 +49,8 @@ class ReportService:
             print("2. Flights per pilot")
             print("3. Flight status summary")
             print("4. Busiest routes")
+            print("5. Crew double bookings")
+            print("6. Peak traffic times")
 
             choice = int(input("Choose report: "))
 
@@ -36,26 +62,143 @@ class ReportService:
                 self.flight_status_summary_report()
             elif choice == 4:
                 self.busiest_routes_report()
+            elif choice == 5:
+                self.crew_conflicts_report()
+            elif choice == 6:
+                self.peak_traffic_report()
 
         except Exception as e:
             print(f"Error generating reports: {e}")
 
+    def _cached(self, key, tables, compute):
+        """
+        result of compute, reused while none of tables has changed
+        """
+        return self.db_manager.result_cache.get(self.cur, key, tables, compute)
+
+    def get_flights_per_destination(self):
+        """
+        flight count for every destination, highest first
+
+        reads the Report_destination_counts summary, LEFT JOINed so
+        destinations with zero flights still show up
+
+        Returns:
+            list of (destination_name, flight_count)
+        """
+        return self._cached(('flights_per_destination',), ('Destinations', 'Flights'),
+                            self._flights_per_destination)
+
+    def _flights_per_destination(self):
+        """get_flights_per_destination without the cache"""
+        self.cur.execute('''
+            SELECT d.destination_name, COALESCE(r.flight_count, 0) as flight_count
+            FROM Destinations d
+            LEFT JOIN Report_destination_counts r ON d.destination_id = r.destination_id
+            ORDER BY flight_count DESC
+        ''')
+        return self.cur.fetchall()
+
+    def get_flights_per_pilot(self):
+        """
+        active assignment count for every pilot, highest first
+
+        Returns:
+            list of (pilot_name, flight_count)
+        """
+        return self._cached(('flights_per_pilot',), ('Pilots', 'Flight_assignments'),
+                            self._flights_per_pilot)
+
+    def _flights_per_pilot(self):
+        """get_flights_per_pilot without the cache"""
+        self.cur.execute('''
+            SELECT p.first_name || ' ' || p.last_name as pilot_name,
+                   COALESCE(r.flight_count, 0) as flight_count
+            FROM Pilots p
+            LEFT JOIN Report_pilot_counts r ON p.pilot_id = r.pilot_id
+            ORDER BY flight_count DESC
+        ''')
+        return self.cur.fetchall()
+
+    def get_flight_status_summary(self):
+        """
+        flight count per status, highest first
+
+        Returns:
+            list of (status, count)
+        """
+        return self._cached(('flight_status_summary',), ('Flights',), self._flight_status_summary)
+
+    def _flight_status_summary(self):
+        """get_flight_status_summary without the cache"""
+        self.cur.execute('''
+            SELECT status, flight_count
+            FROM Report_status_counts
+            WHERE flight_count > 0
+            ORDER BY flight_count DESC
+        ''')
+        return self.cur.fetchall()
+
+    def get_busiest_routes(self, limit=10, start_date=None, end_date=None, airline_id=None):
+        """
+        most flown origin -> destination pairs
+
+        routes are grouped on the (origin_id, destination_id) ids and only
+        the top `limit` get their names looked up. with no filters the
+        counts come straight from Report_route_counts. with a time window
+        or airline the matching flights are grouped in sqlite and the
+        grouped rows are streamed through a heap, so only `limit` routes
+        are ever held in memory
+
+        Args:
+            limit: number of routes to return
+            start_date / end_date: optional YYYY-MM-DD departure window, inclusive
+            airline_id: optional airline to count flights for
+
+        Returns:
+            list of (origin_id, destination_id, route, flight_count)
+            with route as 'Origin → Destination', busiest first
+        """
+        return self._cached(('busiest_routes', limit, start_date, end_date, airline_id),
+                            ('Flights', 'Destinations'),
+                            lambda: self._busiest_routes(limit, start_date, end_date, airline_id))
+
+    def _busiest_routes(self, limit, start_date, end_date, airline_id):
+        """get_busiest_routes without the cache"""
+        query = FlightQuery(airline=airline_id, start_date=start_date, end_date=end_date)
+
+        if not query.filters:
+            self.cur.execute('''
+                SELECT origin_id, destination_id, flight_count
+                FROM Report_route_counts
+                WHERE flight_count > 0
+                ORDER BY flight_count DESC
+                LIMIT ?
+            ''', (limit,))
+            top = self.cur.fetchall()
+        else:
+            names = tuple(name for name in FILTER_SQL if name in query.filters)
+            params = [value for name in names for value in query.filters[name]]
+            sql = registry.get(('busiest_routes', names), lambda: _route_counts_sql(names))
+            self.cur.execute(sql, params)
+            top = heapq.nlargest(limit, self.cur, key=itemgetter(2))
+
+        cache = self.db_manager.reference_cache
+        return [(origin_id, destination_id,
+                 f"{cache.destination_name(origin_id) or 'Unknown'} → "
+                 f"{cache.destination_name(destination_id) or 'Unknown'}",
+                 count)
+                for origin_id, destination_id, count in top]
+
     def flights_per_destination_report(self):
         """
         shows how many flights go to each destination
 
-        uses LEFT JOIN to include destinations with zero flights.
+        includes destinations with zero flights.
         sorted by flight count highest first
         """
         try:
-            self.cur.execute('''
-                SELECT d.destination_name, COUNT(f.flight_id) as flight_count
-                FROM Destinations d
-                LEFT JOIN Flights f ON d.destination_id = f.destination_id
-                GROUP BY d.destination_id, d.destination_name
-                ORDER BY flight_count DESC
-            ''')
-            results = self.cur.fetchall()
+            results = self.get_flights_per_destination()
 
             print(f"\n{'Destination':<25} {'Flight Count':<12}")
             print("-" * 40)
@@ -73,14 +216,7 @@ class ReportService:
         includes pilots with zero assignments
         """
         try:
-            self.cur.execute('''
-                SELECT p.first_name || ' ' || p.last_name as pilot_name, COUNT(fa.flight_id) as flight_count
-                FROM Pilots p
-                LEFT JOIN Flight_assignments fa ON p.pilot_id = fa.pilot_id AND fa.status = 'Active'
-                GROUP BY p.pilot_id, pilot_name
-                ORDER BY flight_count DESC
-            ''')
-            results = self.cur.fetchall()
+            results = self.get_flights_per_pilot()
 
             print(f"\n{'Pilot':<25} {'Flight Count':<12}")
             print("-" * 40)
@@ -97,13 +233,7 @@ class ReportService:
         shows count of flights in each status (scheduled, delayed etc)
         """
         try:
-            self.cur.execute('''
-                SELECT status, COUNT(*) as count
-                FROM Flights
-                GROUP BY status
-                ORDER BY count DESC
-            ''')
-            results = self.cur.fetchall()
+            results = self.get_flight_status_summary()
 
             print(f"\n{'Status':<15} {'Count':<8}")
             print("-" * 25)
@@ -118,24 +248,96 @@ class ReportService:
         busiest routes analysis
 
         finds most popular routes by counting flight frequency.
-        shows top 10 routes only
+        asks how many routes to show (10 by default) and optionally
+        for a date window and an airline
         """
         try:
-            self.cur.execute('''
-                SELECT o.destination_name || ' → ' || d.destination_name as route, COUNT(*) as count
-                FROM Flights f
-                JOIN Destinations o ON f.origin_id = o.destination_id
-                JOIN Destinations d ON f.destination_id = d.destination_id
-                GROUP BY route
-                ORDER BY count DESC
-                LIMIT 10
-            ''')
-            results = self.cur.fetchall()
+            limit = input("Number of routes (default 10): ").strip()
+            start_date = input("Start date (YYYY-MM-DD, blank for all): ").strip() or None
+            end_date = input("End date (YYYY-MM-DD, blank for same as start): ").strip() or None
+
+            print("\nAirlines:")
+            for airline in self.db_manager.reference_cache.list_airlines():
+                print(f"{airline[0]}. {airline[1]} ({airline[2]})")
+            airline_id = input("Airline ID (blank for all): ").strip()
+
+            results = self.get_busiest_routes(
+                int(limit) if limit else 10, start_date, end_date,
+                int(airline_id) if airline_id else None)
 
             print(f"\n{'Route':<40} {'Flight Count':<12}")
             print("-" * 55)
             for row in results:
-                print(f"{row[0]:<40} {row[1]:<12}")
+                print(f"{row[2]:<40} {row[3]:<12}")
 
         except Exception as e:
             print(f"Error generating routes report: {e}")
+
+    def peak_traffic_report(self):
+        """
+        peak traffic times
+
+        buckets departures or arrivals per airport or airline into hours,
+        days, weeks, hours of the day or days of the week and shows each
+        one's busiest bucket, busiest airports / airlines first
+        """
+        try:
+            direction = input("Departures or arrivals (d/a, default d): ").strip().lower()
+            direction = 'arrivals' if direction.startswith('a') else 'departures'
+            group = input("Group by airport or airline (p/l, default p): ").strip().lower()
+            group = 'airline' if group.startswith('l') else 'airport'
+
+            print("Buckets: hour, day, week, hour_of_day, day_of_week")
+            bucket = input("Bucket (default hour_of_day): ").strip() or 'hour_of_day'
+            start_date = input("Start date (YYYY-MM-DD, blank for all): ").strip() or None
+            end_date = input("End date (YYYY-MM-DD, blank for same as start): ").strip() or None
+
+            analytics = self.db_manager.traffic_analytics
+            matrix = analytics.traffic_matrix(direction, group, bucket, start_date, end_date)
+            peaks = analytics.peak_buckets(matrix)
+
+            cache = self.db_manager.reference_cache
+            name = cache.destination_name if group == 'airport' else cache.airline_name
+
+            print(f"\n{group.title():<30} {'Peak ' + bucket:<20} {'Flights':<8} {'Total':<8}")
+            print("-" * 70)
+            for row_id, label, count, total in peaks:
+                print(f"{name(row_id) or 'Unknown':<30} {label:<20} {count:<8} {total:<8}")
+
+        except ValueError as e:
+            print(f"Invalid input: {e}")
+        except Exception as e:
+            print(f"Error generating traffic report: {e}")
+
+    def crew_conflicts_report(self):
+        """
+        double booking audit
+
+        lists every pair of overlapping flights the same pilot is
+        actively assigned to
+        """
+        try:
+            conflicts = self.db_manager.crew_schedule.find_all_conflicts()
+
+            if not conflicts:
+                print("No pilots are double booked.")
+                return
+
+            names = self.db_manager.reference_cache
+            numbers = {}
+
+            def flight_number(flight_id):
+                if flight_id not in numbers:
+                    self.cur.execute(
+                        "SELECT flight_number FROM Flights WHERE flight_id = ?", (flight_id,))
+                    numbers[flight_id] = self.cur.fetchone()[0]
+                return numbers[flight_id]
+
+            print(f"\n{'Pilot':<25} {'Flight':<10} {'Overlaps flight':<15}")
+            print("-" * 55)
+            for pilot_id, first_flight, second_flight in conflicts:
+                print(f"{names.pilot_name(pilot_id) or 'Unknown':<25} {flight_number(first_flight):<10} {flight_number(second_flight):<15}")
+            print(f"\n{len(conflicts)} double bookings found")
+
+        except Exception as e:
+            print(f"Error generating crew conflicts report: {e}")
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300
+
+
+class ResultCache:
+    """
+    memoizes read results until the tables they read change
+
+    every entry remembers the Data_version counters of the tables its
+    result came from. a lookup reads the current counters (one small
+    primary key table) and only reuses the entry if they all still match,
+    so a write anywhere - this process or another one, any service, a
+    batch or an import - makes the next lookup recompute. no write path
+    has to remember to invalidate anything, the triggers bump the counters.
+
+    PRAGMA data_version can't do this here: it only counts commits from
+    other connections, and every pooled connection keeps its own count.
+
+    results hold airline / airport / pilot names from the ReferenceCache,
+    so with one given every lookup first drops the cached reference
+    tables that changed - a result is never built from stale names.
+
+    results read inside an open transaction aren't stored: its writes
+    have bumped the counters but may still roll back, and the same numbers
+    then get reused by a different commit. the exception is a read_only
+    database, where a transaction is only ever a consistent read.
+
+    entries also expire ttl seconds after they were stored, and the least
+    recently used go once there are more than max_entries. cached values
+    are shared, so callers get a shallow copy of lists and must not change
+    the items in them
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, read_only=False,
+                 reference_cache=None):
+        """
+        setup cache
+
+        Args:
+            max_entries: results kept at most, 0 turns the cache off
+            ttl: seconds a result may be reused for, None for no limit
+            read_only: the connections can't write, so results read in a
+                transaction can be kept too
+            reference_cache: ReferenceCache the results take names from,
+                refreshed from the same counters on every lookup
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.read_only = read_only
+        self.reference_cache = reference_cache
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, cur, key, tables, compute):
+        """
+        cached result for key, computing it on a miss
+
+        the counters are read before compute runs, so a write landing in
+        between can only leave a newer result under the older counters -
+        never an old result under the new ones
+
+        Args:
+            cur: cursor of the connection compute will read from
+            key: hashable, everything the result depends on apart from the data
+            tables: tables the result is read from
+            compute: function returning the result, only called on a miss
+
+        Returns:
+            the result (lists come back as a copy)
+        """
+        if not self.max_entries:
+            return compute()
+
+        cur.execute("SELECT table_name, version FROM Data_version")
+        all_versions = dict(cur.fetchall())
+        if self.reference_cache is not None:
+            self.reference_cache.refresh(all_versions)
+        versions = tuple(all_versions.get(table) for table in tables)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_versions, stored_at, value = entry
+                if entry_versions != versions:
+                    self.stale += 1
+                elif self.ttl is not None and now - stored_at > self.ttl:
+                    self.expired += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy(value)
+            self.misses += 1
+
+        value = compute()
+        if cur.connection.in_transaction and not self.read_only:
+            return value
+
+        with self._lock:
+            self._entries[key] = (versions, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return _copy(value)
+
+    def get_stats(self):
+        """
+        hit/miss counters for the cache
+
+        Returns:
+            dict with hits, misses (of which stale = data changed and
+            expired = past the ttl), evictions, hit_rate and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+            }
+
+    def clear(self):
+        """
+        drops all results and resets the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stale = self.expired = self.evictions = 0
+
+
+def _copy(value):
+    """shallow copy of list results so callers can sort / append freely"""
+    return list(value) if isinstance(value, list) else value
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Flight Schedule Import for Flight Management System
+
+Loads an airline's schedule file into Flights. Rows are matched on
+flight_number: new flights are inserted, existing ones updated.
+
+Input is CSV (with a header row) or JSON lines, one flight per row:
+    flight_number, airline_code, origin_code, destination_code,
+    departure_time, arrival_time, aircraft_type, capacity, status (optional)
+
+Codes are airline codes (BA) and IATA airport codes (LHR). Times are
+YYYY-MM-DD HH:MM[:SS]. Rows that fail validation are written to a
+rejects file with the reason, the rest are loaded.
+
+Usage:
+    python schedule_import.py INPUT [--db PATH] [--format csv|jsonl]
+                              [--chunk-size N] [--rejects FILE] [--profile NAME]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from database import PERFORMANCE_PROFILES, DatabaseManager
+from models import AIRCRAFT_CAPACITY
+from schema import FLIGHT_STATUSES
+
+
+IMPORT_COLUMNS = ['flight_number', 'airline_code', 'origin_code', 'destination_code',
+                  'departure_time', 'arrival_time', 'aircraft_type', 'capacity', 'status']
+REQUIRED_COLUMNS = IMPORT_COLUMNS[:-1]
+
+TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M')
+
+# upper limit for aircraft types not in AIRCRAFT_CAPACITY (A380 all economy)
+MAX_CAPACITY = 853
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+# validated rows of the chunk being loaded. keyed on flight_number so a
+# flight repeated inside one chunk keeps its last row
+STAGING_SQL = '''
+    CREATE TEMP TABLE IF NOT EXISTS import_staging (
+        flight_number TEXT PRIMARY KEY,
+        airline_id INTEGER NOT NULL,
+        origin_id INTEGER NOT NULL,
+        destination_id INTEGER NOT NULL,
+        departure_time TEXT NOT NULL,
+        arrival_time TEXT NOT NULL,
+        status TEXT,
+        aircraft_type TEXT NOT NULL,
+        capacity INTEGER NOT NULL
+    )
+'''
+
+# existing flights first, and only the ones that actually change - a
+# re-sent schedule doesn't churn the report triggers. a missing status
+# keeps the flight's current one
+UPDATE_FROM_STAGING_SQL = '''
+    UPDATE Flights
+    SET (airline_id, origin_id, destination_id, departure_time, arrival_time, status, aircraft_type, capacity) =
+        (SELECT s.airline_id, s.origin_id, s.destination_id, s.departure_time, s.arrival_time,
+                COALESCE(s.status, Flights.status), s.aircraft_type, s.capacity
+         FROM import_staging s WHERE s.flight_number = Flights.flight_number)
+    WHERE flight_number IN (
+        SELECT s.flight_number
+        FROM import_staging s JOIN Flights f ON f.flight_number = s.flight_number
+        WHERE (f.airline_id, f.origin_id, f.destination_id, f.departure_time, f.arrival_time,
+               f.status, f.aircraft_type, f.capacity)
+              IS NOT (s.airline_id, s.origin_id, s.destination_id, s.departure_time, s.arrival_time,
+                      COALESCE(s.status, f.status), s.aircraft_type, s.capacity)
+    )
+'''
+
+# then the new ones - OR IGNORE skips the flight numbers that already exist
+INSERT_FROM_STAGING_SQL = '''
+    INSERT OR IGNORE INTO Flights (flight_number, airline_id, origin_id, destination_id, departure_time,
+                                   arrival_time, status, aircraft_type, capacity)
+    SELECT flight_number, airline_id, origin_id, destination_id, departure_time,
+           arrival_time, COALESCE(status, 'Scheduled'), aircraft_type, capacity
+    FROM import_staging
+'''
+
+
+class ScheduleImporter:
+    """
+    streams a schedule file into Flights
+
+    every row is checked in python first - codes resolved to ids through
+    the reference cache's code -> id maps, origin != destination, arrival
+    after departure, capacity within what the aircraft can seat, known
+    status. good rows are loaded chunk_size at a time: each chunk goes
+    into a temp staging table with one executemany, then two set based
+    statements update / insert Flights from it, all in one transaction.
+    a chunk that fails to load is rolled back and its rows rejected,
+    chunks before it stay committed
+    """
+
+    def __init__(self, db_manager, chunk_size=5000):
+        """
+        setup importer
+
+        Args:
+            db_manager: DatabaseManager to load into
+            chunk_size: rows per staging chunk / transaction
+        """
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+
+        cache = db_manager.reference_cache
+        self.airlines = {str(code).upper(): airline_id
+                         for code, airline_id in cache.table('airlines').id_map('airline_code').items()}
+        self.airports = {str(code).upper(): destination_id
+                         for code, destination_id in cache.table('destinations').id_map('airport_code').items()}
+
+    def import_file(self, path, file_format=None, rejects_path=None):
+        """
+        imports a schedule file
+
+        Args:
+            path: CSV or JSON lines file
+            file_format: 'csv' or 'jsonl'; taken from the extension if not given
+            rejects_path: where rejected rows go, default INPUT.rejects.csv /
+                .jsonl. only created if something is rejected
+
+        Returns:
+            dict with rows / inserted / updated / unchanged / duplicates /
+            rejected / chunks counts, elapsed seconds, rows_per_s and
+            rejects_path (None when nothing was rejected)
+        """
+        file_format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if file_format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unknown schedule format for {path} - use .csv or .jsonl")
+        if rejects_path is None:
+            rejects_path = f"{path}.rejects.{file_format}"
+
+        stats = dict.fromkeys(['rows', 'inserted', 'updated', 'unchanged', 'duplicates', 'rejected', 'chunks'], 0)
+        started = time.perf_counter()
+        rejects = _RejectsFile(rejects_path, file_format)
+
+        conn, cur = self.db_manager.get_connection()
+        cur.execute(STAGING_SQL)
+        try:
+            with open(path, newline='') as source:
+                chunk = []
+                for line, record in _read_records(source, file_format, rejects):
+                    stats['rows'] += 1
+                    if record is None:
+                        stats['rejected'] += 1
+                        continue
+                    row, reason = self._validate(record)
+                    if reason:
+                        rejects.write(line, record, reason)
+                        stats['rejected'] += 1
+                        continue
+                    chunk.append((line, record, row))
+                    if len(chunk) >= self.chunk_size:
+                        self._load(conn, cur, chunk, stats, rejects)
+                        chunk = []
+                if chunk:
+                    self._load(conn, cur, chunk, stats, rejects)
+        finally:
+            rejects.close()
+            if stats['inserted'] or stats['updated']:
+                # crew intervals and traffic buckets use flight times
+                self.db_manager.crew_schedule.invalidate()
+                self.db_manager.traffic_analytics.invalidate()
+
+        stats['elapsed'] = time.perf_counter() - started
+        stats['rows_per_s'] = stats['rows'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        stats['rejects_path'] = rejects.path if rejects.count else None
+        return stats
+
+    def _validate(self, record):
+        """
+        checks one record and turns it into a staging row
+
+        Returns:
+            (row, None) if it's good, (None, reason) if not
+        """
+        # strip first, so whitespace-only fields count as missing and
+        # ' Delayed' is still a known status
+        record = {name: value.strip() if isinstance(value, str) else value for name, value in record.items()}
+        missing = [name for name in REQUIRED_COLUMNS if record.get(name) in (None, '')]
+        if missing:
+            return None, f"missing {', '.join(missing)}"
+
+        airline_code = str(record['airline_code']).upper()
+        airline_id = self.airlines.get(airline_code)
+        if airline_id is None:
+            return None, f"unknown airline code {airline_code}"
+
+        origin_code = str(record['origin_code']).upper()
+        destination_code = str(record['destination_code']).upper()
+        origin_id = self.airports.get(origin_code)
+        destination_id = self.airports.get(destination_code)
+        if origin_id is None:
+            return None, f"unknown airport code {origin_code}"
+        if destination_id is None:
+            return None, f"unknown airport code {destination_code}"
+        if origin_id == destination_id:
+            return None, "origin and destination are the same"
+
+        departure = _parse_time(record['departure_time'])
+        arrival = _parse_time(record['arrival_time'])
+        if departure is None:
+            return None, f"bad departure_time {record['departure_time']!r}"
+        if arrival is None:
+            return None, f"bad arrival_time {record['arrival_time']!r}"
+        if arrival <= departure:
+            return None, "arrival is not after departure"
+
+        aircraft_type = str(record['aircraft_type'])
+        try:
+            capacity = int(record['capacity'])
+        except (TypeError, ValueError):
+            return None, f"capacity {record['capacity']!r} is not a whole number"
+        limit = AIRCRAFT_CAPACITY.get(aircraft_type, MAX_CAPACITY)
+        if not 0 < capacity <= limit:
+            return None, f"capacity {capacity} out of range for {aircraft_type} (1-{limit})"
+
+        status = record.get('status') or None
+        if status is not None and status not in FLIGHT_STATUSES:
+            return None, f"unknown status {status}"
+
+        return (str(record['flight_number']).upper(), airline_id, origin_id, destination_id,
+                departure.strftime('%Y-%m-%d %H:%M:%S'), arrival.strftime('%Y-%m-%d %H:%M:%S'),
+                status, aircraft_type, capacity), None
+
+    def _load(self, conn, cur, chunk, stats, rejects):
+        """
+        loads one chunk of validated rows in a single transaction
+        """
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("DELETE FROM import_staging")
+            cur.executemany("INSERT OR REPLACE INTO import_staging VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [row for _, _, row in chunk])
+            cur.execute("SELECT COUNT(*) FROM import_staging")
+            staged = cur.fetchone()[0]
+
+            cur.execute(UPDATE_FROM_STAGING_SQL)
+            updated = cur.rowcount
+            cur.execute(INSERT_FROM_STAGING_SQL)
+            inserted = cur.rowcount
+            conn.commit()
+
+        except sqlite3.Error as e:
+            conn.rollback()
+            for line, record, _ in chunk:
+                rejects.write(line, record, f"chunk not loaded: {e}")
+            stats['rejected'] += len(chunk)
+            return
+
+        stats['chunks'] += 1
+        stats['inserted'] += inserted
+        stats['updated'] += updated
+        stats['unchanged'] += staged - inserted - updated
+        stats['duplicates'] += len(chunk) - staged
+
+
+def _parse_time(value):
+    """datetime for any of TIME_FORMATS, None if it isn't one"""
+    value = str(value).strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def _read_records(source, file_format, rejects):
+    """
+    yields (line number, record dict) for every row of the file. rows
+    that can't even be parsed are rejected here and yielded as None
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(source)
+        missing = [name for name in REQUIRED_COLUMNS if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}")
+        rejects.fieldnames = reader.fieldnames
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line, text in enumerate(source, 1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            rejects.write(line, text, f"bad JSON: {e}")
+            yield line, None
+            continue
+        if not isinstance(record, dict):
+            rejects.write(line, text, "not a JSON object")
+            yield line, None
+            continue
+        yield line, record
+
+
+class _RejectsFile:
+    """
+    rejected rows with their line number and reason, in the input's
+    format - CSV with the input's columns, or JSON lines. opened on the
+    first rejection
+    """
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self.fieldnames = IMPORT_COLUMNS
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line, record, reason):
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='')
+            if self.file_format == 'csv':
+                self._writer = csv.DictWriter(self._file, ['line', 'reason'] + list(self.fieldnames),
+                                              extrasaction='ignore')
+                self._writer.writeheader()
+
+        if self.file_format == 'csv':
+            self._writer.writerow(dict(record, line=line, reason=reason))
+        else:
+            self._file.write(json.dumps({'line': line, 'reason': reason, 'record': record}) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def main():
+    """
+    main function with command line interface
+
+    imports INPUT into the given database (FlightManagement.db by
+    default) and prints the counts
+    """
+    parser = argparse.ArgumentParser(
+        description='Flight Management Schedule Import')
+    parser.add_argument('input', help='Schedule file (.csv or .jsonl)')
+    parser.add_argument('--db', default='FlightManagement.db', help='Database file to import into')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the extension)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows loaded per transaction')
+    parser.add_argument('--rejects', help='File for rejected rows (default: INPUT.rejects.csv/.jsonl)')
+    parser.add_argument('--profile', default='balanced', choices=list(PERFORMANCE_PROFILES),
+                        help='SQLite settings to load with')
+
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(args.db, profile=args.profile)
+    try:
+        importer = ScheduleImporter(db_manager, args.chunk_size)
+        stats = importer.import_file(args.input, args.format, args.rejects)
+        print(f"Read {stats['rows']} rows in {stats['elapsed']:.1f}s ({stats['rows_per_s']:.0f} rows/s, "
+              f"{stats['chunks']} chunks)")
+        print(f"- {stats['inserted']} flights added")
+        print(f"- {stats['updated']} flights updated")
+        print(f"- {stats['unchanged']} flights unchanged")
+        if stats['duplicates']:
+            print(f"- {stats['duplicates']} rows superseded by a later row for the same flight")
+        print(f"- {stats['rejected']} rows rejected"
+              + (f" (see {stats['rejects_path']})" if stats['rejects_path'] else ""))
+    except (OSError, ValueError) as e:
+        print(f"Error importing schedule: {e}")
+    finally:
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+# the one definition of the database layout, shared by DatabaseManager and
+# seed_database.py. the layout is built by numbered migrations, each one
+# recorded in the schema_version table once applied. migrations must stay
+# idempotent (IF NOT EXISTS, column checks) so databases made before the
+# schema_version table existed can run them all safely.
+#
+# to change the schema add a new migration at the end of MIGRATIONS -
+# never edit one that has already shipped
+
+import sqlite3
+
+
+# values the CHECK constraint on Flights.status allows
+FLIGHT_STATUSES = ('Scheduled', 'Delayed', 'Cancelled', 'Completed', 'In-Flight')
+
+# core tables, in foreign key order
+TABLES = [
+    ('Airlines', '''
+        CREATE TABLE IF NOT EXISTS Airlines (
+            airline_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            airline_name TEXT NOT NULL UNIQUE,
+            airline_code TEXT NOT NULL UNIQUE,
+            country TEXT NOT NULL,
+            headquarters TEXT,
+            fleet_size INTEGER DEFAULT 0,
+            established_year INTEGER,
+            created_date DATE DEFAULT CURRENT_DATE
+        )
+    '''),
+    ('Destinations', '''
+        CREATE TABLE IF NOT EXISTS Destinations (
+            destination_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            destination_name TEXT NOT NULL UNIQUE,
+            country TEXT NOT NULL,
+            airport_code TEXT NOT NULL UNIQUE,
+            timezone TEXT NOT NULL,
+            created_date DATE DEFAULT CURRENT_DATE
+        )
+    '''),
+    ('Pilots', '''
+        CREATE TABLE IF NOT EXISTS Pilots (
+            pilot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            license_number TEXT NOT NULL UNIQUE,
+            experience_years INTEGER NOT NULL,
+            hire_date DATE NOT NULL,
+            airline_id INTEGER,
+            status TEXT DEFAULT 'Active' CHECK(status IN ('Active', 'Inactive', 'On Leave')),
+            FOREIGN KEY (airline_id) REFERENCES Airlines (airline_id)
+        )
+    '''),
+    ('Flights', '''
+        CREATE TABLE IF NOT EXISTS Flights (
+            flight_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            flight_number TEXT NOT NULL UNIQUE,
+            airline_id INTEGER NOT NULL,
+            origin_id INTEGER NOT NULL,
+            destination_id INTEGER NOT NULL,
+            departure_time DATETIME NOT NULL,
+            arrival_time DATETIME NOT NULL,
+            status TEXT DEFAULT 'Scheduled' CHECK(status IN ('Scheduled', 'Delayed', 'Cancelled', 'Completed', 'In-Flight')),
+            aircraft_type TEXT NOT NULL,
+            capacity INTEGER NOT NULL,
+            created_date DATE DEFAULT CURRENT_DATE,
+            FOREIGN KEY (airline_id) REFERENCES Airlines (airline_id),
+            FOREIGN KEY (origin_id) REFERENCES Destinations (destination_id),
+            FOREIGN KEY (destination_id) REFERENCES Destinations (destination_id)
+        )
+    '''),
+    ('Flight_assignments', '''
+        CREATE TABLE IF NOT EXISTS Flight_assignments (
+            assignment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            flight_id INTEGER NOT NULL,
+            pilot_id INTEGER NOT NULL,
+            assignment_date DATE DEFAULT CURRENT_DATE,
+            role TEXT DEFAULT 'Captain' CHECK(role IN ('Captain', 'First Officer', 'Relief Pilot')),
+            status TEXT DEFAULT 'Active' CHECK(status IN ('Active', 'Cancelled', 'Completed')),
+            notes TEXT,
+            FOREIGN KEY (flight_id) REFERENCES Flights (flight_id),
+            FOREIGN KEY (pilot_id) REFERENCES Pilots (pilot_id),
+            UNIQUE(flight_id, pilot_id, role)
+        )
+    '''),
+]
+
+# integer unix-epoch copies of the flight times, filled on insert (unless
+# the insert supplies them) and whenever the times change
+EPOCH_TRIGGERS = {
+    'trg_flights_epoch_insert': '''
+        AFTER INSERT ON Flights
+        WHEN NEW.departure_epoch IS NULL OR NEW.arrival_epoch IS NULL
+        BEGIN
+            UPDATE Flights
+            SET departure_epoch = CAST(strftime('%s', NEW.departure_time) AS INTEGER),
+                arrival_epoch = CAST(strftime('%s', NEW.arrival_time) AS INTEGER)
+            WHERE flight_id = NEW.flight_id;
+        END
+    ''',
+    'trg_flights_epoch_update': '''
+        AFTER UPDATE OF departure_time, arrival_time ON Flights
+        BEGIN
+            UPDATE Flights
+            SET departure_epoch = CAST(strftime('%s', NEW.departure_time) AS INTEGER),
+                arrival_epoch = CAST(strftime('%s', NEW.arrival_time) AS INTEGER)
+            WHERE flight_id = NEW.flight_id;
+        END
+    ''',
+}
+
+# summary tables behind the reports, kept current by the triggers below so
+# a report reads one row per group instead of aggregating every flight
+REPORT_AGGREGATE_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS Report_destination_counts (
+        destination_id INTEGER PRIMARY KEY,
+        flight_count INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS Report_pilot_counts (
+        pilot_id INTEGER PRIMARY KEY,
+        flight_count INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS Report_status_counts (
+        status TEXT PRIMARY KEY,
+        flight_count INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS Report_route_counts (
+        origin_id INTEGER NOT NULL,
+        destination_id INTEGER NOT NULL,
+        flight_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (origin_id, destination_id)
+    ) WITHOUT ROWID''',
+]
+
+
+def _count_change(table, key_columns, key_values, delta):
+    """
+    trigger body lines that add delta to one summary row, creating it first.
+    INSERT OR IGNORE + UPDATE instead of upsert so older sqlite works too
+    """
+    columns = ', '.join(key_columns)
+    values = ', '.join(key_values)
+    match = ' AND '.join(f"{column} = {value}" for column, value in zip(key_columns, key_values))
+    return (f"INSERT OR IGNORE INTO {table} ({columns}, flight_count) VALUES ({values}, 0);\n"
+            f"UPDATE {table} SET flight_count = flight_count {delta} WHERE {match};\n")
+
+
+def _flight_counts(row, delta):
+    """count changes for one Flights row (NEW or OLD)"""
+    return (_count_change('Report_destination_counts', ['destination_id'], [f'{row}.destination_id'], delta)
+            + _count_change('Report_status_counts', ['status'], [f'{row}.status'], delta)
+            + _count_change('Report_route_counts', ['origin_id', 'destination_id'],
+                            [f'{row}.origin_id', f'{row}.destination_id'], delta))
+
+
+REPORT_AGGREGATE_TRIGGERS = {
+    'trg_report_flight_insert':
+        "AFTER INSERT ON Flights BEGIN\n" + _flight_counts('NEW', '+ 1') + "END",
+    'trg_report_flight_delete':
+        "AFTER DELETE ON Flights BEGIN\n" + _flight_counts('OLD', '- 1') + "END",
+    'trg_report_flight_update':
+        ("AFTER UPDATE OF origin_id, destination_id, status ON Flights BEGIN\n"
+         + _flight_counts('OLD', '- 1') + _flight_counts('NEW', '+ 1') + "END"),
+    'trg_report_assignment_insert':
+        ("AFTER INSERT ON Flight_assignments WHEN NEW.status = 'Active' BEGIN\n"
+         + _count_change('Report_pilot_counts', ['pilot_id'], ['NEW.pilot_id'], '+ 1') + "END"),
+    'trg_report_assignment_delete':
+        ("AFTER DELETE ON Flight_assignments WHEN OLD.status = 'Active' BEGIN\n"
+         + _count_change('Report_pilot_counts', ['pilot_id'], ['OLD.pilot_id'], '- 1') + "END"),
+    'trg_report_assignment_update_old':
+        ("AFTER UPDATE OF pilot_id, status ON Flight_assignments WHEN OLD.status = 'Active' BEGIN\n"
+         + _count_change('Report_pilot_counts', ['pilot_id'], ['OLD.pilot_id'], '- 1') + "END"),
+    'trg_report_assignment_update_new':
+        ("AFTER UPDATE OF pilot_id, status ON Flight_assignments WHEN NEW.status = 'Active' BEGIN\n"
+         + _count_change('Report_pilot_counts', ['pilot_id'], ['NEW.pilot_id'], '+ 1') + "END"),
+}
+
+# full recompute of every summary table, used to backfill and for recovery
+REPORT_AGGREGATE_REBUILD = [
+    "DELETE FROM Report_destination_counts",
+    '''INSERT INTO Report_destination_counts (destination_id, flight_count)
+       SELECT destination_id, COUNT(*) FROM Flights GROUP BY destination_id''',
+    "DELETE FROM Report_pilot_counts",
+    '''INSERT INTO Report_pilot_counts (pilot_id, flight_count)
+       SELECT pilot_id, COUNT(*) FROM Flight_assignments WHERE status = 'Active' GROUP BY pilot_id''',
+    "DELETE FROM Report_status_counts",
+    '''INSERT INTO Report_status_counts (status, flight_count)
+       SELECT status, COUNT(*) FROM Flights GROUP BY status''',
+    "DELETE FROM Report_route_counts",
+    '''INSERT INTO Report_route_counts (origin_id, destination_id, flight_count)
+       SELECT origin_id, destination_id, COUNT(*) FROM Flights GROUP BY origin_id, destination_id''',
+]
+
+# tables whose changes are counted in Data_version. every inserted, updated
+# or deleted row adds one to its table's version and sets modified_at, so
+# caches and HTTP ETags can tell whether anything they read has changed
+VERSIONED_TABLES = ['Airlines', 'Destinations', 'Pilots', 'Flights', 'Flight_assignments']
+
+DATA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS Data_version (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        modified_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    ) WITHOUT ROWID
+'''
+
+DATA_VERSION_BUMP = '''
+    UPDATE Data_version
+    SET version = version + 1, modified_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE table_name = '{table}'
+'''
+
+# updates that only touch derived columns (the epoch copies filled right
+# after an insert) aren't a change anyone can see, so Flights only counts
+# updates of its own columns - otherwise every insert bumps it twice
+DATA_VERSION_UPDATE_OF = {
+    'Flights': 'flight_number, airline_id, origin_id, destination_id, departure_time, '
+               'arrival_time, status, aircraft_type, capacity',
+}
+
+# trigger name -> body, one per versioned table and kind of write
+DATA_VERSION_TRIGGERS = {
+    f"trg_version_{table.lower()}_{event.lower()}":
+        f"AFTER {event}{' OF ' + DATA_VERSION_UPDATE_OF[table] if event == 'UPDATE' and table in DATA_VERSION_UPDATE_OF else ''} "
+        f"ON {table} BEGIN {DATA_VERSION_BUMP.format(table=table)}; END"
+    for table in VERSIONED_TABLES
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+}
+
+# full text search over destinations and pilots, for the pick lists.
+# name -> (content table, id column, indexed columns, tokenizer). the
+# unicode61 tables answer word prefix searches ('heat' -> Heathrow), the
+# trigram ones substring and misspelt searches ('heathrw'). all of them
+# are external content tables - they store only the index and read the
+# text back from the real table
+SEARCH_TABLES = {
+    'Search_destinations': ('Destinations', 'destination_id', ['destination_name', 'country', 'airport_code'],
+                            "unicode61 remove_diacritics 2", "prefix='1 2 3'"),
+    'Search_destinations_trigram': ('Destinations', 'destination_id', ['destination_name', 'country', 'airport_code'],
+                                    "trigram", None),
+    'Search_pilots': ('Pilots', 'pilot_id', ['first_name', 'last_name', 'license_number'],
+                      "unicode61 remove_diacritics 2", "prefix='1 2 3'"),
+    'Search_pilots_trigram': ('Pilots', 'pilot_id', ['first_name', 'last_name', 'license_number'],
+                              "trigram", None),
+}
+
+
+def _search_table_sql(name):
+    """CREATE VIRTUAL TABLE for one SEARCH_TABLES entry"""
+    table, id_column, columns, tokenizer, prefix = SEARCH_TABLES[name]
+    options = [*columns, f"content='{table}'", f"content_rowid='{id_column}'", f"tokenize='{tokenizer}'"]
+    if prefix:
+        options.append(prefix)
+    return f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({', '.join(options)})"
+
+
+def _search_triggers(name):
+    """
+    trigger name -> body keeping one search table in step with its
+    content table. external content tables need the old values to
+    remove a row, hence the 'delete' command rather than a DELETE
+    """
+    table, id_column, columns, _, _ = SEARCH_TABLES[name]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f"NEW.{column}" for column in columns)
+    old_values = ', '.join(f"OLD.{column}" for column in columns)
+    insert = f"INSERT INTO {name} (rowid, {column_list}) VALUES (NEW.{id_column}, {new_values});"
+    delete = (f"INSERT INTO {name} ({name}, rowid, {column_list}) "
+              f"VALUES ('delete', OLD.{id_column}, {old_values});")
+    prefix = f"trg_{name.lower()}"
+    return {
+        f"{prefix}_insert": f"AFTER INSERT ON {table} BEGIN {insert} END",
+        f"{prefix}_update": f"AFTER UPDATE OF {column_list} ON {table} BEGIN {delete} {insert} END",
+        f"{prefix}_delete": f"AFTER DELETE ON {table} BEGIN {delete} END",
+    }
+
+
+# per-term document counts of the trigram indexes, so a fuzzy search can
+# skip trigrams nearly every row has
+SEARCH_VOCAB_TABLES = {f"{name}_vocab": name for name, spec in SEARCH_TABLES.items() if spec[3] == 'trigram'}
+
+SEARCH_TRIGGERS = {trigger: body for name in SEARCH_TABLES for trigger, body in _search_triggers(name).items()}
+
+# secondary indexes. changing this list needs a new migration that calls
+# sync_indexes so existing databases pick it up. the names it has created
+# are recorded in schema_indexes - only those are ever dropped, indexes
+# added by hand are left alone whatever they're called
+INDEXES = [
+    # flight listing filters - status / destination / origin / airline / date
+    ('idx_flights_status_departure', 'Flights', 'status, departure_time'),
+    ('idx_flights_destination_departure', 'Flights', 'destination_id, departure_time'),
+    ('idx_flights_origin_departure', 'Flights', 'origin_id, departure_time'),
+    ('idx_flights_airline_departure', 'Flights', 'airline_id, departure_time'),
+    ('idx_flights_departure', 'Flights', 'departure_time'),
+
+    # crew lookups by pilot and by flight (covers the fa.status = 'Active' joins)
+    ('idx_assignments_pilot_status_flight', 'Flight_assignments', 'pilot_id, status, flight_id'),
+    ('idx_assignments_flight_status', 'Flight_assignments', 'flight_id, status, pilot_id'),
+
+    # pilot pick lists and per airline lookups
+    ('idx_pilots_status', 'Pilots', 'status'),
+    ('idx_pilots_airline', 'Pilots', 'airline_id'),
+]
+
+SCHEMA_INDEXES_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_indexes (
+        name TEXT PRIMARY KEY
+    ) WITHOUT ROWID
+'''
+
+SCHEMA_VERSION_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+class SchemaError(Exception):
+    """
+    database layout that the migrations can't upgrade
+    """
+
+
+def _columns(cur, table):
+    """column names of a table, empty if it doesn't exist"""
+    cur.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def create_base_tables(cur):
+    """
+    the five core tables
+
+    refuses the 3 table layout older versions of seed_database.py made
+    (pilot_id on Flights, no Airlines) since there's no airline to fill in
+    """
+    flight_columns = _columns(cur, 'Flights')
+    if flight_columns and 'airline_id' not in flight_columns:
+        raise SchemaError(
+            "database uses the old seed_database.py layout (no airlines) - "
+            "recreate it with: python seed_database.py --reset")
+
+    for _, sql in TABLES:
+        cur.execute(sql)
+
+
+def add_epoch_columns(cur):
+    """
+    departure_epoch / arrival_epoch on Flights plus the triggers that
+    keep them filled. existing rows get backfilled once
+    """
+    if 'departure_epoch' not in _columns(cur, 'Flights'):
+        cur.execute("ALTER TABLE Flights ADD COLUMN departure_epoch INTEGER")
+        cur.execute("ALTER TABLE Flights ADD COLUMN arrival_epoch INTEGER")
+        cur.execute('''
+            UPDATE Flights
+            SET departure_epoch = CAST(strftime('%s', departure_time) AS INTEGER),
+                arrival_epoch = CAST(strftime('%s', arrival_time) AS INTEGER)
+        ''')
+
+    for name, body in EPOCH_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def add_report_aggregates(cur):
+    """
+    report summary tables and their triggers, backfilled from the
+    flights already there
+    """
+    for statement in REPORT_AGGREGATE_TABLES:
+        cur.execute(statement)
+    for name, body in REPORT_AGGREGATE_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    for statement in REPORT_AGGREGATE_REBUILD:
+        cur.execute(statement)
+
+
+def sync_indexes(cur):
+    """
+    creates every index in INDEXES, drops the ones an earlier INDEXES
+    created that are no longer listed, then runs ANALYZE so the planner
+    has fresh stats
+    """
+    cur.execute(SCHEMA_INDEXES_SQL)
+    wanted = {name for name, _, _ in INDEXES}
+    cur.execute("SELECT name FROM schema_indexes")
+    for (name,) in cur.fetchall():
+        if name not in wanted:
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+            cur.execute("DELETE FROM schema_indexes WHERE name = ?", (name,))
+
+    for name, table, columns in INDEXES:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    cur.executemany("INSERT OR IGNORE INTO schema_indexes (name) VALUES (?)", [(name,) for name in wanted])
+
+    cur.execute("ANALYZE")
+
+
+def add_data_versions(cur):
+    """
+    Data_version table with a row for every VERSIONED_TABLES entry, and
+    the triggers that bump it
+    """
+    cur.execute(DATA_VERSION_TABLE)
+    cur.executemany("INSERT OR IGNORE INTO Data_version (table_name) VALUES (?)",
+                    [(table,) for table in VERSIONED_TABLES])
+    for name, body in DATA_VERSION_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def search_available(cur):
+    """
+    whether this sqlite build has FTS5 with the trigram tokenizer (3.34+)
+    """
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        return False
+    cur.execute("PRAGMA compile_options")
+    return any(option == 'ENABLE_FTS5' for (option,) in cur.fetchall())
+
+
+def add_search_index(cur):
+    """
+    the SEARCH_TABLES full text indexes, filled from the rows already
+    there, and the triggers that keep them in sync. skipped on a sqlite
+    without FTS5 - search falls back to LIKE there
+    """
+    if not search_available(cur):
+        return
+    for name in SEARCH_TABLES:
+        cur.execute(_search_table_sql(name))
+        cur.execute(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")
+    for vocab, name in SEARCH_VOCAB_TABLES.items():
+        cur.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {vocab} USING fts5vocab({name}, 'row')")
+    for name, body in SEARCH_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def ensure_search_index(cur):
+    """
+    builds the search indexes if this sqlite can and any piece is missing
+
+    migration 6 is recorded even on a sqlite without FTS5, so it can't be
+    relied on to have built them - this runs on every migrate instead and
+    picks them up once the sqlite is upgraded. a missing trigger means the
+    indexes may have missed writes, so everything is rebuilt then too
+    """
+    if search_index_missing(cur):
+        add_search_index(cur)
+
+
+def search_index_missing(cur):
+    """
+    whether this sqlite could have the search indexes but some search
+    table, vocab table or trigger isn't there
+    """
+    if not search_available(cur):
+        return False
+    cur.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+    present = {name for (name,) in cur.fetchall()}
+    wanted = list(SEARCH_TABLES) + list(SEARCH_VOCAB_TABLES) + list(SEARCH_TRIGGERS)
+    return any(name not in present for name in wanted)
+
+
+def bump_data_versions(cur, tables=None):
+    """
+    marks tables (default all of them) as changed - for writes made while
+    the version triggers were dropped
+    """
+    for table in tables or VERSIONED_TABLES:
+        cur.execute(DATA_VERSION_BUMP.format(table=table))
+
+
+def data_versions(cur):
+    """
+    current change counters
+
+    Returns:
+        dict of {table name: (version, modified_at unix time)}
+    """
+    cur.execute("SELECT table_name, version, modified_at FROM Data_version")
+    return {table: (version, modified_at) for table, version, modified_at in cur.fetchall()}
+
+
+# (version, description, step) - applied in order, each in its own transaction
+MIGRATIONS = [
+    (1, 'core tables', create_base_tables),
+    (2, 'flight epoch columns', add_epoch_columns),
+    (3, 'report summary tables', add_report_aggregates),
+    (4, 'secondary indexes', sync_indexes),
+    (5, 'data version counters', add_data_versions),
+    (6, 'search indexes', add_search_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(cur):
+    """highest applied migration, 0 for a new database"""
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+
+def migrate(conn):
+    """
+    brings a database up to LATEST_VERSION
+
+    each pending migration runs inside BEGIN IMMEDIATE and is recorded in
+    schema_version in the same transaction, so a failed step leaves
+    nothing half applied. the version is re-read after taking the write
+    lock, so two processes starting together don't both apply a step.
+    afterwards the search indexes are built if they're missing
+
+    Returns:
+        list of (version, description) applied
+    """
+    cur = conn.cursor()
+    if conn.in_transaction:
+        conn.commit()
+    cur.execute(SCHEMA_VERSION_SQL)
+
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current_version(cur):
+            continue
+
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            if version > current_version(cur):
+                step(cur)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+                applied.append((version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    # not a numbered migration - see ensure_search_index
+    if search_index_missing(cur):
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            ensure_search_index(cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def drop_bulk_load_objects(cur):
+    """
+    drops the secondary indexes, report, version and search triggers
+    before a bulk load - building / counting once afterwards is far
+    cheaper than row by row
+    """
+    for name, _, _ in INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+    for name in list(REPORT_AGGREGATE_TRIGGERS) + list(DATA_VERSION_TRIGGERS) + list(SEARCH_TRIGGERS):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def restore_bulk_load_objects(cur):
+    """
+    puts back what drop_bulk_load_objects removed, recomputes the report
+    summaries and search indexes for the loaded data and marks every
+    table as changed
+    """
+    add_report_aggregates(cur)
+    add_search_index(cur)
+    add_data_versions(cur)
+    bump_data_versions(cur)
+    sync_indexes(cur)
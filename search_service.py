@@ -0,0 +1,282 @@
+import re
+from difflib import SequenceMatcher
+
+from base_service import BaseService
+
+
+DEFAULT_LIMIT = 10
+
+# trigram candidates looked at per result wanted, before re-ranking them
+FUZZY_CANDIDATES = 5
+
+# how close (0-1) a misspelt search has to be to a name or code to count
+FUZZY_MIN_SCORE = 0.7
+
+# trigrams found in more than this share of rows say nothing about which
+# row was meant ('000' in licence numbers) and only make the search slow
+FUZZY_COMMON_TRIGRAM = 0.1
+
+# what each search returns, the indexes behind it and the bm25 column
+# weights (an airport code or licence number hit beats a name hit)
+SEARCHES = {
+    'destinations': {
+        'table': 'Destinations',
+        'id': 'destination_id',
+        'columns': ['destination_name', 'country', 'airport_code'],
+        'prefix_index': 'Search_destinations',
+        'trigram_index': 'Search_destinations_trigram',
+        'weights': (2.0, 1.0, 5.0),
+    },
+    'pilots': {
+        'table': 'Pilots',
+        'id': 'pilot_id',
+        'columns': ['first_name', 'last_name', 'license_number'],
+        'prefix_index': 'Search_pilots',
+        'trigram_index': 'Search_pilots_trigram',
+        'weights': (2.0, 2.0, 5.0),
+    },
+}
+
+
+def _words(text):
+    """search text split into words, lowercased"""
+    return re.findall(r'\w+', text.lower())
+
+
+def _one_edit_variants(word):
+    """
+    the word plus every copy with one letter dropped or two neighbours
+    swapped - between them they share trigrams with most single typos
+    """
+    variants = {word}
+    for i in range(len(word)):
+        variants.add(word[:i] + word[i + 1:])
+        if i < len(word) - 1:
+            variants.add(word[:i] + word[i + 1] + word[i] + word[i + 2:])
+    return variants
+
+
+def _quote(term):
+    """one FTS5 string literal"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SearchService(BaseService):
+    """
+    finds destinations and pilots by what the user types
+
+    backed by the FTS5 indexes from schema.SEARCH_TABLES, which triggers
+    keep in sync with Destinations and Pilots. a search first matches
+    every word as a prefix ('lon hea' -> London Heathrow), best bm25
+    first. only if that finds nothing does the trigram index look for
+    substring and misspelt matches ('heathrw'), re-ranked by how close
+    they are. without FTS5 in the sqlite build it falls back to LIKE
+
+    the pick_* methods are the interactive version used instead of
+    printing every destination / pilot
+    """
+
+    def __init__(self, db_manager):
+        """
+        setup search service
+        """
+        super().__init__(db_manager)
+        self._indexed = None
+
+    def search_destinations(self, text, limit=DEFAULT_LIMIT):
+        """
+        destinations matching a name, country or IATA code
+
+        Returns:
+            list of (destination_id, destination_name, country, airport_code), best first
+        """
+        return self.search('destinations', text, limit)
+
+    def search_pilots(self, text, limit=DEFAULT_LIMIT):
+        """
+        pilots matching a first / last name or licence number
+
+        Returns:
+            list of (pilot_id, first_name, last_name, license_number), best first
+        """
+        return self.search('pilots', text, limit)
+
+    def search(self, kind, text, limit=DEFAULT_LIMIT):
+        """
+        top `limit` matches for text
+
+        Args:
+            kind: a SEARCHES key
+            text: what the user typed
+            limit: max rows returned
+
+        Returns:
+            list of (id, column, ...) tuples, best first
+        """
+        spec = SEARCHES[kind]
+        words = _words(text)
+        if not words or limit <= 0:
+            return []
+        if not self._has_index():
+            return self._search_like(spec, words, limit)
+
+        return self._search_prefix(spec, words, limit) or self._search_fuzzy(spec, words, limit)
+
+    def _has_index(self):
+        """whether migration 6 could build the FTS5 tables on this database"""
+        if self._indexed is None:
+            self.cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Search_pilots'")
+            self._indexed = self.cur.fetchone() is not None
+        return self._indexed
+
+    def _search_prefix(self, spec, words, limit):
+        """every word as a prefix of some column, best bm25 first"""
+        index = spec['prefix_index']
+        weights = ', '.join(str(weight) for weight in spec['weights'])
+        columns = ', '.join(spec['columns'])
+        self.cur.execute(f'''
+            SELECT rowid, {columns}
+            FROM {index}
+            WHERE {index} MATCH ?
+            ORDER BY bm25({index}, {weights})
+            LIMIT ?
+        ''', (' '.join(_quote(word) + '*' for word in words), limit))
+        return self.cur.fetchall()
+
+    def _search_fuzzy(self, spec, words, limit):
+        """
+        rows sharing trigrams with the search, re-ranked by similarity
+
+        the trigram index is asked for rows containing trigrams of the
+        search words or of their one-edit variants, which catches
+        substrings and most typos - bm25 puts the rows sharing the most
+        first. those candidates are then scored word by word against each
+        column and the ones too far off dropped
+        """
+        match = self._trigram_match(spec, words)
+        if not match:
+            return []
+
+        index = spec['trigram_index']
+        columns = ', '.join(spec['columns'])
+        self.cur.execute(f'''
+            SELECT rowid, {columns}
+            FROM {index}
+            WHERE {index} MATCH ?
+            ORDER BY bm25({index})
+            LIMIT ?
+        ''', (match, limit * FUZZY_CANDIDATES))
+
+        # names repeat a lot, so each (word, value) pair is only compared
+        # once, and pairs whose cheap upper bounds are already below
+        # FUZZY_MIN_SCORE count as no match without the full comparison
+        matchers = {word: SequenceMatcher(None, b=word) for word in words}
+        ratios = {}
+
+        def ratio(word, value):
+            if (word, value) not in ratios:
+                matcher = matchers[word]
+                matcher.set_seq1(value)
+                close = (matcher.real_quick_ratio() >= FUZZY_MIN_SCORE
+                         and matcher.quick_ratio() >= FUZZY_MIN_SCORE)
+                ratios[word, value] = matcher.ratio() if close else 0.0
+            return ratios[word, value]
+
+        scored = []
+        for row in self.cur.fetchall():
+            values = [word for value in row[1:] for word in _words(str(value))]
+            score = sum(max(ratio(word, value) for value in values) for word in words) / len(words)
+            if score >= FUZZY_MIN_SCORE:
+                scored.append((score, row))
+        scored.sort(key=lambda item: -item[0])
+        return [row for _, row in scored[:limit]]
+
+    def _trigram_match(self, spec, words):
+        """
+        FTS5 query for the fuzzy search: the trigrams of every word and of
+        its one-edit variants, ORed. trigrams no row has are left out, and
+        so are the ones most rows have (unless nothing rarer is left)
+
+        Returns:
+            the query, or None if there's no usable trigram
+        """
+        wanted = sorted({variant[i:i + 3]
+                         for word in words for variant in _one_edit_variants(word)
+                         for i in range(len(variant) - 2)})
+        if not wanted:
+            return None
+
+        self.cur.execute(f"SELECT COUNT(*) FROM {spec['table']}")
+        common = max(1, int(self.cur.fetchone()[0] * FUZZY_COMMON_TRIGRAM))
+        self.cur.execute(f'''
+            SELECT term, doc FROM {spec['trigram_index']}_vocab
+            WHERE term IN ({', '.join('?' * len(wanted))})
+        ''', wanted)
+        present = sorted((doc, term) for term, doc in self.cur.fetchall())
+        if not present:
+            return None
+
+        useful = [trigram for doc, trigram in present if doc <= common] or [present[0][1]]
+        return ' OR '.join(_quote(trigram) for trigram in useful)
+
+    def _search_like(self, spec, words, limit):
+        """fallback without FTS5 - every word somewhere in one of the columns"""
+        columns = spec['columns']
+        match_any = '(' + ' OR '.join(f"{column} LIKE ?" for column in columns) + ')'
+        params = [f"%{word}%" for word in words for _ in columns]
+        self.cur.execute(f'''
+            SELECT {spec['id']}, {', '.join(columns)}
+            FROM {spec['table']}
+            WHERE {' AND '.join([match_any] * len(words))}
+            ORDER BY {columns[0]}
+            LIMIT ?
+        ''', params + [limit])
+        return self.cur.fetchall()
+
+    def pick_destination(self, prompt="destination"):
+        """
+        asks the user to find a destination and pick one
+
+        a number is taken as the ID straight away, anything else is
+        searched and the matches listed to choose from
+
+        Returns:
+            destination_id, or None if nothing matched
+        """
+        text = input(f"Search {prompt} (name, country or airport code, or ID): ").strip()
+        if text.isdigit():
+            return int(text)
+
+        matches = self.search_destinations(text)
+        if not matches:
+            print("No matching destinations.")
+            return None
+        for destination_id, name, country, code in matches:
+            print(f"{destination_id}. {name} ({code}, {country})")
+        if len(matches) == 1:
+            return matches[0][0]
+        return int(input(f"Enter {prompt} ID: "))
+
+    def pick_pilot(self, prompt="pilot"):
+        """
+        asks the user to find a pilot and pick one
+
+        a number is taken as the ID straight away, anything else is
+        searched and the matches listed to choose from
+
+        Returns:
+            pilot_id, or None if nothing matched
+        """
+        text = input(f"Search {prompt} (name or licence number, or ID): ").strip()
+        if text.isdigit():
+            return int(text)
+
+        matches = self.search_pilots(text)
+        if not matches:
+            print("No matching pilots.")
+            return None
+        for pilot_id, first_name, last_name, license_number in matches:
+            print(f"{pilot_id}. {first_name} {last_name} ({license_number})")
+        if len(matches) == 1:
+            return matches[0][0]
+        return int(input(f"Enter {prompt} ID: "))
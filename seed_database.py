@@ -9,15 +9,32 @@ This script does data seeding including:
 - Bulk operations
 
 Usage:
-    python seed_database.py [--reset] [--stats] [--additional]
+    python seed_database.py [--reset] [--stats] [--additional] [--check-plans]
+    python seed_database.py --reset --flights N [--pilots M] [--airports K] [--days D] [--seed S]
 """
 
-import sqlite3
 import os
 import argparse
+import heapq
+import string
+from bisect import bisect
+import time
 from datetime import datetime, timedelta
+from itertools import accumulate
 import random
-from models import SampleData
+from models import SampleData, AIRCRAFT_CAPACITY
+import schema
+from database import DatabaseManager
+from pilot_service import ROLES
+
+
+def remove_database_files(db_name):
+    """
+    deletes a database file along with its WAL / shared memory files
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_name + suffix):
+            os.remove(db_name + suffix)
 
 
 class DatabaseSeeder:
@@ -33,37 +50,37 @@ class DatabaseSeeder:
         setup database seeder
         """
         self.db_name = db_name
+        self.db_manager = None
         self.conn = None
         self.cur = None
 
     def connect(self):
         """
         connect to sqlite database
+
+        goes through DatabaseManager so the schema is the same one the app
+        uses (and any pending migrations get applied). sample data is left
+        to seed_comprehensive_data
         """
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.cur = self.conn.cursor()
+            self.db_manager = DatabaseManager(self.db_name, populate=False)
+            self.conn, self.cur = self.db_manager.get_connection()
             print(f"Connected to database: {self.db_name}")
         except Exception as e:
             print(f"Database connection error: {e}")
 
     def reset_database(self):
         """
-        reset database by dropping and recreating tables
+        reset database by deleting it and recreating the schema
 
         completely wipes database and recreates with fresh schema.
         useful for testing when you need clean slate
         """
         try:
             print("Resetting database...")
-
-            # drop tables
-            self.cur.execute("DROP TABLE IF EXISTS Flights")
-            self.cur.execute("DROP TABLE IF EXISTS Pilots")
-            self.cur.execute("DROP TABLE IF EXISTS Destinations")
-
-            # recreate
-            self.create_tables()
+            self.close()
+            remove_database_files(self.db_name)
+            self.connect()
             print("Database reset completed")
 
         except Exception as e:
@@ -73,56 +90,12 @@ class DatabaseSeeder:
         """
         create database tables with proper schema
 
-        creates the 3 main tables with appropriate constraints and foreign keys
+        applies any pending migrations from schema.py
         """
         try:
-            # destinations
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Destinations (
-                    destination_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    destination_name TEXT NOT NULL UNIQUE,
-                    country TEXT NOT NULL,
-                    airport_code TEXT NOT NULL UNIQUE,
-                    timezone TEXT NOT NULL,
-                    created_date DATE DEFAULT CURRENT_DATE
-                )
-            ''')
-
-            # pilots
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Pilots (
-                    pilot_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    first_name TEXT NOT NULL,
-                    last_name TEXT NOT NULL,
-                    license_number TEXT NOT NULL UNIQUE,
-                    experience_years INTEGER NOT NULL,
-                    hire_date DATE NOT NULL,
-                    status TEXT DEFAULT 'Active' CHECK(status IN ('Active', 'Inactive', 'On Leave'))
-                )
-            ''')
-
-            # flights
-            self.cur.execute('''
-                CREATE TABLE IF NOT EXISTS Flights (
-                    flight_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    flight_number TEXT NOT NULL UNIQUE,
-                    origin_id INTEGER NOT NULL,
-                    destination_id INTEGER NOT NULL,
-                    pilot_id INTEGER,
-                    departure_time DATETIME NOT NULL,
-                    arrival_time DATETIME NOT NULL,
-                    status TEXT DEFAULT 'Scheduled' CHECK(status IN ('Scheduled', 'Delayed', 'Cancelled', 'Completed', 'In-Flight')),
-                    aircraft_type TEXT NOT NULL,
-                    capacity INTEGER NOT NULL,
-                    created_date DATE DEFAULT CURRENT_DATE,
-                    FOREIGN KEY (origin_id) REFERENCES Destinations (destination_id),
-                    FOREIGN KEY (destination_id) REFERENCES Destinations (destination_id),
-                    FOREIGN KEY (pilot_id) REFERENCES Pilots (pilot_id)
-                )
-            ''')
-
-            self.conn.commit()
-            print("Tables created successfully")
+            applied = schema.migrate(self.conn)
+            print(f"Tables created successfully (schema version {schema.LATEST_VERSION}, "
+                  f"{len(applied)} migrations applied)")
 
         except Exception as e:
             print(f"Error creating tables: {e}")
@@ -131,43 +104,13 @@ class DatabaseSeeder:
         """
         seed database with sample data using SampleData class
 
-        populates all tables with realistic data including destinations,
-        pilots and flights. maintains referential integrity
+        populates all tables with realistic data including airlines,
+        destinations, pilots, flights and crew. maintains referential integrity
         """
-        try:
-            sample_data = SampleData()
-
-            print("Seeding comprehensive data...")
-
-            # destinations
-            destinations = sample_data.get_destinations()
-            self.cur.executemany('''
-                INSERT INTO Destinations (destination_name, country, airport_code, timezone)
-                VALUES (?, ?, ?, ?)
-            ''', destinations)
-            print(f"✓ Inserted {len(destinations)} destinations")
-
-            # pilots
-            pilots = sample_data.get_pilots()
-            self.cur.executemany('''
-                INSERT INTO Pilots (first_name, last_name, license_number, experience_years, hire_date)
-                VALUES (?, ?, ?, ?, ?)
-            ''', pilots)
-            print(f"✓ Inserted {len(pilots)} pilots")
-
-            # flights
-            flights = sample_data.get_flights()
-            self.cur.executemany('''
-                INSERT INTO Flights (flight_number, origin_id, destination_id, pilot_id, departure_time, arrival_time, status, aircraft_type, capacity)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', flights)
-            print(f"✓ Inserted {len(flights)} flights")
-
-            self.conn.commit()
-            print("Data seeding completed successfully!")
-
-        except Exception as e:
-            print(f"Error seeding data: {e}")
+        print("Seeding comprehensive data...")
+        self.db_manager.populate_sample_data()
+        self.db_manager.reference_cache.invalidate()
+        self.db_manager.crew_schedule.invalidate()
 
     def display_statistics(self):
         """
@@ -229,8 +172,296 @@ class DatabaseSeeder:
         """
         close database connection
         """
-        if self.conn:
-            self.conn.close()
+        if self.db_manager:
+            self.db_manager.close_connection()
+            self.db_manager = None
+            self.conn = self.cur = None
+
+
+class ScheduleGenerator:
+    """
+    synthetic data generator for production sized databases
+
+    makes K airports, M pilots and N flights over D days, plus crew for
+    every flight. everything comes from one seeded random.Random so the
+    same options always give the same database.
+
+    flights are generated a day at a time in departure order and written
+    in chunks with executemany, one transaction per chunk. the secondary
+    indexes and report triggers are dropped for the load and rebuilt once
+    at the end, which is far cheaper than maintaining them row by row
+    """
+
+    # departures per hour of the day - quiet at night, morning and evening banks
+    HOUR_WEIGHTS = [1, 1, 1, 1, 2, 4, 8, 10, 10, 9, 8, 7, 7, 7, 7, 8, 9, 10, 10, 9, 7, 5, 3, 2]
+
+    # (max duration in hours, aircraft types) - longer flights get bigger aircraft
+    AIRCRAFT_BY_RANGE = [
+        (3, ['Embraer E190', 'Airbus A320', 'Boeing 737-800', 'Boeing 737 MAX 8', 'Airbus A321']),
+        (8, ['Boeing 787-9', 'Airbus A321', 'Airbus A350-900']),
+        (None, ['Boeing 777-300ER', 'Airbus A350-900', 'Airbus A380', 'Boeing 787-9']),
+    ]
+
+    FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+                   'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+                   'Thomas', 'Sarah', 'Charles', 'Karen', 'Ahmed', 'Yuki', 'Priya', 'Lars', 'Sofia']
+    LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+                  'Rodriguez', 'Martinez', 'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Martin',
+                  'Lee', 'Tanaka', 'Patel', 'Nielsen', 'Rossi', 'Schmidt', 'Dubois', 'Kim', 'Silva']
+
+    # minutes a pilot rests between flights
+    TURNAROUND = 60
+
+    def __init__(self, db_name, flights=100000, pilots=500, airports=30, days=365, seed=42,
+                 chunk_size=100000, start_date='2025-01-01'):
+        """
+        setup generator
+
+        Args:
+            db_name: database file to fill, must be empty
+            flights / pilots / airports: how many of each to make
+            days: how many days the schedule spans
+            seed: random seed
+            chunk_size: flights per executemany / transaction
+            start_date: first day of the schedule (YYYY-MM-DD). flights
+                before the middle of the schedule are marked as flown
+        """
+        self.db_name = db_name
+        self.flights = flights
+        self.pilots = pilots
+        self.airports = airports
+        self.days = days
+        self.chunk_size = chunk_size
+        self.start = datetime.strptime(start_date, '%Y-%m-%d')
+        self.rng = random.Random(seed)
+        self.db_manager = None
+
+    def generate(self):
+        """
+        fills the database
+
+        Returns:
+            (flights, assignments) inserted, or None if the database
+            already has data
+        """
+        self.db_manager = DatabaseManager(self.db_name, profile='bulk-load', populate=False)
+        conn, cur = self.db_manager.get_connection()
+
+        cur.execute("SELECT (SELECT COUNT(*) FROM Airlines) + (SELECT COUNT(*) FROM Flights)")
+        if cur.fetchone()[0]:
+            print("Database already has data. Use --reset to recreate.")
+            return None
+
+        started = time.perf_counter()
+        airlines = self._insert_airlines(cur)
+        airports = self._insert_airports(cur)
+        pilot_ids = self._insert_pilots(cur, len(airlines))
+        conn.commit()
+
+        # deferred: rebuilt in one pass once all rows are in
+        schema.drop_bulk_load_objects(cur)
+        conn.commit()
+
+        flight_count, assignment_count = self._insert_flights(conn, cur, airlines, airports, pilot_ids)
+        print()
+        print(f"Inserted {flight_count} flights and {assignment_count} crew assignments "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        print("Building indexes and report summaries...")
+        schema.restore_bulk_load_objects(cur)
+        conn.commit()
+        self.db_manager.reference_cache.invalidate()
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+        return flight_count, assignment_count
+
+    def _insert_airlines(self, cur):
+        """
+        the sample airlines. returns [(airline_id, code, fleet_size)]
+        """
+        rows = [(i + 1,) + airline for i, airline in enumerate(SampleData().get_airlines())]
+        cur.executemany('''
+            INSERT INTO Airlines (airline_id, airline_name, airline_code, country, headquarters,
+                                  fleet_size, established_year)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        print(f"✓ Inserted {len(rows)} airlines")
+        return [(row[0], row[2], row[5]) for row in rows]
+
+    def _insert_airports(self, cur):
+        """
+        the sample airports, then made up ones with free 3 letter codes.
+        every airport gets a position (km on a flat map) for flight times
+        and a popularity weight so a few hubs get most of the traffic.
+        returns [(destination_id, x, y)] and sets self._airport_weights
+        """
+        samples = SampleData().get_destinations()
+        used = {row[2] for row in samples}
+        rows = samples[:self.airports]
+
+        codes = (a + b + c for a in string.ascii_uppercase
+                 for b in string.ascii_uppercase for c in string.ascii_uppercase)
+        while len(rows) < self.airports:
+            code = next(codes)
+            if code in used:
+                continue
+            _, country, _, timezone = self.rng.choice(samples)
+            rows.append((f"{code} Airport", country, code, timezone))
+
+        rows = [(i + 1,) + row for i, row in enumerate(rows)]
+        cur.executemany('''
+            INSERT INTO Destinations (destination_id, destination_name, country, airport_code, timezone)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        print(f"✓ Inserted {len(rows)} airports")
+
+        self._airport_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(rows))))
+        return [(row[0], self.rng.uniform(0, 15000), self.rng.uniform(0, 7000)) for row in rows]
+
+    def _insert_pilots(self, cur, airline_count):
+        """
+        made up pilots, about 95% Active. returns the active pilot ids
+        """
+        rows = []
+        active = []
+        for pilot_id in range(1, self.pilots + 1):
+            experience = self.rng.randint(1, 35)
+            hired = self.start - timedelta(days=experience * 365 + self.rng.randint(0, 364))
+            status = self.rng.choices(['Active', 'On Leave', 'Inactive'], weights=[95, 3, 2])[0]
+            rows.append((pilot_id, self.rng.choice(self.FIRST_NAMES), self.rng.choice(self.LAST_NAMES),
+                         f"LIC{pilot_id:07d}", experience, hired.strftime('%Y-%m-%d'),
+                         self.rng.randint(1, airline_count), status))
+            if status == 'Active':
+                active.append(pilot_id)
+
+        cur.executemany('''
+            INSERT INTO Pilots (pilot_id, first_name, last_name, license_number, experience_years,
+                                hire_date, airline_id, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        print(f"✓ Inserted {len(rows)} pilots ({len(active)} active)")
+        return active
+
+    def _insert_flights(self, conn, cur, airlines, airports, pilot_ids):
+        """
+        generates and inserts the flights and their crew, chunk by chunk
+
+        flights come out in departure order, so crew can be handed out
+        with a heap of (free at, pilot_id): a flight takes the pilots that
+        have been free longest, and they're free again TURNAROUND minutes
+        after it lands. no pilot ever gets two overlapping flights
+        """
+        rng = self.rng
+        random_value = rng.random
+        start_epoch = int((self.start - datetime(1970, 1, 1)).total_seconds())
+        now_epoch = start_epoch + self.days * 86400 // 2
+
+        # timestamps are built from cached day / minute strings - much
+        # quicker than strftime for millions of rows
+        day_strings = [(self.start + timedelta(days=day)).strftime('%Y-%m-%d ') for day in range(self.days + 3)]
+        minute_strings = [f"{minute // 60:02d}:{minute % 60:02d}:00" for minute in range(1440)]
+
+        def timestamp(epoch):
+            day, seconds = divmod(epoch - start_epoch, 86400)
+            return day_strings[day] + minute_strings[seconds // 60]
+
+        # weighted picks are a bisect into cumulative weights - same idea
+        # as random.choices but without building a list per call
+        airline_weights = list(accumulate(airline[2] for airline in airlines))
+        hour_weights = list(accumulate(self.HOUR_WEIGHTS))
+        airport_weights = self._airport_weights
+        airline_total, hour_total, airport_total = airline_weights[-1], hour_weights[-1], airport_weights[-1]
+        numbers = {}
+
+        crew_free = [(0, pilot_id) for pilot_id in pilot_ids]
+        heapq.heapify(crew_free)
+
+        flight_rows = []
+        assignment_rows = []
+        flight_id = 0
+        total_assignments = 0
+        per_day, extra = divmod(self.flights, self.days)
+
+        for day in range(self.days):
+            day_epoch = start_epoch + day * 86400
+            departures = sorted(
+                day_epoch + (bisect(hour_weights, random_value() * hour_total) * 60
+                             + int(random_value() * 12) * 5) * 60
+                for _ in range(per_day + (1 if day < extra else 0)))
+
+            for departure in departures:
+                flight_id += 1
+                origin = airports[bisect(airport_weights, random_value() * airport_total)]
+                destination = origin
+                while destination is origin:
+                    destination = airports[bisect(airport_weights, random_value() * airport_total)]
+                airline_id, code, _ = airlines[bisect(airline_weights, random_value() * airline_total)]
+
+                distance = ((origin[1] - destination[1]) ** 2 + (origin[2] - destination[2]) ** 2) ** 0.5
+                minutes = int(distance / 800 * 60) + 30 + rng.randint(0, 20)
+                arrival = departure + minutes * 60
+
+                for max_hours, aircraft_types in self.AIRCRAFT_BY_RANGE:
+                    if max_hours is None or minutes <= max_hours * 60:
+                        aircraft = rng.choice(aircraft_types)
+                        break
+
+                if arrival <= now_epoch:
+                    status = 'Cancelled' if rng.random() < 0.02 else 'Completed'
+                elif departure <= now_epoch:
+                    status = 'In-Flight'
+                else:
+                    status = rng.choices(['Scheduled', 'Delayed', 'Cancelled'], weights=[90, 8, 2])[0]
+
+                number = numbers.get(code, 100)
+                numbers[code] = number + 1
+
+                flight_rows.append((
+                    flight_id, f"{code}{number}", airline_id, origin[0], destination[0],
+                    timestamp(departure), timestamp(arrival), departure, arrival,
+                    status, aircraft, AIRCRAFT_CAPACITY[aircraft]))
+
+                # cancelled flights don't need a crew
+                if status != 'Cancelled':
+                    roles = ROLES if minutes > 8 * 60 else ROLES[:2]
+                    free_again = arrival + self.TURNAROUND * 60
+                    for role in roles:
+                        if not crew_free or crew_free[0][0] > departure:
+                            break  # nobody free - flight goes short handed
+                        pilot_id = heapq.heapreplace(crew_free, (free_again, crew_free[0][1]))[1]
+                        assignment_rows.append((flight_id, pilot_id, day_strings[day][:-1], role, 'Active'))
+
+                if len(flight_rows) >= self.chunk_size:
+                    total_assignments += self._write_chunk(conn, cur, flight_rows, assignment_rows)
+                    flight_rows, assignment_rows = [], []
+
+        if flight_rows:
+            total_assignments += self._write_chunk(conn, cur, flight_rows, assignment_rows)
+        return flight_id, total_assignments
+
+    def _write_chunk(self, conn, cur, flight_rows, assignment_rows):
+        """
+        inserts one chunk of flights and crew in a single transaction
+        """
+        cur.executemany('''
+            INSERT INTO Flights (flight_id, flight_number, airline_id, origin_id, destination_id,
+                                 departure_time, arrival_time, departure_epoch, arrival_epoch,
+                                 status, aircraft_type, capacity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', flight_rows)
+        cur.executemany('''
+            INSERT INTO Flight_assignments (flight_id, pilot_id, assignment_date, role, status)
+            VALUES (?, ?, ?, ?, ?)
+        ''', assignment_rows)
+        conn.commit()
+        print(f"  ... {flight_rows[-1][0]} flights", end='\r', flush=True)
+        return len(assignment_rows)
+
+    def close(self):
+        """
+        close database connection
+        """
+        if self.db_manager:
+            self.db_manager.close_connection()
 
 
 def main():
@@ -240,6 +471,10 @@ def main():
     provides command line options for database operations:
     - --reset: reset database and seed fresh data
     - --stats: show database statistics
+    - --check-plans: show which service queries still scan whole tables
+    - --rebuild-reports: recompute the report summary tables from scratch
+    - --flights N (with --pilots, --airports, --days, --seed, --chunk-size):
+      generate a large synthetic schedule into an empty database
     - default: create tables and seed if empty
     """
     parser = argparse.ArgumentParser(
@@ -248,20 +483,74 @@ def main():
                         help='Reset database before seeding')
     parser.add_argument('--stats', action='store_true',
                         help='Display database statistics')
+    parser.add_argument('--check-plans', action='store_true',
+                        help='Report query plans that still do full table scans')
+    parser.add_argument('--rebuild-reports', action='store_true',
+                        help='Recompute the report summary tables')
+    parser.add_argument('--db', default='FlightManagement.db',
+                        help='Database file')
+
+    generator_options = parser.add_argument_group('synthetic data generator')
+    generator_options.add_argument('--flights', type=int,
+                                   help='Generate this many flights (turns the generator on)')
+    generator_options.add_argument('--pilots', type=int, default=500,
+                                   help='Number of pilots to generate')
+    generator_options.add_argument('--airports', type=int, default=30,
+                                   help='Number of airports to generate')
+    generator_options.add_argument('--days', type=int, default=365,
+                                   help='Number of days the schedule spans')
+    generator_options.add_argument('--start-date', default='2025-01-01',
+                                   help='First day of the schedule (YYYY-MM-DD)')
+    generator_options.add_argument('--seed', type=int, default=42,
+                                   help='Random seed, same seed gives the same data')
+    generator_options.add_argument('--chunk-size', type=int, default=100000,
+                                   help='Flights inserted per transaction')
 
     args = parser.parse_args()
 
-    seeder = DatabaseSeeder()
+    if args.check_plans:
+        db_manager = DatabaseManager(args.db)
+        db_manager.check_query_plans()
+        db_manager.close_connection()
+        return
+
+    if args.rebuild_reports:
+        db_manager = DatabaseManager(args.db)
+        db_manager.rebuild_report_aggregates()
+        db_manager.close_connection()
+        return
+
+    if args.flights is not None:
+        if args.airports < 2 or args.days < 1 or args.flights < 0 or args.pilots < 0:
+            parser.error('need at least 2 airports, 1 day and no negative counts')
+
+        if args.reset:
+            print("Resetting database...")
+            remove_database_files(args.db)
+
+        generator = ScheduleGenerator(args.db, args.flights, args.pilots, args.airports, args.days,
+                                      args.seed, args.chunk_size, args.start_date)
+        try:
+            generator.generate()
+        finally:
+            generator.close()
+
+        if not args.stats:
+            return
+
+    seeder = DatabaseSeeder(args.db)
     seeder.connect()
 
     try:
-        if args.reset:
+        if args.reset and args.flights is None:
             seeder.reset_database()
             seeder.seed_comprehensive_data()
+        elif seeder.cur is None:
+            print("Database could not be opened. Use --reset to recreate.")
+            return
         elif not args.stats:
             # default - seed if empty
-            seeder.cur.execute(
-                "SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
+            seeder.cur.execute("SELECT COUNT(*) FROM Airlines")
             if seeder.cur.fetchone()[0] == 0:
                 seeder.create_tables()
                 seeder.seed_comprehensive_data()
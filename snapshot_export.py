@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Schedule Snapshot Export for Flight Management System
+
+Writes every flight, with its airline, airports and crew summary, to a
+columnar file so analysts can query a copy instead of the live database.
+
+Formats (picked from the file extension):
+- .arrow / .feather: Arrow IPC file, memory-mappable (needs pyarrow)
+- .parquet: Parquet (needs pyarrow)
+- .npz: numpy arrays, fallback when pyarrow isn't installed (needs numpy)
+
+Airline, airports, status and aircraft type are dictionary encoded -
+small integer codes plus one dictionary of the distinct values.
+
+Usage:
+    python snapshot_export.py OUTPUT [--db PATH] [--chunk-size N]
+"""
+
+import argparse
+import os
+import time
+
+import schema
+from database import DatabaseManager
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional - .npz export still works with numpy
+    pa = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# one row per flight. crew_count / captain_id come from correlated
+# subqueries on the (flight_id, status, pilot_id) assignment index
+SNAPSHOT_SQL = '''
+    SELECT f.flight_id, f.flight_number, f.airline_id, f.origin_id, f.destination_id,
+           f.status, f.aircraft_type, f.departure_epoch, f.arrival_epoch, f.capacity,
+           (SELECT COUNT(*) FROM Flight_assignments fa
+            WHERE fa.flight_id = f.flight_id AND fa.status = 'Active') as crew_count,
+           (SELECT MIN(fa.pilot_id) FROM Flight_assignments fa
+            WHERE fa.flight_id = f.flight_id AND fa.status = 'Active' AND fa.role = 'Captain') as captain_id
+    FROM Flights f
+    ORDER BY f.flight_id
+'''
+
+# dictionary encoded columns: name -> (position in SNAPSHOT_SQL row, query
+# returning (key, value) for every possible key)
+DICTIONARY_COLUMNS = {
+    'airline': (2, "SELECT airline_id, airline_code FROM Airlines ORDER BY airline_id"),
+    'origin': (3, "SELECT destination_id, airport_code FROM Destinations ORDER BY destination_id"),
+    'destination': (4, "SELECT destination_id, airport_code FROM Destinations ORDER BY destination_id"),
+    'status': (5, "SELECT DISTINCT status, status FROM Flights WHERE status IS NOT NULL ORDER BY status"),
+    'aircraft_type': (6, "SELECT DISTINCT aircraft_type, aircraft_type FROM Flights "
+                         "WHERE aircraft_type IS NOT NULL ORDER BY aircraft_type"),
+}
+
+# plain columns: name -> (position in SNAPSHOT_SQL row, numpy dtype)
+PLAIN_COLUMNS = {
+    'flight_id': (0, 'int64'),
+    'flight_number': (1, 'str'),
+    'departure_epoch': (7, 'int64'),
+    'arrival_epoch': (8, 'int64'),
+    'capacity': (9, 'int32'),
+    'crew_count': (10, 'int16'),
+    'captain_id': (11, 'int64'),
+}
+
+FORMATS = {
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.parquet': 'parquet',
+    '.npz': 'npz',
+}
+
+
+class SnapshotExporter:
+    """
+    streams the flight schedule into a columnar file
+
+    everything is read inside one read transaction on a pooled connection,
+    so the file is a consistent snapshot. in WAL mode that doesn't block
+    the CLI's writers. rows are fetched and written chunk_size at a time,
+    only one chunk of python objects is alive at once
+    """
+
+    def __init__(self, db_manager, chunk_size=100000):
+        """
+        setup exporter
+
+        Args:
+            db_manager: DatabaseManager to read from
+            chunk_size: rows per fetch / record batch
+        """
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+
+    def export(self, path, file_format=None):
+        """
+        writes the snapshot
+
+        Args:
+            path: output file
+            file_format: 'arrow', 'parquet' or 'npz'; taken from the
+                extension if not given
+
+        Returns:
+            number of flights written
+        """
+        file_format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if file_format not in ('arrow', 'parquet', 'npz'):
+            raise ValueError(f"Unknown snapshot format for {path} - use .arrow, .parquet or .npz")
+        if file_format in ('arrow', 'parquet') and pa is None:
+            raise RuntimeError(f"pyarrow is needed for {file_format} snapshots (pip install pyarrow)")
+        if file_format == 'npz' and np is None:
+            raise RuntimeError("numpy is needed for npz snapshots (pip install numpy)")
+
+        with self.db_manager.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                dictionaries = {}
+                for name, (_, sql) in DICTIONARY_COLUMNS.items():
+                    cur.execute(sql)
+                    dictionaries[name] = cur.fetchall()
+
+                cur.execute(SNAPSHOT_SQL)
+                chunks = self._chunks(cur, dictionaries)
+                if file_format == 'npz':
+                    return _write_npz(path, chunks, dictionaries)
+                return _write_arrow(path, chunks, dictionaries, file_format)
+            finally:
+                conn.rollback()
+
+    def _chunks(self, cur, dictionaries):
+        """
+        yields each fetched chunk as {column: list of values}, with the
+        dictionary columns already turned into codes (None if unknown)
+        """
+        codes = {name: {key: code for code, (key, _) in enumerate(pairs)}
+                 for name, pairs in dictionaries.items()}
+
+        while True:
+            rows = cur.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            values = list(zip(*rows))
+            chunk = {name: values[position] for name, (position, _) in PLAIN_COLUMNS.items()}
+            for name, (position, _) in DICTIONARY_COLUMNS.items():
+                lookup = codes[name].get
+                chunk[name] = [lookup(key) for key in values[position]]
+            yield chunk
+
+
+def _write_arrow(path, chunks, dictionaries, file_format):
+    """
+    writes chunks as arrow record batches to an IPC file or parquet
+    """
+    types = {
+        'flight_id': pa.int64(),
+        'flight_number': pa.string(),
+        'departure_epoch': pa.timestamp('s'),
+        'arrival_epoch': pa.timestamp('s'),
+        'capacity': pa.int32(),
+        'crew_count': pa.int16(),
+        'captain_id': pa.int64(),
+    }
+    values = {name: pa.array([value for _, value in pairs], type=pa.string())
+              for name, pairs in dictionaries.items()}
+
+    fields = [pa.field(name, types[name]) for name in PLAIN_COLUMNS]
+    fields += [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    schema = pa.schema(fields)
+
+    if file_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    rows = 0
+    try:
+        for chunk in chunks:
+            arrays = [pa.array(chunk[name], type=types[name]) for name in PLAIN_COLUMNS]
+            arrays += [pa.DictionaryArray.from_arrays(pa.array(chunk[name], type=pa.int32()), values[name])
+                       for name in DICTIONARY_COLUMNS]
+            batch = pa.record_batch(arrays, schema=schema)
+            if file_format == 'parquet':
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def _write_npz(path, chunks, dictionaries):
+    """
+    writes chunks as one .npz of column arrays
+
+    each chunk is converted to compact numpy arrays straight away and the
+    arrays are joined at the end. dictionary columns become int32 codes
+    plus a '<name>_values' array, missing codes / captain ids are -1
+    """
+    dtypes = {name: dtype for name, (_, dtype) in PLAIN_COLUMNS.items()}
+    dtypes.update(dict.fromkeys(DICTIONARY_COLUMNS, 'int32'))
+
+    parts = {name: [] for name in dtypes}
+    for chunk in chunks:
+        for name, dtype in dtypes.items():
+            if dtype == 'str':
+                parts[name].append(np.array(chunk[name], dtype=str))
+            else:
+                parts[name].append(np.array([-1 if value is None else value for value in chunk[name]],
+                                            dtype=dtype))
+
+    arrays = {name: np.concatenate(pieces) if pieces else np.array([], dtype=dtypes[name])
+              for name, pieces in parts.items()}
+    for name, pairs in dictionaries.items():
+        arrays[f"{name}_values"] = np.array([value for _, value in pairs], dtype=str)
+
+    # savez adds .npz itself if it's missing, write through a file object to keep the name
+    with open(path, 'wb') as output:
+        np.savez(output, **arrays)
+    return len(arrays['flight_id'])
+
+
+def main():
+    """
+    main function with command line interface
+
+    exports the schedule of the given database (FlightManagement.db by
+    default) to OUTPUT
+    """
+    parser = argparse.ArgumentParser(
+        description='Flight Management Schedule Snapshot Export')
+    parser.add_argument('output', help='Output file (.arrow, .feather, .parquet or .npz)')
+    parser.add_argument('--db', default='FlightManagement.db', help='Database file to export')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='Rows fetched and written per chunk')
+
+    args = parser.parse_args()
+
+    # read-only - exporting must not migrate the file or seed sample data
+    # into it, and a missing / empty database is an error
+    try:
+        db_manager = DatabaseManager(args.db, read_only=True)
+    except schema.SchemaError as e:
+        print(f"Error opening database: {e}")
+        return
+
+    try:
+        started = time.perf_counter()
+        rows = SnapshotExporter(db_manager, args.chunk_size).export(args.output)
+        elapsed = time.perf_counter() - started
+        print(f"Exported {rows} flights to {args.output} in {elapsed:.1f}s "
+              f"({os.path.getsize(args.output) / 1e6:.1f} MB)")
+    except (ValueError, RuntimeError) as e:
+        print(f"Error exporting snapshot: {e}")
+    finally:
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
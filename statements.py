@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+
+
+# sqlite3 keeps a per-connection cache of prepared statements keyed by SQL
+# text (cached_statements, default 128). it's sized above the registry so
+# every shape the registry hands out can stay prepared on every connection
+REGISTRY_SIZE = 128
+STATEMENT_CACHE_SIZE = 256
+
+# flight -> airline / origin / destination joins shared by the flight listing
+# and the pilot queries
+FLIGHT_JOINS = '''
+    JOIN Airlines a ON f.airline_id = a.airline_id
+    JOIN Destinations o ON f.origin_id = o.destination_id
+    JOIN Destinations d ON f.destination_id = d.destination_id
+'''
+
+
+class StatementRegistry:
+    """
+    central registry of SQL statements keyed by query shape
+
+    a shape is anything hashable that fully decides the SQL text, e.g.
+    ('flights', ('status', 'window'), False, True) for a filtered listing.
+    the SQL for each shape is built once and kept in a bounded LRU, so
+    repeated queries reuse the exact same text and sqlite3 can skip
+    parsing and planning by finding it in its statement cache
+    """
+
+    def __init__(self, max_size=REGISTRY_SIZE):
+        """
+        setup registry
+
+        Args:
+            max_size: max number of shapes kept, least recently used go first
+        """
+        self.max_size = max_size
+        self._statements = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, shape, builder):
+        """
+        returns the SQL for a shape, building it on first use
+
+        Args:
+            shape: hashable key for the statement
+            builder: function returning the SQL text, only called on a miss
+        """
+        with self._lock:
+            sql = self._statements.get(shape)
+            if sql is not None:
+                self._statements.move_to_end(shape)
+                self.hits += 1
+                return sql
+            self.misses += 1
+
+        sql = builder()
+
+        with self._lock:
+            self._statements[shape] = sql
+            self._statements.move_to_end(shape)
+            while len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+                self.evictions += 1
+        return sql
+
+    def get_stats(self):
+        """
+        hit/miss counters for the registry
+
+        Returns:
+            dict with hits, misses, evictions, hit_rate and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._statements),
+            }
+
+    def clear(self):
+        """
+        drops all statements and resets the counters
+        """
+        with self._lock:
+            self._statements.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# process wide registry used by the services
+registry = StatementRegistry()
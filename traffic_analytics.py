@@ -0,0 +1,285 @@
+import threading
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flight_query import date_range_bounds
+
+try:
+    import numpy as np
+except ImportError:  # optional - counting falls back to plain python
+    np = None
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# fixed width windows: name -> (seconds, offset the windows are aligned to).
+# weeks start on monday - 1970-01-05 was the first one
+WINDOWS = {
+    'hour': (3600, 0),
+    'day': (86400, 0),
+    'week': (7 * 86400, 4 * 86400),
+}
+
+# repeating windows: name -> (seconds, buckets per cycle, shift, labels).
+# 1970-01-01 was a thursday, hence the day_of_week shift of 3
+CYCLES = {
+    'hour_of_day': (3600, 24, 0, [f"{hour:02d}:00" for hour in range(24)]),
+    'day_of_week': (86400, 7, 3, ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']),
+}
+
+# which epoch column and which id column each kind of count uses
+DIRECTIONS = {
+    'departures': ('departure_epoch', 'origin_id'),
+    'arrivals': ('arrival_epoch', 'destination_id'),
+}
+GROUPS = {
+    'airport': 'destinations',
+    'airline': 'airlines',
+}
+
+TRAFFIC_COLUMNS = ['departure_epoch', 'arrival_epoch', 'origin_id', 'destination_id', 'airline_id']
+
+TRAFFIC_SQL = f'''
+    SELECT {', '.join(TRAFFIC_COLUMNS)}
+    FROM Flights
+    WHERE departure_epoch IS NOT NULL AND arrival_epoch IS NOT NULL
+'''
+
+# counts[i][j] is the number of flights for row_ids[i] in buckets[j].
+# counts is a 2d numpy array when numpy is installed, else a list of lists
+TrafficMatrix = namedtuple('TrafficMatrix', ['row_ids', 'buckets', 'counts'])
+
+
+def to_epoch(value):
+    """seconds since 1970 for a naive datetime"""
+    return int((value - EPOCH).total_seconds())
+
+
+class TrafficAnalytics:
+    """
+    time bucketed departure / arrival counts per airport or airline
+
+    pulls the epoch and id columns of every flight into flat integer
+    arrays once, then each report is a couple of vectorized passes over
+    them (np.bincount) instead of a GROUP BY over the Flights table.
+    the arrays stay loaded while the Flights Data_version is the one they
+    were read at, so several reports in a row only pay for the load once
+    and a write from anywhere - another process, an import, a batch -
+    makes the next report reload them
+
+    numpy is optional - without it the same counts are done in a python
+    loop over array('q') columns, which works but is much slower
+    """
+
+    def __init__(self, db_manager, chunk_size=100000):
+        """
+        setup analytics - nothing is loaded until first use
+
+        Args:
+            db_manager: DatabaseManager to read Flights through
+            chunk_size: rows fetched per round trip while loading
+        """
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self._columns = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        (re)loads the flight columns from the database
+        """
+        conn, cur = self.db_manager.get_connection()
+        # version first - a write landing before the SELECT only makes
+        # the next report reload once more than needed
+        version = _flights_version(cur)
+        cur.execute(TRAFFIC_SQL)
+
+        if np is not None:
+            chunks = []
+            while True:
+                rows = cur.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.int64))
+            table = np.concatenate(chunks) if chunks else np.empty((0, len(TRAFFIC_COLUMNS)), dtype=np.int64)
+            columns = {name: table[:, i] for i, name in enumerate(TRAFFIC_COLUMNS)}
+        else:
+            columns = {name: array('q') for name in TRAFFIC_COLUMNS}
+            lists = [columns[name] for name in TRAFFIC_COLUMNS]
+            while True:
+                rows = cur.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                for values, column in zip(zip(*rows), lists):
+                    column.extend(values)
+
+        with self._lock:
+            self._columns = columns
+            self._version = version
+
+    def invalidate(self):
+        """
+        drop the loaded columns so the next report reloads them
+        """
+        with self._lock:
+            self._columns = None
+            self._version = None
+
+    def _get_columns(self):
+        """
+        the loaded columns, (re)loading them if Flights changed since
+        """
+        conn, cur = self.db_manager.get_connection()
+        version = _flights_version(cur)
+        with self._lock:
+            columns, loaded_version = self._columns, self._version
+        if columns is None or loaded_version != version:
+            self.load()
+            columns = self._columns
+        return columns
+
+    def traffic_matrix(self, direction='departures', group='airport', bucket='hour',
+                       start_date=None, end_date=None):
+        """
+        flight counts per airport / airline per time bucket
+
+        Args:
+            direction: 'departures' (by origin) or 'arrivals' (by destination)
+            group: 'airport' or 'airline' (airline ignores direction for the id)
+            bucket: 'hour', 'day', 'week' for consecutive windows, or
+                'hour_of_day', 'day_of_week' to fold every flight into one
+                repeating cycle (e.g. to find an airport's peak hour)
+            start_date / end_date: optional YYYY-MM-DD window, inclusive
+
+        Returns:
+            TrafficMatrix with one row per airport / airline id in the
+            reference cache (zero rows included) and one column per bucket.
+            consecutive buckets are labelled by their start time
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group: {group}")
+        if bucket not in WINDOWS and bucket not in CYCLES:
+            raise ValueError(f"Unknown bucket: {bucket}")
+
+        time_column, id_column = DIRECTIONS[direction]
+        if group == 'airline':
+            id_column = 'airline_id'
+        row_ids = list(self.db_manager.reference_cache.table(GROUPS[group]).ids)
+
+        window = None
+        if start_date is not None or end_date is not None:
+            start, end = date_range_bounds(start_date or end_date, end_date or start_date)
+            window = (to_epoch(datetime.strptime(start, '%Y-%m-%d')),
+                      to_epoch(datetime.strptime(end, '%Y-%m-%d')))
+
+        columns = self._get_columns()
+        count = _count_numpy if np is not None else _count_python
+        return count(columns[time_column], columns[id_column], row_ids, bucket, window)
+
+    def peak_buckets(self, matrix):
+        """
+        busiest bucket of every row that has any traffic
+
+        Returns:
+            list of (row_id, bucket label, count, total), busiest total first
+        """
+        peaks = []
+        for row_id, counts in zip(matrix.row_ids, matrix.counts):
+            counts = list(counts)
+            total = sum(counts)
+            if total:
+                best = max(range(len(counts)), key=counts.__getitem__)
+                peaks.append((row_id, matrix.buckets[best], int(counts[best]), int(total)))
+        peaks.sort(key=lambda peak: peak[3], reverse=True)
+        return peaks
+
+
+def _flights_version(cur):
+    """Flights row of Data_version, None if the table has none"""
+    cur.execute("SELECT version FROM Data_version WHERE table_name = 'Flights'")
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _window_labels(origin, width, count, bucket):
+    """start time label for each consecutive bucket"""
+    fmt = '%Y-%m-%d %H:00' if bucket == 'hour' else '%Y-%m-%d'
+    return [(EPOCH + timedelta(seconds=origin + i * width)).strftime(fmt) for i in range(count)]
+
+
+def _window_origin(first, width, offset, window):
+    """epoch the first consecutive bucket starts at"""
+    start = window[0] if window else first
+    return (start - offset) // width * width + offset
+
+
+def _count_numpy(times, ids, row_ids, bucket, window):
+    """
+    vectorized counting: map ids to dense rows, times to bucket numbers,
+    then one bincount over row * buckets + bucket
+    """
+    if window:
+        keep = (times >= window[0]) & (times < window[1])
+        times, ids = times[keep], ids[keep]
+
+    id_array = np.array(row_ids, dtype=np.int64)
+    size = int(max(id_array.max() if len(id_array) else 0, ids.max() if len(ids) else 0)) + 1
+    lookup = np.full(size, -1, dtype=np.int64)
+    lookup[id_array] = np.arange(len(id_array))
+    rows = lookup[ids] if len(ids) else ids
+    known = rows >= 0
+    rows, times = rows[known], times[known]
+
+    if bucket in CYCLES:
+        width, count, shift, labels = CYCLES[bucket]
+        buckets = (times // width + shift) % count
+    else:
+        width, offset = WINDOWS[bucket]
+        if len(times) == 0 and not window:
+            return TrafficMatrix(row_ids, [], np.zeros((len(row_ids), 0), dtype=np.int64))
+        origin = _window_origin(int(times.min()) if len(times) else 0, width, offset, window)
+        last = window[1] - 1 if window else int(times.max())
+        count = (last - origin) // width + 1
+        buckets = (times - origin) // width
+        labels = _window_labels(origin, width, count, bucket)
+
+    flat = np.bincount(rows * count + buckets, minlength=len(row_ids) * count)
+    return TrafficMatrix(row_ids, labels, flat.reshape(len(row_ids), count))
+
+
+def _count_python(times, ids, row_ids, bucket, window):
+    """
+    same counts as _count_numpy with a plain loop, for when numpy isn't there
+    """
+    pairs = zip(times, ids)
+    if window:
+        pairs = [(time, row_id) for time, row_id in pairs if window[0] <= time < window[1]]
+    else:
+        pairs = list(pairs)
+    index = {row_id: i for i, row_id in enumerate(row_ids)}
+
+    if bucket in CYCLES:
+        width, count, shift, labels = CYCLES[bucket]
+        origin = 0
+    else:
+        width, offset = WINDOWS[bucket]
+        if not pairs and not window:
+            return TrafficMatrix(row_ids, [], [[] for _ in row_ids])
+        origin = _window_origin(min(time for time, _ in pairs) if pairs else 0, width, offset, window)
+        last = window[1] - 1 if window else max(time for time, _ in pairs)
+        count = (last - origin) // width + 1
+        labels = _window_labels(origin, width, count, bucket)
+
+    counts = [[0] * count for _ in row_ids]
+    for time, row_id in pairs:
+        row = index.get(row_id)
+        if row is not None:
+            slot = (time - origin) // width
+            if bucket in CYCLES:
+                slot = (slot + shift) % count
+            counts[row][slot] += 1
+    return TrafficMatrix(row_ids, labels, counts)